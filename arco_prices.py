@@ -1,94 +1,103 @@
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
+import plotly.io as pio
+
+from arco_pricing import (
+    DEFAULT_PRICING_TABLES,
+    OPEN_ENDED_SENTINEL,
+    compile_pricing_tables,
+    normalize_tier_table,
+)
+from arco_pricing.cache import (
+    CALIBRATION_CACHE,
+    DISTRIBUTION_CACHE,
+    SIMULATION_CACHE,
+    SWEEP_CACHE,
+    SectionMemo,
+    cached_cost_distribution,
+    cached_predictive_bands,
+    cached_run_simulation,
+    cached_run_sweep,
+    cached_tier_table,
+    pricing_fingerprint,
+)
+from arco_pricing.calibration import calibrate_rates
+from arco_pricing.curves import (
+    cost_curve,
+    max_leads_for_budget,
+    minimum_billing_break_even,
+)
+from arco_pricing.defaults import POC_FUNNEL_COUNTS
+from arco_pricing.incremental import IncrementalEvaluator
+from arco_pricing.instrumentation import (
+    RerunProfiler,
+    activate,
+    active_profiler,
+    add_span,
+    count,
+    span,
+    timed,
+)
+from arco_pricing.montecarlo import run_monte_carlo
+from arco_pricing.precompute import SLIDER_AXES, open_cube
+from arco_pricing.prefetch import Prefetcher
+
+try:
+    import resource
+except ImportError:  # Windows: sem pico de memória na barra lateral
+    resource = None
+
+# Início da execução do script, para o tempo de execução na barra lateral
+RUN_STARTED = time.perf_counter()
 
 # --- Configurações da Página ---
 st.set_page_config(
     page_title="Simulador de Custos de Prospecção", page_icon="💡", layout="wide"
 )
 
+# Execuções da sessão: uma execução que não chega ao fim foi interrompida por
+# um ajuste mais novo (o Streamlit reinicia o script em andamento) ou terminou
+# com erro; o script não tem como distinguir os dois casos
+st.session_state["reruns_started"] = st.session_state.get("reruns_started", 0) + 1
+
 # --- Configuração de Edição de Tabelas de Preços ---
 # Altere para False para desabilitar a edição das tabelas de preços
 ENABLE_PRICE_EDITING = True
 
-# --- Funções de Cálculo ---
-
-
-def calculate_tiered_cost(quantity, tiers_df):
-    """
-    Calcula o custo total com base em uma tabela de preços escalonada (por faixas).
-    A tabela deve ter as colunas 'Mínimo', 'Máximo', 'Valor'.
-    """
-    if quantity == 0:
-        return 0
-
-    # Garante que os tipos de dados estão corretos
-    tiers_df["Mínimo"] = tiers_df["Mínimo"].astype(float)
-    tiers_df["Máximo"] = tiers_df["Máximo"].astype(float)
-    tiers_df["Valor"] = tiers_df["Valor"].astype(float)
-
-    tiers_df = tiers_df.sort_values(by="Mínimo").reset_index(drop=True)
-
-    total_cost = 0
-
-    for _, row in tiers_df.iterrows():
-        min_val, max_val, price = row["Mínimo"], row["Máximo"], row["Valor"]
-
-        if quantity > min_val:
-            # Calcula a quantidade dentro desta faixa
-            items_in_tier = min(quantity, max_val) - min_val
-            cost_in_tier = items_in_tier * price
-            total_cost += cost_in_tier
-
-    return total_cost
-
-
-def run_simulation(total_leads, rates, pricing_tables, minimum_billing=0.0):
-    """
-    Executa uma simulação completa para um dado cenário.
-    """
-    # 1. Calcular a quantidade de eventos em cada etapa do funil
-    num_replies = total_leads * rates["response"]
-    num_no_replies = total_leads - num_replies
-    num_qualified = num_replies * rates["qualification"]
-    num_booked = num_qualified * rates["booking"]
-
-    # 2. Calcular o custo de cada componente
-    # Custo base: leads que não responderam
-    cost_no_reply = num_no_replies * pricing_tables["no_reply"].iloc[0]["Valor"]
-
-    # Custo dos leads que responderam (substitui o custo de R$0,20)
-    cost_replies = calculate_tiered_cost(num_replies, pricing_tables["leads"])
-
-    # Custos adicionais para eventos de sucesso
-    cost_qualified = calculate_tiered_cost(num_qualified, pricing_tables["qualified"])
-    cost_booked = calculate_tiered_cost(num_booked, pricing_tables["booked"])
-
-    # 3. Calcular o custo total e métricas
-    calculated_cost = cost_no_reply + cost_replies + cost_qualified + cost_booked
-
-    # Aplicar consumo mínimo
-    total_cost = max(calculated_cost, minimum_billing)
-
-    cpl = total_cost / total_leads if total_leads > 0 else 0
-    cpa = total_cost / num_booked if num_booked > 0 else 0
-
-    return {
-        "total_leads": total_leads,
-        "num_no_replies": num_no_replies,
-        "num_replies": num_replies,
-        "num_qualified": num_qualified,
-        "num_booked": num_booked,
-        "cost_no_reply": cost_no_reply,
-        "cost_replies": cost_replies,
-        "cost_qualified": cost_qualified,
-        "cost_booked": cost_booked,
-        "calculated_cost": calculated_cost,
-        "total_cost": total_cost,
-        "cpl": cpl,
-        "cpa": cpa,
-    }
+# --- Cubo pré-calculado ---
+# Pasta gerada por `python -m arco_pricing precompute` com os resultados da
+# grade dos sliders para a tabela padrão; sem ela, tudo é calculado ao vivo
+PRECOMPUTED_CUBE_DIR = os.environ.get(
+    "ARCO_PRICING_CUBE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "precomputed"),
+)
 
+# --- Instrumentação ---
+# Com esta variável, cada execução é instrumentada e gravada como uma linha
+# JSON no arquivo indicado; sem ela, só quando ligada na barra lateral
+PROFILE_LOG_PATH = os.environ.get("ARCO_PRICING_PROFILE_LOG")
+
+# --- Pré-cálculo em segundo plano ---
+# Threads compartilhadas por todas as sessões e trabalhos agendados por execução
+PREFETCH_WORKERS = 1
+MAX_PREFETCH_JOBS = 12
+
+# Intervalos e contadores desta execução (motor e seções da página)
+rerun_profiler = (
+    RerunProfiler(label="rerun")
+    if PROFILE_LOG_PATH or st.session_state.get("profile_reruns", False)
+    else None
+)
+activate(rerun_profiler)
 
 # --- Paleta de Cores ---
 BRAND_COLOR = "#39B5FF"  # Cor principal da marca
@@ -100,6 +109,15 @@ GRAY_2 = "#BDBDBD"  # Cinza claro
 GRAY_3 = "#E0E0E0"  # Cinza muito claro
 GRAY_4 = "#424242"  # Cinza escuro
 
+# Posteriores das taxas do funil calibradas pelas contagens do POC
+POC_RATE_POSTERIORS = calibrate_rates(POC_FUNNEL_COUNTS)
+
+
+def format_percent(rate):
+    """Formata uma taxa (0–1) como porcentagem com vírgula decimal."""
+    return f"{rate * 100:.1f}%".replace(".", ",")
+
+
 # --- Interface do Usuário (UI) ---
 
 st.title("Simulador de Custos de Prospecção")
@@ -108,31 +126,72 @@ st.markdown(
 )
 
 # --- Barra Lateral de Configurações ---
+# Início do trecho em medição, para os intervalos longos demais para `with`
+phase_started = time.perf_counter()
 st.sidebar.image("LOGO-COR.png", width=200)
 st.sidebar.header("⚙️ Configure a Simulação")
 
+poc = POC_FUNNEL_COUNTS
 st.sidebar.info(
     "**📊 Dados do POC:**\n\n"
-    "• 716 disparos\n"
-    "• 425 respostas (59,4%)\n"
-    "• 96 qualificados (22,6%)\n"
-    "• 32 agendamentos (33,3%)"
+    f"• {poc['leads']} disparos\n"
+    f"• {poc['replies']} respostas ({format_percent(poc['replies'] / poc['leads'])})\n"
+    f"• {poc['qualified']} qualificados "
+    f"({format_percent(poc['qualified'] / poc['replies'])})\n"
+    f"• {poc['booked']} agendamentos "
+    f"({format_percent(poc['booked'] / poc['qualified'])})"
 )
 
+# Taxas calibradas pelo POC: intervalo de 90% da posterior de cada taxa
+with st.sidebar.expander("🧪 Taxas Calibradas pelo POC", expanded=False):
+    st.caption(
+        "Posteriores Beta (prior uniforme) a partir das contagens do POC: "
+        "faixa em que cada taxa está com 90% de probabilidade."
+    )
+    for rate_label, posterior in zip(
+        ("Resposta", "Qualificação", "Agendamento"),
+        POC_RATE_POSTERIORS.values(),
+    ):
+        low, high = posterior.credible_interval()
+        st.caption(
+            f"**{rate_label}:** {format_percent(posterior.mean)} "
+            f"({format_percent(low)} a {format_percent(high)})"
+        )
+
 st.sidebar.subheader("🎯 Cenário de Simulação")
 
-target_total_leads = st.sidebar.slider(
+# Em lote, os ajustes do cenário e do consumo mínimo só são aplicados pelo
+# botão: arrastar um slider não dispara uma execução por posição
+batched_inputs = st.sidebar.toggle(
+    "Aplicar ajustes em lote",
+    key="batched_inputs",
+    help=(
+        "Os sliders e o consumo mínimo só atualizam a página ao clicar em "
+        "“Aplicar”, em vez de a cada mudança."
+    ),
+)
+# Com chaves, os widgets mantêm os valores ao entrar e sair do formulário
+scenario_inputs = (
+    st.sidebar.form("scenario_inputs", border=False)
+    if batched_inputs
+    else st.sidebar.container()
+)
+
+target_total_leads = scenario_inputs.slider(
     "Quantidade de Leads a serem processados",
     min_value=0,
     max_value=3500,
     value=1000,
     step=100,
+    key="total_leads",
 )
 
 # Colunas para organizar as taxas de conversão
-col1, col2 = st.sidebar.columns(2)
-target_response_rate = (
-    col1.slider(
+col1, col2 = scenario_inputs.columns(2)
+# Posições dos sliders das taxas (em %), usadas também para os vizinhos
+# pré-calculados em segundo plano
+rate_percents = {
+    "response": col1.slider(
         "Taxa de Resposta (%)",
         min_value=0.0,
         max_value=100.0,
@@ -140,12 +199,9 @@ target_response_rate = (
         step=0.5,
         format="%.1f%%",
         help="POC alcançou 59,4%",
-    )
-    / 100.0
-)
-
-target_qualification_rate = (
-    col2.slider(
+        key="response_rate",
+    ),
+    "qualification": col2.slider(
         "Taxa de Qualificação (% de Respostas)",
         min_value=0.0,
         max_value=100.0,
@@ -153,12 +209,9 @@ target_qualification_rate = (
         step=0.5,
         format="%.1f%%",
         help="POC alcançou 22,6%",
-    )
-    / 100.0
-)
-
-target_booking_rate = (
-    st.sidebar.slider(
+        key="qualification_rate",
+    ),
+    "booking": scenario_inputs.slider(
         "Taxa de Agendamento (% de Qualificados)",
         min_value=0.0,
         max_value=100.0,
@@ -166,23 +219,33 @@ target_booking_rate = (
         step=0.5,
         format="%.1f%%",
         help="POC alcançou 33,3%",
-    )
-    / 100.0
-)
+        key="booking_rate",
+    ),
+}
+target_response_rate = rate_percents["response"] / 100.0
+target_qualification_rate = rate_percents["qualification"] / 100.0
+target_booking_rate = rate_percents["booking"] / 100.0
 
 # Consumo mínimo mensal
-st.sidebar.subheader("💳 Cobrança Mínima")
-minimum_billing = st.sidebar.number_input(
+scenario_inputs.subheader("💳 Cobrança Mínima")
+minimum_billing = scenario_inputs.number_input(
     "Consumo Mínimo Mensal (R$)",
     min_value=0.0,
     max_value=50000.0,
     value=4997.0,
     step=100.0,
     help="Se o custo total for menor que este valor, você pagará o mínimo configurado",
+    key="minimum_billing",
 )
+if batched_inputs:
+    scenario_inputs.form_submit_button(
+        "Aplicar", type="primary", use_container_width=True
+    )
+add_span("Barra lateral · cenário", phase_started)
 
 
 # --- Função para formatar tabelas de preços ---
+@timed
 def format_price_table(df, show_ranges=True):
     """Formata a tabela de preços para melhor visualização"""
     if show_ranges and "Mínimo" in df.columns and "Máximo" in df.columns:
@@ -190,7 +253,7 @@ def format_price_table(df, show_ranges=True):
         df_display = df.copy()
         faixas = []
         for _, row in df_display.iterrows():
-            if row["Máximo"] >= 99999:
+            if row["Máximo"] >= OPEN_ENDED_SENTINEL:
                 faixa = f"{int(row['Mínimo']):,}+"
             else:
                 faixa = f"{int(row['Mínimo']):,} - {int(row['Máximo']):,}"
@@ -206,16 +269,900 @@ def format_price_table(df, show_ranges=True):
         return df_display
 
 
+# --- Funções dos gráficos de sensibilidade ---
+# Cores de cada cenário (-2 passos, -1 passo, target, +1 passo, +2 passos)
+SCENARIO_COLORS = {
+    0: GRAY_2,
+    1: GRAY_1,
+    2: BRAND_COLOR,
+    3: LIGHT_BLUE_2,
+    4: LIGHT_BLUE_1,
+}
+
+
+def build_rate_variations(target_rate, step):
+    """
+    Monta as variações de uma taxa em torno do target: duas abaixo, o target e
+    duas acima, descartando as que saem do intervalo 0–100%.
+    """
+    variations = {}
+    for multiple in (-2, -1, 0, 1, 2):
+        rate = target_rate + multiple * step
+        if multiple == 0:
+            variations[f"Target ({target_rate * 100:.1f}%)"] = target_rate
+        elif 0 <= rate <= 1.0:
+            variations[f"{multiple * step * 100:+.0f}pp ({rate * 100:.1f}%)"] = rate
+    return variations
+
+
+@timed
+def build_volume_figure(
+    rate_name,
+    rate_variations,
+    rates,
+    pricing_tables,
+    minimum_billing,
+    target_total_leads,
+    target_cost,
+    legend_title,
+    max_leads=3500,
+    predictive_bands=None,
+):
+    """
+    Gráfico de Custo Total vs. Quantidade de Leads variando uma das taxas.
+    Cada linha é a curva exata de custo, com vértices só onde ela muda de
+    inclinação (mudanças de faixa e consumo mínimo), e um marcador indica o
+    volume em que cada curva sai do consumo mínimo. Com `predictive_bands`,
+    as faixas preditivas calibradas pelo POC aparecem ao fundo (leque P5–P95
+    e P25–P75).
+    """
+    fig = go.Figure()
+    break_even_points = []
+
+    if predictive_bands is not None:
+        band_leads = predictive_bands.leads.tolist()
+        for low, high, opacity, band_name in (
+            (5, 95, 0.15, "POC: 90% dos meses"),
+            (25, 75, 0.3, "POC: 50% dos meses"),
+        ):
+            fig.add_trace(
+                go.Scatter(
+                    x=band_leads,
+                    y=predictive_bands.cost[high].tolist(),
+                    mode="lines",
+                    line=dict(width=0),
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+            fig.add_trace(
+                go.Scatter(
+                    x=band_leads,
+                    y=predictive_bands.cost[low].tolist(),
+                    mode="lines",
+                    line=dict(width=0),
+                    fill="tonexty",
+                    fillcolor=f"rgba(66, 66, 66, {opacity})",
+                    name=band_name,
+                    hoverinfo="skip",
+                )
+            )
+        fig.add_trace(
+            go.Scatter(
+                x=band_leads,
+                y=predictive_bands.cost[50].tolist(),
+                mode="lines",
+                line=dict(color=GRAY_4, width=1, dash="dash"),
+                name="POC: mediana",
+                hovertemplate="%{x:,} leads: R$ %{y:,.2f}<extra>POC (mediana)</extra>",
+            )
+        )
+
+    for idx, (scenario_name, rate) in enumerate(rate_variations.items()):
+        scenario_rates = rates.copy()
+        scenario_rates[rate_name] = rate
+        curve = cost_curve(
+            scenario_rates, pricing_tables, minimum_billing, max_leads=max_leads
+        )
+
+        is_target = "Target" in scenario_name
+        line_color = SCENARIO_COLORS.get(idx, BRAND_COLOR)
+        fig.add_trace(
+            go.Scatter(
+                x=curve.leads.tolist(),
+                y=curve.total_cost.tolist(),
+                mode="lines",
+                name=scenario_name,
+                line=dict(
+                    width=4 if is_target else 2.5,
+                    dash="solid" if is_target else "dot",
+                    color=line_color,
+                ),
+            )
+        )
+        if minimum_billing > 0 and not math.isnan(curve.break_even):
+            break_even_points.append((curve.break_even, line_color))
+
+    # Marcar onde cada curva sai do consumo mínimo
+    if break_even_points:
+        fig.add_trace(
+            go.Scatter(
+                x=[leads for leads, _ in break_even_points],
+                y=[minimum_billing] * len(break_even_points),
+                mode="markers",
+                marker=dict(
+                    size=10,
+                    symbol="diamond",
+                    color=[color for _, color in break_even_points],
+                    line=dict(color=GRAY_4, width=1),
+                ),
+                name="Fim do Consumo Mínimo",
+                hovertemplate="Consumo mínimo até %{x:,.0f} leads<extra></extra>",
+            )
+        )
+
+    # Adicionar ponto do cenário target
+    fig.add_trace(
+        go.Scatter(
+            x=[target_total_leads],
+            y=[target_cost],
+            mode="markers",
+            marker=dict(size=12, color="red", symbol="star"),
+            name="Seu Cenário Atual",
+        )
+    )
+
+    fig.update_layout(
+        xaxis_title="Quantidade de Leads Processados",
+        yaxis_title="Custo Total (R$)",
+        legend_title=legend_title,
+        hovermode="closest",
+    )
+    return fig
+
+
+@timed
+def build_cost_distribution_figure(distribution, expected_cost):
+    """
+    Histograma do custo total mensal (distribuição exata ou tentativas de
+    Monte Carlo), com o custo esperado da simulação determinística e os
+    percentis P5/P95 marcados.
+    """
+    frequencies, edges = distribution.cost_histogram()
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig = go.Figure(
+        go.Bar(
+            x=centers.tolist(),
+            y=(frequencies * 100).tolist(),
+            width=(edges[1:] - edges[:-1]).tolist(),
+            marker_color=LIGHT_BLUE_2,
+            name="Meses",
+            hovertemplate="R$ %{x:,.2f}<br>%{y:.2f}% dos meses<extra></extra>",
+        )
+    )
+    percentiles = distribution.cost_percentiles()
+    for label, value, color in (
+        ("P5", percentiles[5], GRAY_2),
+        ("Esperado", expected_cost, BRAND_COLOR),
+        ("P95", percentiles[95], GRAY_2),
+    ):
+        fig.add_vline(
+            x=value,
+            line=dict(color=color, dash="solid" if label == "Esperado" else "dash"),
+            annotation_text=label,
+        )
+    fig.update_layout(
+        xaxis_title="Custo Total no Mês (R$)",
+        yaxis_title="Probabilidade (%)",
+        showlegend=False,
+        bargap=0,
+        margin=dict(t=30),
+    )
+    return fig
+
+
+@timed
+def build_cost_breakdown(target_results):
+    """
+    Tabela formatada e gráfico de pizza da composição do custo do target,
+    com a linha de ajuste quando o consumo mínimo é aplicado.
+    """
+    calculated_cost = target_results["calculated_cost"]
+    final_cost = target_results["total_cost"]
+    has_minimum_charge = final_cost > calculated_cost
+    cost_data = {
+        "Componente": [
+            "Sem Resposta",
+            "Leads (com Resposta)",
+            "Leads Qualificados",
+            "Reuniões Agendadas",
+        ],
+        "Quantidade": [
+            int(target_results["num_no_replies"]),
+            int(target_results["num_replies"]),
+            int(target_results["num_qualified"]),
+            int(target_results["num_booked"]),
+        ],
+        "Custo (R$)": [
+            target_results["cost_no_reply"],
+            target_results["cost_replies"],
+            target_results["cost_qualified"],
+            target_results["cost_booked"],
+        ],
+    }
+
+    # Adicionar linha de consumo mínimo se aplicável
+    if has_minimum_charge:
+        cost_data["Componente"].append("Ajuste Consumo Mínimo")
+        cost_data["Quantidade"].append("-")
+        cost_data["Custo (R$)"].append(final_cost - calculated_cost)
+
+    cost_df = pd.DataFrame(cost_data)
+    cost_df["% do Total"] = (cost_df["Custo (R$)"] / final_cost * 100).fillna(0)
+
+    # Formatação para exibição
+    formatted_cost_df = cost_df.style.format(
+        {"Custo (R$)": "R$ {:,.2f}", "% do Total": "{:.1f}%"}
+    )
+
+    # Cores do gráfico de pizza (incluindo cor para consumo mínimo se aplicável)
+    pie_colors = [GRAY_3, LIGHT_BLUE_3, LIGHT_BLUE_2, BRAND_COLOR]
+    if has_minimum_charge:
+        pie_colors.append(GRAY_1)  # Cor para ajuste de consumo mínimo
+
+    fig_pie = go.Figure(
+        data=[
+            go.Pie(
+                labels=cost_df["Componente"],
+                values=cost_df["Custo (R$)"],
+                hole=0.3,
+                textinfo="label+percent",
+                marker_colors=pie_colors,
+            )
+        ]
+    )
+    fig_pie.update_layout(
+        title_text="Distribuição do Custo Total",
+        margin=dict(t=40, b=10, l=10, r=10),
+        showlegend=False,
+    )
+    return formatted_cost_df, fig_pie
+
+
+# --- Funções da matriz de sensibilidade ---
+# Taxas do heatmap (baseadas no POC: qualificação 22,6%, agendamento 33,3%)
+HEATMAP_QUALIFICATION_RATES = [i / 100.0 for i in range(0, 36, 5)]  # 0% a 35%
+HEATMAP_BOOKING_RATES = [i / 100.0 for i in range(0, 51, 5)]  # 0% a 50%
+
+# Visualizações das curvas por volume: taxa variada e passo das variações
+# (em pontos percentuais) em torno do target
+VOLUME_VIEWS = {
+    "Taxa de Resposta": ("response", 0.10),
+    "Taxa de Qualificação": ("qualification", 0.10),
+    "Taxa de Agendamento": ("booking", 0.15),
+}
+
+# Custom colorscale para os heatmaps de custo
+HEATMAP_COST_COLORSCALE = [
+    [0.0, BRAND_COLOR],  # Menor custo = azul da marca
+    [0.5, LIGHT_BLUE_3],  # Médio = azul claro
+    [1.0, GRAY_2],  # Maior custo = cinza
+]
+# Colorscale invertido para reuniões (mais = melhor)
+HEATMAP_MEETINGS_COLORSCALE = [
+    [0.0, GRAY_3],  # Menos reuniões = cinza claro
+    [0.5, LIGHT_BLUE_2],  # Médio = azul claro
+    [1.0, BRAND_COLOR],  # Mais reuniões = azul da marca
+]
+
+# Visualizações do heatmap: resultado da varredura, texto das células,
+# colorscale, título da barra de cores, valor no hover e título
+HEATMAP_VIEWS = {
+    "Custo Total": (
+        "total_cost",
+        lambda val: f"R$ {val:,.0f}",
+        HEATMAP_COST_COLORSCALE,
+        "Custo Total (R$)",
+        "Custo: R$ %{z:,.2f}",
+        "Custo Total por Combinação de Taxas",
+    ),
+    "Custo por Reunião (CPA)": (
+        "cpa",
+        lambda val: f"R$ {val:,.0f}",
+        HEATMAP_COST_COLORSCALE,
+        "CPA (R$)",
+        "CPA: R$ %{z:,.2f}",
+        "Custo por Reunião (CPA) por Combinação de Taxas",
+    ),
+    "Reuniões Agendadas": (
+        "num_booked",
+        lambda val: f"{int(val)}",
+        HEATMAP_MEETINGS_COLORSCALE,
+        "Reuniões",
+        "Reuniões: %{z:.0f}",
+        "Reuniões Agendadas por Combinação de Taxas",
+    ),
+}
+
+
+@timed
+def build_heatmap_figure(
+    matrix,
+    cell_text,
+    colorscale,
+    colorbar_title,
+    hover_value,
+    title,
+    target_qual_idx,
+    target_book_idx,
+):
+    """
+    Heatmap qualificação x agendamento com o valor de cada célula anotado e
+    uma estrela na célula mais próxima do target.
+    """
+    booking_labels = [f"{r * 100:.0f}%" for r in HEATMAP_BOOKING_RATES]
+    qualification_labels = [f"{q * 100:.0f}%" for q in HEATMAP_QUALIFICATION_RATES]
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=matrix,
+            x=booking_labels,
+            y=qualification_labels,
+            colorscale=colorscale,
+            text=cell_text,
+            texttemplate="%{text}",
+            textfont={"size": 9},
+            colorbar=dict(title=colorbar_title),
+            hovertemplate=(
+                "Qualificação: %{y}<br>Agendamento: %{x}<br>"
+                f"{hover_value}<extra></extra>"
+            ),
+        )
+    )
+
+    # Adicionar marcador para o cenário target
+    fig.add_trace(
+        go.Scatter(
+            x=[booking_labels[target_book_idx]],
+            y=[qualification_labels[target_qual_idx]],
+            mode="markers",
+            marker=dict(
+                size=20,
+                color=GRAY_4,
+                symbol="star",
+                line=dict(color="white", width=2),
+            ),
+            name="Seu Target",
+            showlegend=True,
+        )
+    )
+
+    fig.update_layout(
+        title=title,
+        xaxis_title="Taxa de Agendamento (% de Qualificados)",
+        yaxis_title="Taxa de Qualificação (% de Respostas)",
+        height=600,
+    )
+    return fig
+
+
+# --- Dependências e montagem das seções ---
+# Usadas pela página e pelos pré-cálculos em segundo plano, que precisam das
+# mesmas chaves para que a página encontre os resultados prontos
+
+
+def make_scenario_key(total_leads, rates, pricing_key, minimum_billing):
+    """Dependências das seções que usam o cenário completo."""
+    return (
+        total_leads,
+        rates["response"],
+        rates["qualification"],
+        rates["booking"],
+        pricing_key,
+        minimum_billing,
+    )
+
+
+def make_heatmap_key(total_leads, rates, pricing_key, minimum_billing):
+    """
+    Dependências das matrizes do heatmap: volume, taxa de resposta, tabelas
+    e consumo mínimo. As taxas de qualificação e agendamento do target só
+    mudam o marcador (ver `heatmap_target_cell`).
+    """
+    return (total_leads, rates["response"], pricing_key, minimum_billing)
+
+
+def heatmap_target_cell(rates):
+    """Linha e coluna do heatmap mais próximas do target."""
+    qual_idx = min(
+        range(len(HEATMAP_QUALIFICATION_RATES)),
+        key=lambda i: abs(HEATMAP_QUALIFICATION_RATES[i] - rates["qualification"]),
+    )
+    book_idx = min(
+        range(len(HEATMAP_BOOKING_RATES)),
+        key=lambda i: abs(HEATMAP_BOOKING_RATES[i] - rates["booking"]),
+    )
+    return qual_idx, book_idx
+
+
+@timed
+def heatmap_sweep(
+    total_leads, rates, compiled_pricing, minimum_billing, pricing_key, evaluator
+):
+    """Varredura qualificação x agendamento do heatmap."""
+    return cached_run_sweep(
+        {
+            "qualification": HEATMAP_QUALIFICATION_RATES,
+            "booking": HEATMAP_BOOKING_RATES,
+        },
+        total_leads,
+        rates,
+        compiled_pricing,
+        minimum_billing,
+        pricing_key=pricing_key,
+        evaluator=evaluator,
+    )
+
+
+def heatmap_view_figure(view_name, heatmap_slice, target_qual_idx, target_book_idx):
+    """Figura de uma visualização de `HEATMAP_VIEWS`."""
+    result_key, format_cell, colorscale, colorbar, hover, title = HEATMAP_VIEWS[
+        view_name
+    ]
+    matrix = heatmap_slice[result_key].tolist()
+    return build_heatmap_figure(
+        matrix,
+        [[format_cell(val) for val in row] for row in matrix],
+        colorscale,
+        colorbar,
+        hover,
+        title,
+        target_qual_idx,
+        target_book_idx,
+    )
+
+
+@timed
+def poc_predictive_bands(compiled_pricing, minimum_billing, pricing_key):
+    """Faixas preditivas calibradas pelo POC na grade de volumes dos gráficos."""
+    return cached_predictive_bands(
+        POC_FUNNEL_COUNTS,
+        range(0, 3501, 50),
+        compiled_pricing,
+        minimum_billing,
+        pricing_key=pricing_key,
+    )
+
+
+def volume_view_figure(
+    legend_title,
+    total_leads,
+    rates,
+    compiled_pricing,
+    minimum_billing,
+    pricing_key,
+    target_cost,
+    show_poc_bands,
+):
+    """Figura de uma visualização de `VOLUME_VIEWS`."""
+    rate_name, step = VOLUME_VIEWS[legend_title]
+    return build_volume_figure(
+        rate_name,
+        build_rate_variations(rates[rate_name], step),
+        rates,
+        compiled_pricing,
+        minimum_billing,
+        total_leads,
+        target_cost,
+        legend_title,
+        predictive_bands=poc_predictive_bands(
+            compiled_pricing, minimum_billing, pricing_key
+        )
+        if show_poc_bands
+        else None,
+    )
+
+
+def prefetch_jobs(
+    total_leads,
+    rate_percents,
+    compiled_pricing,
+    minimum_billing,
+    pricing_key,
+    evaluator,
+    views,
+):
+    """
+    Até `MAX_PREFETCH_JOBS` trabalhos de pré-cálculo para depois de uma
+    execução, na ordem de prioridade: as visualizações não escolhidas do
+    cenário atual e, para cada slider um passo acima e um abaixo, as seções
+    que a página mostraria. A variação mensal fica de fora: só é calculada
+    quando o usuário escolhe um método.
+    `views` tem as escolhas da sessão (`volume_view`, `heatmap_view` e
+    `show_poc_bands`). As chaves são as mesmas que a página usa no
+    `SectionMemo`.
+    """
+    jobs = {}
+    show_poc_bands = views["show_poc_bands"]
+
+    def add_scenario(leads, percents, volume_views, heatmap_views, whole_page):
+        rates = {name: percent / 100.0 for name, percent in percents.items()}
+        scenario_key = make_scenario_key(leads, rates, pricing_key, minimum_billing)
+        heatmap_key = make_heatmap_key(leads, rates, pricing_key, minimum_billing)
+        cell = heatmap_target_cell(rates)
+
+        def target():
+            return cached_run_simulation(
+                leads,
+                rates,
+                compiled_pricing,
+                minimum_billing,
+                pricing_key=pricing_key,
+                evaluator=evaluator,
+            )
+
+        def sweep():
+            return heatmap_sweep(
+                leads, rates, compiled_pricing, minimum_billing, pricing_key, evaluator
+            )
+
+        def breakdown():
+            return build_cost_breakdown(target())
+
+        def volume(view):
+            return volume_view_figure(
+                view,
+                leads,
+                rates,
+                compiled_pricing,
+                minimum_billing,
+                pricing_key,
+                target()["total_cost"],
+                show_poc_bands,
+            )
+
+        def heatmap(view):
+            return heatmap_view_figure(view, sweep(), *cell)
+
+        if whole_page:
+            jobs[("Composição do Custo", scenario_key)] = breakdown
+            jobs[("Matriz de Sensibilidade", heatmap_key)] = sweep
+        for view in volume_views:
+            jobs[(f"Volume · {view}", (scenario_key, show_poc_bands))] = partial(
+                volume, view
+            )
+        for view in heatmap_views:
+            jobs[(f"Matriz · {view}", (heatmap_key, *cell))] = partial(heatmap, view)
+
+    # Outras visualizações do cenário atual
+    add_scenario(
+        total_leads,
+        rate_percents,
+        [view for view in VOLUME_VIEWS if view != views["volume_view"]],
+        [view for view in HEATMAP_VIEWS if view != views["heatmap_view"]],
+        whole_page=False,
+    )
+    # Sliders um passo acima e abaixo, com as visualizações escolhidas
+    for name, (start, stop, step) in SLIDER_AXES.items():
+        for direction in (-1, 1):
+            leads, percents = total_leads, dict(rate_percents)
+            if name == "total_leads":
+                leads += direction * step
+                if not 0 < leads <= stop:
+                    continue
+            else:
+                percents[name] += direction * step
+                if not start <= percents[name] <= stop:
+                    continue
+            add_scenario(
+                leads,
+                percents,
+                [views["volume_view"]],
+                [views["heatmap_view"]],
+                whole_page=True,
+            )
+    return dict(islice(jobs.items(), MAX_PREFETCH_JOBS))
+
+
+def show_figure(figure):
+    """
+    `st.plotly_chart` na largura do container. Com a instrumentação ativa,
+    mede o envio e o tamanho do JSON da figura (o mesmo que o Streamlit envia).
+    """
+    with span("st.plotly_chart"):
+        st.plotly_chart(figure, use_container_width=True)
+    if active_profiler() is not None:
+        count("figures")
+        count("figure_bytes", len(pio.to_json(figure, validate=False).encode()))
+
+
+def section_slot(description):
+    """
+    Lugar reservado para uma seção pesada. Na primeira execução da sessão é
+    um `st.empty` com aviso de carregamento, substituído quando a seção fica
+    pronta; depois é um container comum, para que a versão anterior continue
+    na tela (sem piscar) até ser substituída.
+    """
+    if st.session_state.get("page_painted"):
+        return st.container()
+    slot = st.empty()
+    slot.caption(f"⏳ Calculando {description}…")
+    return slot
+
+
+# --- Seções que se reexecutam sozinhas (st.fragment) ---
+# Um widget dentro de um fragmento reexecuta só o fragmento, com os mesmos
+# argumentos da última execução completa. Dentro deles, cada figura passa
+# pelo `SectionMemo` da sessão com as suas dependências explícitas.
+@st.fragment
+def render_cost_variation(
+    section_memo,
+    scenario_key,
+    target_total_leads,
+    rates,
+    compiled_pricing,
+    minimum_billing,
+    pricing_key,
+    budget,
+    final_cost,
+):
+    """Expander da variação mensal do custo (distribuição exata ou Monte Carlo)."""
+    with st.expander("🎲 Variação Mensal do Custo", expanded=False):
+        st.caption(
+            "Respostas, qualificações e agendamentos variam de mês a mês como "
+            "binomiais encadeadas com as taxas configuradas, em vez de ficarem "
+            "só nos valores esperados."
+        )
+        # Sem método escolhido nada é calculado: a distribuição exata é a
+        # etapa mais cara da página e a seção costuma ficar fechada
+        distribution_method = st.radio(
+            "Método",
+            ["Exato", "Monte Carlo"],
+            index=None,
+            horizontal=True,
+            key="distribution_method",
+            help=(
+                "Exato: enumera as combinações do funil e soma suas "
+                "probabilidades, sem ruído. Monte Carlo: sorteia meses e "
+                "também mostra a distribuição do CPA."
+            ),
+        )
+        if distribution_method is None:
+            st.caption("Escolha um método para calcular a variação do custo.")
+            return
+        monte_carlo = None
+        sampling_key = None
+        if distribution_method == "Exato":
+            try:
+                cost_distribution = cached_cost_distribution(
+                    target_total_leads,
+                    rates,
+                    compiled_pricing,
+                    minimum_billing,
+                    pricing_key=pricing_key,
+                )
+            except ValueError as error:
+                st.info(f"{error} Mostrando a simulação de Monte Carlo.")
+                distribution_method = "Monte Carlo"
+        if distribution_method == "Monte Carlo":
+            mc_col_trials, mc_col_seed = st.columns(2)
+            with mc_col_trials:
+                monte_carlo_trials = st.select_slider(
+                    "Tentativas",
+                    options=[10_000, 50_000, 100_000, 500_000],
+                    value=100_000,
+                    format_func=lambda trials: f"{trials:,}",
+                )
+            with mc_col_seed:
+                monte_carlo_seed = st.number_input(
+                    "Semente",
+                    min_value=0,
+                    value=42,
+                    step=1,
+                    help="A mesma semente reproduz exatamente o mesmo sorteio",
+                )
+            sampling_key = (monte_carlo_trials, int(monte_carlo_seed))
+            monte_carlo = section_memo.get_or_compute(
+                "Variação Mensal · Monte Carlo",
+                (scenario_key, sampling_key),
+                lambda: run_monte_carlo(
+                    target_total_leads,
+                    rates,
+                    compiled_pricing,
+                    minimum_billing,
+                    trials=monte_carlo_trials,
+                    seed=int(monte_carlo_seed),
+                ),
+            )
+            cost_distribution = monte_carlo
+        cost_percentiles = cost_distribution.cost_percentiles()
+
+        mc_col1, mc_col2, mc_col3, mc_col4 = st.columns(4)
+        mc_col1.metric("Custo P5", f"R$ {cost_percentiles[5]:,.2f}")
+        mc_col2.metric("Custo P50", f"R$ {cost_percentiles[50]:,.2f}")
+        mc_col3.metric("Custo P95", f"R$ {cost_percentiles[95]:,.2f}")
+        mc_col4.metric(
+            "Chance de Consumo Mínimo",
+            f"{cost_distribution.minimum_billing_probability * 100:.1f}%",
+        )
+        st.caption(
+            f"💰 Chance de o custo passar do orçamento de R$ {budget:,.2f}: "
+            f"**{cost_distribution.probability_exceeding(budget) * 100:.4g}%**"
+        )
+        if monte_carlo is not None:
+            cpa_percentiles = monte_carlo.cpa_percentiles()
+            if math.isnan(cpa_percentiles[50]):
+                st.caption(
+                    "🤝 Nenhuma tentativa teve reuniões agendadas: CPA indefinido."
+                )
+            else:
+                st.caption(
+                    f"🤝 CPA: P5 R$ {cpa_percentiles[5]:,.2f} · "
+                    f"P50 R$ {cpa_percentiles[50]:,.2f} · "
+                    f"P95 R$ {cpa_percentiles[95]:,.2f}"
+                    + (
+                        f" · {monte_carlo.no_booking_probability * 100:.1f}% "
+                        "dos meses sem agendamentos"
+                        if monte_carlo.no_booking_probability > 0
+                        else ""
+                    )
+                )
+        show_figure(
+            section_memo.get_or_compute(
+                "Variação Mensal",
+                (scenario_key, distribution_method, sampling_key),
+                lambda: build_cost_distribution_figure(cost_distribution, final_cost),
+            )
+        )
+
+
+@st.fragment
+def render_heatmap_view(
+    section_memo, heatmap_key, heatmap_slice, target_qual_idx, target_book_idx
+):
+    """Só a visualização escolhida do heatmap é montada e enviada."""
+    view_name = st.radio(
+        "Visualização",
+        list(HEATMAP_VIEWS),
+        horizontal=True,
+        label_visibility="collapsed",
+        key="heatmap_view",
+    )
+    fig_heatmap = section_memo.get_or_compute(
+        f"Matriz · {view_name}",
+        (heatmap_key, target_qual_idx, target_book_idx),
+        lambda: heatmap_view_figure(
+            view_name, heatmap_slice, target_qual_idx, target_book_idx
+        ),
+    )
+    show_figure(fig_heatmap)
+
+
+@st.fragment
+def render_volume_section(
+    section_memo,
+    scenario_key,
+    target_total_leads,
+    rates,
+    compiled_pricing,
+    minimum_billing,
+    pricing_key,
+    target_cost,
+):
+    """Faixas do POC e as curvas de custo por volume da taxa escolhida."""
+    # Faixas preditivas com as taxas calibradas pelas contagens do POC
+    show_poc_bands = st.checkbox(
+        "Sobrepor faixas calibradas pelo POC",
+        value=True,
+        key="show_poc_bands",
+        help=(
+            "Custo previsto com as taxas estimadas a partir do POC, somando a "
+            "incerteza das taxas (posteriores Beta) e a variação de mês a mês"
+        ),
+    )
+    if show_poc_bands:
+        poc_bands = poc_predictive_bands(compiled_pricing, minimum_billing, pricing_key)
+        poc_cost, poc_cpa = poc_bands.at(target_total_leads)
+        poc_caption = (
+            f"🧪 Com as taxas do POC, {target_total_leads:,} leads custariam entre "
+            f"R$ {poc_cost[5]:,.2f} e R$ {poc_cost[95]:,.2f} em 90% dos meses "
+            f"(mediana R$ {poc_cost[50]:,.2f})"
+        )
+        if not math.isnan(poc_cpa[50]):
+            poc_caption += f"; CPA entre R$ {poc_cpa[5]:,.2f} e R$ {poc_cpa[95]:,.2f}"
+        st.caption(poc_caption + ".")
+
+    # Só a visualização escolhida é montada e enviada (st.tabs executaria
+    # e enviaria as três); trocar de visualização reexecuta só o fragmento
+    legend_title = st.radio(
+        "Taxa variada",
+        list(VOLUME_VIEWS),
+        horizontal=True,
+        label_visibility="collapsed",
+        key="volume_view",
+    )
+    # As curvas dependem de todas as taxas (só uma varia por visualização)
+    fig_volume = section_memo.get_or_compute(
+        f"Volume · {legend_title}",
+        (scenario_key, show_poc_bands),
+        lambda: volume_view_figure(
+            legend_title,
+            target_total_leads,
+            rates,
+            compiled_pricing,
+            minimum_billing,
+            pricing_key,
+            target_cost,
+            show_poc_bands,
+        ),
+    )
+    show_figure(fig_volume)
+
+
 # --- Tabelas de Preços Configuráveis ---
+# Nomes das tabelas escalonadas nos avisos de validação
+TIER_TABLE_LABELS = {
+    "leads": "Custo por Lead",
+    "qualified": "Custo por Lead Qualificado",
+    "booked": "Custo por Reunião Agendada",
+}
+
+
+@st.cache_resource
+def load_default_pricing():
+    """
+    Tabelas padrão (DataFrames e versões formatadas), avisos de validação e o
+    `PricingBook` compilado, montados uma vez por processo e compartilhados,
+    somente para leitura, por todas as sessões.
+    """
+    frames = {name: pd.DataFrame(rows) for name, rows in DEFAULT_PRICING_TABLES.items()}
+    normalized = {
+        name: normalize_tier_table(frames[name]) for name in TIER_TABLE_LABELS
+    }
+    return {
+        "frames": frames,
+        "display": {
+            name: format_price_table(frame, show_ranges=name != "no_reply")
+            for name, frame in frames.items()
+        },
+        "warnings": {name: warnings for name, (_, warnings) in normalized.items()},
+        "book": compile_pricing_tables(
+            {
+                "no_reply": frames["no_reply"],
+                **{name: schedule for name, (schedule, _) in normalized.items()},
+            }
+        ),
+    }
+
+
+@st.cache_resource
+def prefetch_executor():
+    """
+    Pool de threads do pré-cálculo, um por processo: sessões abandonadas não
+    deixam threads para trás.
+    """
+    return ThreadPoolExecutor(
+        max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch"
+    )
+
+
+def table_was_edited(editor_key):
+    """Se a sessão alterou a tabela do `st.data_editor` com essa chave."""
+    edits = st.session_state.get(editor_key) or {}
+    return any(
+        edits.get(kind) for kind in ("edited_rows", "added_rows", "deleted_rows")
+    )
+
+
+phase_started = time.perf_counter()
+default_pricing = load_default_pricing()
+
 st.sidebar.subheader("💰 Tabelas de Preços")
 st.sidebar.caption("Configure as faixas de preço por volume (preços escalonados)")
 
 with st.sidebar.expander("📧 Custo por Envio (Sem Resposta)", expanded=False):
     st.caption("Custo fixo por lead que não respondeu")
-    df_no_reply = pd.DataFrame([{"Valor": 0.20}])
-    df_no_reply_display = format_price_table(df_no_reply, show_ranges=False)
     st.dataframe(
-        df_no_reply_display,
+        default_pricing["display"]["no_reply"],
         hide_index=True,
         use_container_width=True,
         column_config={
@@ -226,19 +1173,7 @@ with st.sidebar.expander("📧 Custo por Envio (Sem Resposta)", expanded=False):
 
 with st.sidebar.expander("💬 Custo por Lead (com Resposta)", expanded=False):
     st.caption("Preço por lead que respondeu, escalonado por volume de respostas")
-    df_leads = pd.DataFrame(
-        [
-            {"Mínimo": 0, "Máximo": 250, "Valor": 5.00},
-            {"Mínimo": 500, "Máximo": 1500, "Valor": 3.80},
-            {"Mínimo": 1500, "Máximo": 2000, "Valor": 3.00},
-            {"Mínimo": 2000, "Máximo": 3000, "Valor": 2.40},
-            {
-                "Mínimo": 3000,
-                "Máximo": 99999,
-                "Valor": 2.00,
-            },  # Máximo alto para pegar todos os excedentes
-        ]
-    )
+    df_leads = default_pricing["frames"]["leads"]
     if ENABLE_PRICE_EDITING:
         edited_df_leads = st.data_editor(
             df_leads,
@@ -258,9 +1193,8 @@ with st.sidebar.expander("💬 Custo por Lead (com Resposta)", expanded=False):
             hide_index=True,
         )
     else:
-        df_leads_display = format_price_table(df_leads, show_ranges=True)
         st.dataframe(
-            df_leads_display,
+            default_pricing["display"]["leads"],
             hide_index=True,
             use_container_width=True,
             column_config={
@@ -272,14 +1206,7 @@ with st.sidebar.expander("💬 Custo por Lead (com Resposta)", expanded=False):
 
 with st.sidebar.expander("✅ Custo por Lead Qualificado", expanded=False):
     st.caption("Preço por lead qualificado, escalonado por volume de qualificados")
-    df_qualified = pd.DataFrame(
-        [
-            {"Mínimo": 0, "Máximo": 100, "Valor": 20.00},
-            {"Mínimo": 100, "Máximo": 150, "Valor": 15.00},
-            {"Mínimo": 150, "Máximo": 200, "Valor": 10.00},
-            {"Mínimo": 200, "Máximo": 99999, "Valor": 5.00},
-        ]
-    )
+    df_qualified = default_pricing["frames"]["qualified"]
     if ENABLE_PRICE_EDITING:
         edited_df_qualified = st.data_editor(
             df_qualified,
@@ -299,9 +1226,8 @@ with st.sidebar.expander("✅ Custo por Lead Qualificado", expanded=False):
             hide_index=True,
         )
     else:
-        df_qualified_display = format_price_table(df_qualified, show_ranges=True)
         st.dataframe(
-            df_qualified_display,
+            default_pricing["display"]["qualified"],
             hide_index=True,
             use_container_width=True,
             column_config={
@@ -313,14 +1239,7 @@ with st.sidebar.expander("✅ Custo por Lead Qualificado", expanded=False):
 
 with st.sidebar.expander("📅 Custo por Reunião Agendada", expanded=False):
     st.caption("Preço por reunião agendada, escalonado por volume de agendamentos")
-    df_booked = pd.DataFrame(
-        [
-            {"Mínimo": 0, "Máximo": 20, "Valor": 100.00},
-            {"Mínimo": 20, "Máximo": 50, "Valor": 80.00},
-            {"Mínimo": 50, "Máximo": 100, "Valor": 60.00},
-            {"Mínimo": 100, "Máximo": 99999, "Valor": 50.00},
-        ]
-    )
+    df_booked = default_pricing["frames"]["booked"]
     if ENABLE_PRICE_EDITING:
         edited_df_booked = st.data_editor(
             df_booked,
@@ -340,9 +1259,8 @@ with st.sidebar.expander("📅 Custo por Reunião Agendada", expanded=False):
             hide_index=True,
         )
     else:
-        df_booked_display = format_price_table(df_booked, show_ranges=True)
         st.dataframe(
-            df_booked_display,
+            default_pricing["display"]["booked"],
             hide_index=True,
             use_container_width=True,
             column_config={
@@ -355,24 +1273,111 @@ with st.sidebar.expander("📅 Custo por Reunião Agendada", expanded=False):
         edited_df_booked = df_booked
 
 
+add_span("Barra lateral · tabelas de preços", phase_started)
+
 # --- Coleta dos dados para a simulação ---
+phase_started = time.perf_counter()
 rates = {
     "response": target_response_rate,
     "qualification": target_qualification_rate,
     "booking": target_booking_rate,
 }
-pricing_tables = {
-    "no_reply": df_no_reply,
-    "leads": edited_df_leads,
-    "qualified": edited_df_qualified,
-    "booked": edited_df_booked,
+# Livro de preços padrão compartilhado entre as sessões; só as tabelas que a
+# sessão editou são validadas e compiladas (com cache pelo conteúdo) e
+# substituídas numa cópia do livro. Daqui em diante o cálculo não usa pandas
+edited_tables = {
+    name: edited
+    for name, edited in (
+        ("leads", edited_df_leads),
+        ("qualified", edited_df_qualified),
+        ("booked", edited_df_booked),
+    )
+    if table_was_edited(f"{name}_editor")
+}
+table_overrides = {
+    name: cached_tier_table(edited) for name, edited in edited_tables.items()
 }
+for name in TIER_TABLE_LABELS:
+    table_warnings = (
+        table_overrides[name][1]
+        if name in table_overrides
+        else default_pricing["warnings"][name]
+    )
+    for warning in table_warnings:
+        st.sidebar.warning(f"**{TIER_TABLE_LABELS[name]}:** {warning}")
+compiled_pricing = default_pricing["book"].with_tables(
+    **{name: schedule for name, (schedule, _) in table_overrides.items()}
+)
+# Hash do conteúdo das tabelas: chave dos caches de simulações e varreduras
+pricing_key = pricing_fingerprint(compiled_pricing)
+
+# Avaliador incremental da sessão: entre execuções, só recalcula os
+# componentes do funil cujas entradas mudaram
+if "funnel_evaluator" not in st.session_state:
+    st.session_state["funnel_evaluator"] = IncrementalEvaluator()
+funnel_evaluator = st.session_state["funnel_evaluator"]
+
+# Pré-cálculo em segundo plano da sessão (pool de threads do processo)
+if "prefetcher" not in st.session_state:
+    st.session_state["prefetcher"] = Prefetcher(executor=prefetch_executor())
+prefetcher = st.session_state["prefetcher"]
+# O que a execução anterior agendou e ainda não começou não disputa a CPU com
+# esta execução; o que já ficou pronto continua disponível
+prefetcher.cancel_pending()
+
+# Último resultado de cada seção da página, pelas suas dependências; seções
+# que mudaram usam antes o que o pré-cálculo já deixou pronto
+if "section_memo" not in st.session_state:
+    st.session_state["section_memo"] = SectionMemo(prefetcher=prefetcher)
+section_memo = st.session_state["section_memo"]
+
+# Cubo pré-calculado, usado só se foi gerado para as tabelas atuais
+precomputed_cube = open_cube(PRECOMPUTED_CUBE_DIR)
+if precomputed_cube is not None and precomputed_cube.pricing_fingerprint != pricing_key:
+    precomputed_cube = None
+add_span("Preparação do cálculo", phase_started)
+
+# --- Orçamento -> Volume ---
+st.sidebar.subheader("🧮 Quantos Leads Cabem no Orçamento?")
+budget = st.sidebar.number_input(
+    "Orçamento Mensal (R$)",
+    min_value=0.0,
+    value=10000.0,
+    step=500.0,
+    help="Maior quantidade de leads cujo custo total cabe no orçamento, com as taxas e tabelas configuradas",
+)
+with span("Orçamento"):
+    budget_leads = max_leads_for_budget(
+        budget, rates, compiled_pricing, minimum_billing
+    )
+if math.isnan(budget_leads):
+    st.sidebar.warning("O orçamento não cobre o consumo mínimo mensal.")
+elif math.isinf(budget_leads):
+    st.sidebar.metric("Leads dentro do orçamento", "Sem limite")
+else:
+    st.sidebar.metric("Leads dentro do orçamento", f"{int(budget_leads):,}")
 
 # --- Execução e Exibição dos Resultados ---
 if target_total_leads > 0:
-    # Simulação para o cenário target
-    target_results = run_simulation(
-        target_total_leads, rates, pricing_tables, minimum_billing
+    phase_started = time.perf_counter()
+    # Simulação para o cenário target: consulta ao cubo pré-calculado quando
+    # ele cobre as tabelas e o ponto atuais; senão, cálculo ao vivo com cache
+    target_results = None
+    if precomputed_cube is not None:
+        target_results = precomputed_cube.lookup(
+            target_total_leads, rates, minimum_billing
+        )
+    if target_results is None:
+        target_results = cached_run_simulation(
+            target_total_leads,
+            rates,
+            compiled_pricing,
+            minimum_billing,
+            pricing_key=pricing_key,
+            evaluator=funnel_evaluator,
+        )
+    scenario_key = make_scenario_key(
+        target_total_leads, rates, pricing_key, minimum_billing
     )
 
     st.header("📊 Resultados da Simulação")
@@ -380,6 +1385,21 @@ if target_total_leads > 0:
         f"Análise para **{target_total_leads:,} disparos** processados com as taxas de conversão configuradas."
     )
 
+    # Volume a partir do qual o custo calculado supera o consumo mínimo
+    if minimum_billing > 0:
+        break_even_leads = minimum_billing_break_even(
+            rates, compiled_pricing, minimum_billing
+        )
+        if math.isinf(break_even_leads):
+            st.caption(
+                "💳 Com estas taxas o custo calculado nunca alcança o consumo mínimo."
+            )
+        else:
+            st.caption(
+                f"💳 O consumo mínimo de R$ {minimum_billing:,.2f} deixa de ser "
+                f"aplicado a partir de **{math.ceil(break_even_leads):,} leads**."
+            )
+
     # Verificar se o consumo mínimo foi aplicado
     calculated_cost = target_results["calculated_cost"]
     final_cost = target_results["total_cost"]
@@ -425,44 +1445,20 @@ if target_total_leads > 0:
                 delta=None,
             )
 
+    # Tempo até as métricas principais (a página ainda não terminou)
+    first_metric_ms = (time.perf_counter() - RUN_STARTED) * 1000
+    add_span("Métricas do funil", phase_started)
+
     # Separador visual
     st.divider()
 
     # Detalhamento dos custos
+    phase_started = time.perf_counter()
     st.subheader("💰 Composição do Custo")
-    cost_data = {
-        "Componente": [
-            "Sem Resposta",
-            "Leads (com Resposta)",
-            "Leads Qualificados",
-            "Reuniões Agendadas",
-        ],
-        "Quantidade": [
-            int(target_results["num_no_replies"]),
-            int(target_results["num_replies"]),
-            int(target_results["num_qualified"]),
-            int(target_results["num_booked"]),
-        ],
-        "Custo (R$)": [
-            target_results["cost_no_reply"],
-            target_results["cost_replies"],
-            target_results["cost_qualified"],
-            target_results["cost_booked"],
-        ],
-    }
-
-    # Adicionar linha de consumo mínimo se aplicável
-    if has_minimum_charge:
-        cost_data["Componente"].append("Ajuste Consumo Mínimo")
-        cost_data["Quantidade"].append("-")
-        cost_data["Custo (R$)"].append(final_cost - calculated_cost)
-
-    cost_df = pd.DataFrame(cost_data)
-    cost_df["% do Total"] = (cost_df["Custo (R$)"] / final_cost * 100).fillna(0)
-
-    # Formatação para exibição
-    formatted_cost_df = cost_df.style.format(
-        {"Custo (R$)": "R$ {:,.2f}", "% do Total": "{:.1f}%"}
+    formatted_cost_df, fig_pie = section_memo.get_or_compute(
+        "Composição do Custo",
+        scenario_key,
+        lambda: build_cost_breakdown(target_results),
     )
 
     col_detail, col_pie = st.columns([0.6, 0.4])
@@ -470,527 +1466,274 @@ if target_total_leads > 0:
         st.dataframe(formatted_cost_df, use_container_width=True)
 
     with col_pie:
-        # Cores do gráfico de pizza (incluindo cor para consumo mínimo se aplicável)
-        pie_colors = [GRAY_3, LIGHT_BLUE_3, LIGHT_BLUE_2, BRAND_COLOR]
-        if has_minimum_charge:
-            pie_colors.append(GRAY_1)  # Cor para ajuste de consumo mínimo
-
-        fig_pie = go.Figure(
-            data=[
-                go.Pie(
-                    labels=cost_df["Componente"],
-                    values=cost_df["Custo (R$)"],
-                    hole=0.3,
-                    textinfo="label+percent",
-                    marker_colors=pie_colors,
-                )
-            ]
-        )
-        fig_pie.update_layout(
-            title_text="Distribuição do Custo Total",
-            margin=dict(t=40, b=10, l=10, r=10),
-            showlegend=False,
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        show_figure(fig_pie)
+    add_span("Composição do Custo", phase_started)
 
     # Separador visual
     st.divider()
 
-    # --- Gráficos de Simulação e Variação ---
-    st.header("📈 Análise de Sensibilidade por Volume")
-    st.markdown(
-        "Explore como diferentes taxas de conversão impactam os custos em diversos volumes de leads (0 a 3.500)."
-    )
-
-    # Criar abas para os três gráficos de volume
-    tab_resp, tab_qual, tab_book = st.tabs(
-        ["Taxa de Resposta", "Taxa de Qualificação", "Taxa de Agendamento"]
-    )
-
-    # Gráfico 1: Custo Total vs. Quantidade de Leads (Variando Taxa de Resposta)
-    with tab_resp:
-        lead_volumes = list(range(0, 3501, 100))
-
-        # Variações de taxa de resposta baseadas no target
-        response_step = 0.10  # 10 pontos percentuais
-        response_rate_variations = {}
-
-        # Duas abaixo do target
-        if target_response_rate - 2 * response_step >= 0:
-            response_rate_variations[
-                f"-20pp ({(target_response_rate - 2 * response_step) * 100:.1f}%)"
-            ] = target_response_rate - 2 * response_step
-        if target_response_rate - response_step >= 0:
-            response_rate_variations[
-                f"-10pp ({(target_response_rate - response_step) * 100:.1f}%)"
-            ] = target_response_rate - response_step
-
-        # Target
-        response_rate_variations[f"Target ({target_response_rate * 100:.1f}%)"] = (
-            target_response_rate
-        )
-
-        # Duas acima do target
-        if target_response_rate + response_step <= 1.0:
-            response_rate_variations[
-                f"+10pp ({(target_response_rate + response_step) * 100:.1f}%)"
-            ] = target_response_rate + response_step
-        if target_response_rate + 2 * response_step <= 1.0:
-            response_rate_variations[
-                f"+20pp ({(target_response_rate + 2 * response_step) * 100:.1f}%)"
-            ] = target_response_rate + 2 * response_step
-
-        fig_volume_response = go.Figure()
-
-        # Define colors for each scenario
-        scenario_colors = {
-            0: GRAY_2,  # -10pp
-            1: GRAY_1,  # -5pp
-            2: BRAND_COLOR,  # Target
-            3: LIGHT_BLUE_2,  # +5pp
-            4: LIGHT_BLUE_1,  # +10pp
-        }
-
-        for idx, (scenario_name, response_rate) in enumerate(
-            response_rate_variations.items()
-        ):
-            costs = []
-            scenario_rates = rates.copy()
-            scenario_rates["response"] = response_rate
-            for volume in lead_volumes:
-                sim_result = run_simulation(
-                    volume, scenario_rates, pricing_tables, minimum_billing
-                )
-                costs.append(sim_result["total_cost"])
-
-            is_target = "Target" in scenario_name
-            fig_volume_response.add_trace(
-                go.Scatter(
-                    x=lead_volumes,
-                    y=costs,
-                    mode="lines",
-                    name=scenario_name,
-                    line=dict(
-                        width=4 if is_target else 2.5,
-                        dash="solid" if is_target else "dot",
-                        color=scenario_colors.get(idx, BRAND_COLOR),
-                    ),
-                )
-            )
-
-        # Adicionar ponto do cenário target
-        fig_volume_response.add_trace(
-            go.Scatter(
-                x=[target_total_leads],
-                y=[target_results["total_cost"]],
-                mode="markers",
-                marker=dict(size=12, color="red", symbol="star"),
-                name="Seu Cenário Atual",
-            )
-        )
-
-        fig_volume_response.update_layout(
-            xaxis_title="Quantidade de Leads Processados",
-            yaxis_title="Custo Total (R$)",
-            legend_title="Taxa de Resposta",
-            hovermode="x unified",
-        )
-        st.plotly_chart(fig_volume_response, use_container_width=True)
-
-    # Gráfico 2: Custo Total vs. Quantidade de Leads (Variando Taxa de Qualificação)
-    with tab_qual:
-        # Variações de taxa de qualificação baseadas no target
-        qualification_step = 0.10  # 10 pontos percentuais
-        qualification_rate_variations = {}
-
-        # Duas abaixo do target
-        if target_qualification_rate - 2 * qualification_step >= 0:
-            qualification_rate_variations[
-                f"-20pp ({(target_qualification_rate - 2 * qualification_step) * 100:.1f}%)"
-            ] = target_qualification_rate - 2 * qualification_step
-        if target_qualification_rate - qualification_step >= 0:
-            qualification_rate_variations[
-                f"-10pp ({(target_qualification_rate - qualification_step) * 100:.1f}%)"
-            ] = target_qualification_rate - qualification_step
-
-        # Target
-        qualification_rate_variations[
-            f"Target ({target_qualification_rate * 100:.1f}%)"
-        ] = target_qualification_rate
-
-        # Duas acima do target
-        if target_qualification_rate + qualification_step <= 1.0:
-            qualification_rate_variations[
-                f"+10pp ({(target_qualification_rate + qualification_step) * 100:.1f}%)"
-            ] = target_qualification_rate + qualification_step
-        if target_qualification_rate + 2 * qualification_step <= 1.0:
-            qualification_rate_variations[
-                f"+20pp ({(target_qualification_rate + 2 * qualification_step) * 100:.1f}%)"
-            ] = target_qualification_rate + 2 * qualification_step
-
-        fig_volume_qualification = go.Figure()
-
-        # Define colors for each scenario
-        scenario_colors_qual = {
-            0: GRAY_2,  # -20pp
-            1: GRAY_1,  # -10pp
-            2: BRAND_COLOR,  # Target
-            3: LIGHT_BLUE_2,  # +10pp
-            4: LIGHT_BLUE_1,  # +20pp
-        }
-
-        for idx, (scenario_name, qual_rate) in enumerate(
-            qualification_rate_variations.items()
-        ):
-            costs = []
-            scenario_rates = rates.copy()
-            scenario_rates["qualification"] = qual_rate
-            for volume in lead_volumes:
-                sim_result = run_simulation(
-                    volume, scenario_rates, pricing_tables, minimum_billing
-                )
-                costs.append(sim_result["total_cost"])
-
-            is_target = "Target" in scenario_name
-            fig_volume_qualification.add_trace(
-                go.Scatter(
-                    x=lead_volumes,
-                    y=costs,
-                    mode="lines",
-                    name=scenario_name,
-                    line=dict(
-                        width=4 if is_target else 2.5,
-                        dash="solid" if is_target else "dot",
-                        color=scenario_colors_qual.get(idx, BRAND_COLOR),
-                    ),
-                )
-            )
-
-        # Adicionar ponto do cenário target
-        fig_volume_qualification.add_trace(
-            go.Scatter(
-                x=[target_total_leads],
-                y=[target_results["total_cost"]],
-                mode="markers",
-                marker=dict(size=12, color="red", symbol="star"),
-                name="Seu Cenário Atual",
-            )
+    # Renderização progressiva: métricas e composição do custo já foram
+    # enviadas; na primeira execução da sessão as seções pesadas ganham um
+    # lugar reservado e aparecem na ordem da página, conforme ficam prontas
+    variation_slot = section_slot("a variação mensal")
+    volume_slot = section_slot("as curvas por volume")
+    heatmap_slot = section_slot("a matriz de sensibilidade")
+
+    # --- Variação mensal (distribuição exata ou Monte Carlo) ---
+    with variation_slot.container(), span("Variação Mensal"):
+        render_cost_variation(
+            section_memo,
+            scenario_key,
+            target_total_leads,
+            rates,
+            compiled_pricing,
+            minimum_billing,
+            pricing_key,
+            budget,
+            final_cost,
         )
 
-        fig_volume_qualification.update_layout(
-            xaxis_title="Quantidade de Leads Processados",
-            yaxis_title="Custo Total (R$)",
-            legend_title="Taxa de Qualificação",
-            hovermode="x unified",
-        )
-        st.plotly_chart(fig_volume_qualification, use_container_width=True)
-
-    # Gráfico 3: Custo Total vs. Quantidade de Leads (Variando Taxa de Agendamento)
-    with tab_book:
-        # Variações de taxa de agendamento baseadas no target
-        booking_step = 0.15  # 15 pontos percentuais
-        booking_rate_variations = {}
-
-        # Duas abaixo do target
-        if target_booking_rate - 2 * booking_step >= 0:
-            booking_rate_variations[
-                f"-30pp ({(target_booking_rate - 2 * booking_step) * 100:.1f}%)"
-            ] = target_booking_rate - 2 * booking_step
-        if target_booking_rate - booking_step >= 0:
-            booking_rate_variations[
-                f"-15pp ({(target_booking_rate - booking_step) * 100:.1f}%)"
-            ] = target_booking_rate - booking_step
-
-        # Target
-        booking_rate_variations[f"Target ({target_booking_rate * 100:.1f}%)"] = (
-            target_booking_rate
-        )
-
-        # Duas acima do target
-        if target_booking_rate + booking_step <= 1.0:
-            booking_rate_variations[
-                f"+15pp ({(target_booking_rate + booking_step) * 100:.1f}%)"
-            ] = target_booking_rate + booking_step
-        if target_booking_rate + 2 * booking_step <= 1.0:
-            booking_rate_variations[
-                f"+30pp ({(target_booking_rate + 2 * booking_step) * 100:.1f}%)"
-            ] = target_booking_rate + 2 * booking_step
-
-        fig_volume_booking = go.Figure()
-
-        # Define colors for each scenario
-        scenario_colors_booking = {
-            0: GRAY_2,  # -30pp
-            1: GRAY_1,  # -15pp
-            2: BRAND_COLOR,  # Target
-            3: LIGHT_BLUE_2,  # +15pp
-            4: LIGHT_BLUE_1,  # +30pp
-        }
-
-        for idx, (scenario_name, book_rate) in enumerate(
-            booking_rate_variations.items()
-        ):
-            costs = []
-            scenario_rates = rates.copy()
-            scenario_rates["booking"] = book_rate
-            for volume in lead_volumes:
-                sim_result = run_simulation(
-                    volume, scenario_rates, pricing_tables, minimum_billing
-                )
-                costs.append(sim_result["total_cost"])
-
-            is_target = "Target" in scenario_name
-            fig_volume_booking.add_trace(
-                go.Scatter(
-                    x=lead_volumes,
-                    y=costs,
-                    mode="lines",
-                    name=scenario_name,
-                    line=dict(
-                        width=4 if is_target else 2.5,
-                        dash="solid" if is_target else "dot",
-                        color=scenario_colors_booking.get(idx, BRAND_COLOR),
-                    ),
-                )
-            )
-
-        # Adicionar ponto do cenário target
-        fig_volume_booking.add_trace(
-            go.Scatter(
-                x=[target_total_leads],
-                y=[target_results["total_cost"]],
-                mode="markers",
-                marker=dict(size=12, color="red", symbol="star"),
-                name="Seu Cenário Atual",
-            )
+    # --- Gráficos de Simulação e Variação ---
+    with volume_slot.container(), span("Curvas por volume"):
+        st.header("📈 Análise de Sensibilidade por Volume")
+        st.markdown(
+            "Explore como diferentes taxas de conversão impactam os custos em diversos volumes de leads (0 a 3.500)."
         )
 
-        fig_volume_booking.update_layout(
-            xaxis_title="Quantidade de Leads Processados",
-            yaxis_title="Custo Total (R$)",
-            legend_title="Taxa de Agendamento",
-            hovermode="x unified",
+        render_volume_section(
+            section_memo,
+            scenario_key,
+            target_total_leads,
+            rates,
+            compiled_pricing,
+            minimum_billing,
+            pricing_key,
+            target_results["total_cost"],
         )
-        st.plotly_chart(fig_volume_booking, use_container_width=True)
 
-    # Separador visual
-    st.divider()
+        # Separador visual
+        st.divider()
 
-    # Heatmap de Taxa de Qualificação vs Taxa de Agendamento
-    st.header("🔥 Matriz de Sensibilidade: Qualificação vs Agendamento")
-    st.markdown(
-        """
-        Visualize como diferentes combinações de taxas de qualificação e agendamento impactam o custo total.
+    with heatmap_slot.container(), span("Matriz de sensibilidade"):
+        # Heatmap de Taxa de Qualificação vs Taxa de Agendamento
+        st.header("🔥 Matriz de Sensibilidade: Qualificação vs Agendamento")
+        st.markdown(
+            """
+            Visualize como diferentes combinações de taxas de qualificação e agendamento impactam o custo total.
         
-        **📊 Referência POC:** Em um teste real, foram alcançados: **22,6% de qualificação** e **33,3% de agendamento**.  
-        Os limites abaixo refletem cenários realistas baseados nesta performance.
-        """
-    )
-
-    # Criar ranges para o heatmap (baseado em dados reais de POC)
-    # POC: Qualificação 22.6%, Agendamento 33.3%
-    qual_rates_heatmap = [i / 100.0 for i in range(0, 36, 5)]  # De 0% a 35%, passo 5%
-    booking_rates_heatmap = [
-        i / 100.0 for i in range(0, 51, 5)
-    ]  # De 0% a 50%, passo 5%
-
-    # Matriz para armazenar os custos
-    cost_matrix = []
-    cpa_matrix = []
-    meetings_matrix = []
-
-    for qual_rate in qual_rates_heatmap:
-        cost_row = []
-        cpa_row = []
-        meetings_row = []
-        for book_rate in booking_rates_heatmap:
-            temp_rates = rates.copy()
-            temp_rates["qualification"] = qual_rate
-            temp_rates["booking"] = book_rate
-            sim_result = run_simulation(
-                target_total_leads, temp_rates, pricing_tables, minimum_billing
-            )
-            cost_row.append(sim_result["total_cost"])
-            cpa_row.append(sim_result["cpa"] if sim_result["cpa"] > 0 else 0)
-            meetings_row.append(sim_result["num_booked"])
-        cost_matrix.append(cost_row)
-        cpa_matrix.append(cpa_row)
-        meetings_matrix.append(meetings_row)
-
-    # Criar abas para diferentes visualizações
-    tab1, tab2, tab3 = st.tabs(
-        ["Custo Total", "Custo por Reunião (CPA)", "Reuniões Agendadas"]
-    )
-
-    # Custom colorscale para os heatmaps
-    custom_colorscale = [
-        [0.0, BRAND_COLOR],  # Menor custo = azul da marca
-        [0.5, LIGHT_BLUE_3],  # Médio = azul claro
-        [1.0, GRAY_2],  # Maior custo = cinza
-    ]
-
-    with tab1:
-        fig_heatmap_cost = go.Figure(
-            data=go.Heatmap(
-                z=cost_matrix,
-                x=[f"{r * 100:.0f}%" for r in booking_rates_heatmap],
-                y=[f"{q * 100:.0f}%" for q in qual_rates_heatmap],
-                colorscale=custom_colorscale,
-                text=[[f"R$ {val:,.0f}" for val in row] for row in cost_matrix],
-                texttemplate="%{text}",
-                textfont={"size": 9},
-                colorbar=dict(title="Custo Total (R$)"),
-                hovertemplate="Qualificação: %{y}<br>Agendamento: %{x}<br>Custo: R$ %{z:,.2f}<extra></extra>",
-            )
+            **📊 Referência POC:** Em um teste real, foram alcançados: **22,6% de qualificação** e **33,3% de agendamento**.  
+            Os limites abaixo refletem cenários realistas baseados nesta performance.
+            """
         )
 
-        # Adicionar marcador para o cenário target
-        target_qual_idx = min(
-            range(len(qual_rates_heatmap)),
-            key=lambda i: abs(qual_rates_heatmap[i] - target_qualification_rate),
+        # Matrizes do heatmap: varredura qualificação x agendamento, em uma
+        # só chamada vetorizada (ver `make_heatmap_key`)
+        heatmap_key = make_heatmap_key(
+            target_total_leads, rates, pricing_key, minimum_billing
         )
-        target_book_idx = min(
-            range(len(booking_rates_heatmap)),
-            key=lambda i: abs(booking_rates_heatmap[i] - target_booking_rate),
+        heatmap_slice = section_memo.get_or_compute(
+            "Matriz de Sensibilidade",
+            heatmap_key,
+            lambda: heatmap_sweep(
+                target_total_leads,
+                rates,
+                compiled_pricing,
+                minimum_billing,
+                pricing_key,
+                funnel_evaluator,
+            ),
         )
+        cost_matrix = heatmap_slice["total_cost"].tolist()
+        cpa_matrix = heatmap_slice["cpa"].tolist()
+        meetings_matrix = heatmap_slice["num_booked"].tolist()
 
-        fig_heatmap_cost.add_trace(
-            go.Scatter(
-                x=[f"{booking_rates_heatmap[target_book_idx] * 100:.0f}%"],
-                y=[f"{qual_rates_heatmap[target_qual_idx] * 100:.0f}%"],
-                mode="markers",
-                marker=dict(
-                    size=20,
-                    color=GRAY_4,
-                    symbol="star",
-                    line=dict(color="white", width=2),
-                ),
-                name="Seu Target",
-                showlegend=True,
-            )
-        )
-
-        fig_heatmap_cost.update_layout(
-            title="Custo Total por Combinação de Taxas",
-            xaxis_title="Taxa de Agendamento (% de Qualificados)",
-            yaxis_title="Taxa de Qualificação (% de Respostas)",
-            height=600,
-        )
-        st.plotly_chart(fig_heatmap_cost, use_container_width=True)
-
-    with tab2:
-        fig_heatmap_cpa = go.Figure(
-            data=go.Heatmap(
-                z=cpa_matrix,
-                x=[f"{r * 100:.0f}%" for r in booking_rates_heatmap],
-                y=[f"{q * 100:.0f}%" for q in qual_rates_heatmap],
-                colorscale=custom_colorscale,
-                text=[[f"R$ {val:,.0f}" for val in row] for row in cpa_matrix],
-                texttemplate="%{text}",
-                textfont={"size": 9},
-                colorbar=dict(title="CPA (R$)"),
-                hovertemplate="Qualificação: %{y}<br>Agendamento: %{x}<br>CPA: R$ %{z:,.2f}<extra></extra>",
-            )
-        )
+        # Célula do heatmap mais próxima do target
+        target_qual_idx, target_book_idx = heatmap_target_cell(rates)
 
-        fig_heatmap_cpa.add_trace(
-            go.Scatter(
-                x=[f"{booking_rates_heatmap[target_book_idx] * 100:.0f}%"],
-                y=[f"{qual_rates_heatmap[target_qual_idx] * 100:.0f}%"],
-                mode="markers",
-                marker=dict(
-                    size=20,
-                    color=GRAY_4,
-                    symbol="star",
-                    line=dict(color="white", width=2),
-                ),
-                name="Seu Target",
-                showlegend=True,
-            )
+        render_heatmap_view(
+            section_memo, heatmap_key, heatmap_slice, target_qual_idx, target_book_idx
         )
 
-        fig_heatmap_cpa.update_layout(
-            title="Custo por Reunião (CPA) por Combinação de Taxas",
-            xaxis_title="Taxa de Agendamento (% de Qualificados)",
-            yaxis_title="Taxa de Qualificação (% de Respostas)",
-            height=600,
-        )
-        st.plotly_chart(fig_heatmap_cpa, use_container_width=True)
+        # Insights adicionais
+        st.subheader("💡 Insights da Matriz de Sensibilidade")
+        col_ins1, col_ins2, col_ins3 = st.columns(3)
 
-    # Colorscale invertido para reuniões (mais = melhor)
-    meetings_colorscale = [
-        [0.0, GRAY_3],  # Menos reuniões = cinza claro
-        [0.5, LIGHT_BLUE_2],  # Médio = azul claro
-        [1.0, BRAND_COLOR],  # Mais reuniões = azul da marca
-    ]
+        # Encontrar o melhor e pior cenário
+        flat_costs = [cost for row in cost_matrix for cost in row]
+        flat_cpas = [cpa for row in cpa_matrix for cpa in row if cpa > 0]
+        flat_meetings = [meeting for row in meetings_matrix for meeting in row]
 
-    with tab3:
-        fig_heatmap_meetings = go.Figure(
-            data=go.Heatmap(
-                z=meetings_matrix,
-                x=[f"{r * 100:.0f}%" for r in booking_rates_heatmap],
-                y=[f"{q * 100:.0f}%" for q in qual_rates_heatmap],
-                colorscale=meetings_colorscale,
-                text=[[f"{int(val)}" for val in row] for row in meetings_matrix],
-                texttemplate="%{text}",
-                textfont={"size": 9},
-                colorbar=dict(title="Reuniões"),
-                hovertemplate="Qualificação: %{y}<br>Agendamento: %{x}<br>Reuniões: %{z:.0f}<extra></extra>",
-            )
+        col_ins1.metric(
+            "Custo Mínimo Possível",
+            f"R$ {min(flat_costs):,.2f}",
+            delta=f"{((min(flat_costs) - target_results['total_cost']) / target_results['total_cost'] * 100):.1f}% vs Target",
+            delta_color="inverse",
         )
 
-        fig_heatmap_meetings.add_trace(
-            go.Scatter(
-                x=[f"{booking_rates_heatmap[target_book_idx] * 100:.0f}%"],
-                y=[f"{qual_rates_heatmap[target_qual_idx] * 100:.0f}%"],
-                mode="markers",
-                marker=dict(
-                    size=20,
-                    color=GRAY_4,
-                    symbol="star",
-                    line=dict(color="white", width=2),
-                ),
-                name="Seu Target",
-                showlegend=True,
-            )
+        col_ins2.metric(
+            "Custo Máximo Possível",
+            f"R$ {max(flat_costs):,.2f}",
+            delta=f"{((max(flat_costs) - target_results['total_cost']) / target_results['total_cost'] * 100):.1f}% vs Target",
+            delta_color="inverse",
         )
 
-        fig_heatmap_meetings.update_layout(
-            title="Reuniões Agendadas por Combinação de Taxas",
-            xaxis_title="Taxa de Agendamento (% de Qualificados)",
-            yaxis_title="Taxa de Qualificação (% de Respostas)",
-            height=600,
+        col_ins3.metric(
+            "Máximo de Reuniões Possível",
+            f"{int(max(flat_meetings))}",
+            delta=f"{int(max(flat_meetings) - target_results['num_booked'])} vs Target",
         )
-        st.plotly_chart(fig_heatmap_meetings, use_container_width=True)
 
-    # Insights adicionais
-    st.subheader("💡 Insights da Matriz de Sensibilidade")
-    col_ins1, col_ins2, col_ins3 = st.columns(3)
+    # Com a página pronta, os próximos resultados prováveis são calculados em
+    # segundo plano enquanto o usuário lê; os trabalhos da execução anterior
+    # que ainda não começaram são cancelados
+    phase_started = time.perf_counter()
+    prefetcher.schedule(
+        prefetch_jobs(
+            target_total_leads,
+            rate_percents,
+            compiled_pricing,
+            minimum_billing,
+            pricing_key,
+            funnel_evaluator,
+            {
+                "volume_view": st.session_state.get(
+                    "volume_view", next(iter(VOLUME_VIEWS))
+                ),
+                "heatmap_view": st.session_state.get(
+                    "heatmap_view", next(iter(HEATMAP_VIEWS))
+                ),
+                "show_poc_bands": st.session_state.get("show_poc_bands", True),
+            },
+        )
+    )
+    add_span("Agendamento do pré-cálculo", phase_started)
 
-    # Encontrar o melhor e pior cenário
-    flat_costs = [cost for row in cost_matrix for cost in row]
-    flat_cpas = [cpa for row in cpa_matrix for cpa in row if cpa > 0]
-    flat_meetings = [meeting for row in meetings_matrix for meeting in row]
+else:
+    first_metric_ms = None
+    st.info("Ajuste a quantidade de leads na barra lateral para iniciar a simulação.")
 
-    col_ins1.metric(
-        "Custo Mínimo Possível",
-        f"R$ {min(flat_costs):,.2f}",
-        delta=f"{((min(flat_costs) - target_results['total_cost']) / target_results['total_cost'] * 100):.1f}% vs Target",
-        delta_color="inverse",
+# Página principal completa: as próximas execuções não usam mais os avisos
+# de carregamento
+page_ms = (time.perf_counter() - RUN_STARTED) * 1000
+st.session_state["page_painted"] = True
+
+# --- Cache de resultados ---
+with st.sidebar.expander("⚡ Cache de Simulações", expanded=False):
+    for cache_name, cache in (
+        ("Simulações", SIMULATION_CACHE),
+        ("Varreduras", SWEEP_CACHE),
+        ("Distribuições", DISTRIBUTION_CACHE),
+        ("Faixas do POC", CALIBRATION_CACHE),
+    ):
+        cache_stats = cache.stats()
+        st.caption(
+            f"{cache_name}: {cache_stats['hits']} acertos · "
+            f"{cache_stats['misses']} falhas · "
+            f"{cache_stats['size']}/{cache_stats['maxsize']} entradas"
+        )
+    evaluator_stats = funnel_evaluator.stats()
+    st.caption(
+        f"Componentes do funil: {evaluator_stats['evaluated']:,} calculados · "
+        f"{evaluator_stats['skipped']:,} reaproveitados"
     )
-
-    col_ins2.metric(
-        "Custo Máximo Possível",
-        f"R$ {max(flat_costs):,.2f}",
-        delta=f"{((max(flat_costs) - target_results['total_cost']) / target_results['total_cost'] * 100):.1f}% vs Target",
-        delta_color="inverse",
+    if precomputed_cube is not None:
+        cube_stats = precomputed_cube.stats()
+        st.caption(
+            f"Cubo pré-calculado: {cube_stats['hits']} consultas · "
+            f"{cube_stats['misses']} fora da grade"
+        )
+    else:
+        st.caption("Cubo pré-calculado: indisponível para estas tabelas")
+    for section, section_stats in section_memo.stats().items():
+        st.caption(
+            f"Seção {section}: {section_stats['computed']} cálculos · "
+            f"{section_stats['reused']} reaproveitamentos · "
+            f"{section_stats['prefetched']} pré-calculados"
+        )
+    prefetch_stats = prefetcher.stats()
+    st.caption(
+        f"Pré-cálculo em segundo plano: {prefetch_stats['submitted']} agendados · "
+        f"{prefetch_stats['completed']} prontos · "
+        f"{prefetch_stats['served']} usados · "
+        f"{prefetch_stats['cancelled']} cancelados · "
+        f"{prefetch_stats['failed']} com erro"
+    )
+    if first_metric_ms is not None:
+        st.caption(
+            f"Primeiras métricas: {first_metric_ms:,.0f} ms · "
+            f"página completa: {page_ms:,.0f} ms"
+        )
+    run_details = [f"Execução: {(time.perf_counter() - RUN_STARTED) * 1000:,.0f} ms"]
+    if resource is not None:
+        # Pico desde o início do processo (não o uso atual): ru_maxrss vem em
+        # bytes no macOS e em KB nos demais sistemas Unix
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_memory /= 1024**2 if sys.platform == "darwin" else 1024
+        run_details.append(f"pico de memória do processo: {peak_memory:,.0f} MB")
+    run_details.append(f"tabelas editadas nesta sessão: {len(table_overrides)}")
+    st.caption(" · ".join(run_details))
+    # A execução atual ainda não foi contada como concluída
+    reruns_completed = st.session_state.get("reruns_completed", 0)
+    st.caption(
+        f"Execuções da sessão: {st.session_state['reruns_started']} iniciadas · "
+        f"{reruns_completed} concluídas · "
+        f"{st.session_state['reruns_started'] - reruns_completed - 1} "
+        "não concluídas (interrompidas por ajustes mais novos ou com erro)"
+        + (" · ajustes em lote" if batched_inputs else "")
     )
 
-    col_ins3.metric(
-        "Máximo de Reuniões Possível",
-        f"{int(max(flat_meetings))}",
-        delta=f"{int(max(flat_meetings) - target_results['num_booked'])} vs Target",
+# --- Instrumentação da execução ---
+with st.sidebar.expander("🔬 Instrumentação", expanded=False):
+    st.toggle(
+        "Instrumentar as execuções",
+        key="profile_reruns",
+        help=(
+            "Mede o tempo de cada seção da página e de cada chamada do motor, "
+            "conta as simulações e o tamanho das figuras enviadas."
+        ),
+    )
+    if rerun_profiler is None:
+        st.caption("Desligada: as execuções não são medidas.")
+    else:
+        counters = rerun_profiler.counters
+        st.caption(
+            f"Execução: {rerun_profiler.elapsed_ms:,.0f} ms · "
+            f"{counters.get('simulations', 0):,} simulações · "
+            f"{counters.get('figures', 0)} figuras "
+            f"({counters.get('figure_bytes', 0) / 1024:,.1f} KB)"
+        )
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Intervalo": name,
+                        "Chamadas": totals["calls"],
+                        "Total (ms)": totals["total_ms"],
+                    }
+                    for name, totals in rerun_profiler.totals().items()
+                ]
+            ),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "Total (ms)": st.column_config.NumberColumn(format="%.1f"),
+            },
+        )
+        if PROFILE_LOG_PATH:
+            st.caption(f"Cada execução é gravada em `{PROFILE_LOG_PATH}`.")
+
+# Fim da medição: reexecuções de fragmentos não entram nesta execução
+activate(None)
+if rerun_profiler is not None and PROFILE_LOG_PATH:
+    rerun_profiler.write_jsonl(
+        PROFILE_LOG_PATH,
+        rerun=st.session_state["reruns_started"],
+        batched_inputs=batched_inputs,
+        total_leads=target_total_leads,
+        rate_percents=rate_percents,
+        minimum_billing=minimum_billing,
+        first_metric_ms=first_metric_ms,
+        page_ms=page_ms,
     )
 
-else:
-    st.info("Ajuste a quantidade de leads na barra lateral para iniciar a simulação.")
+st.session_state["reruns_completed"] = st.session_state.get("reruns_completed", 0) + 1
@@ -0,0 +1,35 @@
+"""
+Motor de precificação do Simulador de Custos de Prospecção.
+
+Pode ser importado sem Streamlit, pandas ou plotly (depende apenas do NumPy),
+para uso em jobs em lote, testes e serviços.
+"""
+
+from .defaults import DEFAULT_PRICING_TABLES
+from .simulation import run_simulation, run_simulation_batch
+from .sweep import SWEEP_AXES, SweepResult, run_sweep
+from .tiers import (
+    OPEN_ENDED_SENTINEL,
+    PricingBook,
+    TierSchedule,
+    calculate_tiered_cost,
+    compile_pricing_tables,
+    compile_tier_schedule,
+    normalize_tier_table,
+)
+
+__all__ = [
+    "DEFAULT_PRICING_TABLES",
+    "OPEN_ENDED_SENTINEL",
+    "PricingBook",
+    "SWEEP_AXES",
+    "SweepResult",
+    "TierSchedule",
+    "calculate_tiered_cost",
+    "compile_pricing_tables",
+    "compile_tier_schedule",
+    "normalize_tier_table",
+    "run_simulation",
+    "run_simulation_batch",
+    "run_sweep",
+]
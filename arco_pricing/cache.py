@@ -0,0 +1,318 @@
+"""
+Cache de resultados de simulações e varreduras.
+
+As chaves combinam um hash canônico do conteúdo das tabelas de preços com as
+taxas e volumes do cenário, então tabelas editadas de volta ao mesmo conteúdo
+(ou compartilhadas entre sessões) reaproveitam os mesmos resultados.
+"""
+
+import dataclasses
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .calibration import calibrate_rates, posterior_predictive_bands
+from .distribution import exact_cost_distribution
+from .simulation import run_simulation
+from .sweep import run_sweep
+from .tiers import _column, compile_pricing_tables, normalize_tier_table
+
+
+class LRUCache:
+    """
+    Cache limitado a `maxsize` entradas com descarte da menos usada (LRU).
+    Seguro para uso concorrente e com contadores de acertos e falhas.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """Retorna o valor de `key`, calculando-o com `compute()` se ausente."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # O cálculo fica fora do lock para não serializar as sessões
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Contadores atuais: acertos, falhas, descartes e ocupação."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class SectionMemo:
+    """
+    Último resultado de cada seção de uma página, junto com a chave das suas
+    dependências declaradas. A seção só é recalculada quando alguma
+    dependência muda; `stats` conta, por seção, os cálculos e os
+    reaproveitamentos. Feito para ficar no estado de uma sessão.
+
+    Com um `prefetcher` (`arco_pricing.prefetch.Prefetcher`), uma seção que
+    mudou usa antes o resultado pré-calculado para `(section, dependencies)`,
+    se houver.
+    """
+
+    def __init__(self, prefetcher=None):
+        self.prefetcher = prefetcher
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def get_or_compute(self, section, dependencies, compute):
+        with self._lock:
+            counts = self._counts.setdefault(
+                section, {"computed": 0, "reused": 0, "prefetched": 0}
+            )
+            entry = self._entries.get(section)
+            if entry is not None and entry[0] == dependencies:
+                counts["reused"] += 1
+                return entry[1]
+
+        found, value = False, None
+        if self.prefetcher is not None:
+            found, value = self.prefetcher.take((section, dependencies))
+        with self._lock:
+            counts["prefetched" if found else "computed"] += 1
+        if not found:
+            value = compute()
+
+        with self._lock:
+            self._entries[section] = (dependencies, value)
+        return value
+
+    def stats(self):
+        """Cálculos, reaproveitamentos e pré-cálculos usados de cada seção."""
+        with self._lock:
+            return {section: dict(counts) for section, counts in self._counts.items()}
+
+
+# Caches compartilhados pelo processo (todas as sessões do app)
+SIMULATION_CACHE = LRUCache(maxsize=512)
+SWEEP_CACHE = LRUCache(maxsize=64)
+DISTRIBUTION_CACHE = LRUCache(maxsize=16)
+CALIBRATION_CACHE = LRUCache(maxsize=16)
+TIER_TABLE_CACHE = LRUCache(maxsize=64)
+
+
+def pricing_fingerprint(pricing_tables):
+    """
+    Hash canônico do conteúdo das tabelas de preços (brutas ou compiladas).
+
+    O hash é calculado sobre a forma compilada, então tabelas com as mesmas
+    faixas em outra ordem de linhas geram a mesma chave.
+    """
+    return _book_fingerprint(compile_pricing_tables(pricing_tables))
+
+
+@functools.lru_cache(maxsize=64)
+def _book_fingerprint(compiled):
+    """Hash de um `PricingBook`, calculado uma vez por conteúdo."""
+    canonical = repr(
+        (
+            float(compiled["no_reply"]),
+            *(
+                (schedule.breakpoints, schedule.cumulative, schedule.slopes)
+                for schedule in (
+                    compiled["leads"],
+                    compiled["qualified"],
+                    compiled["booked"],
+                )
+            ),
+        )
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def _rates_key(rates):
+    return (
+        float(rates["response"]),
+        float(rates["qualification"]),
+        float(rates["booking"]),
+    )
+
+
+def _tier_table_key(table):
+    """Linhas da tabela como tuplas hasheáveis (célula vazia -> None)."""
+    columns = (
+        [
+            None if value is None or value != value else float(value)
+            for value in _column(table, name)
+        ]
+        for name in ("Mínimo", "Máximo", "Valor")
+    )
+    return tuple(zip(*columns))
+
+
+def cached_tier_table(table, cache=TIER_TABLE_CACHE):
+    """
+    `normalize_tier_table` com cache pelo conteúdo das linhas: a tabela só é
+    validada e compilada de novo quando é editada.
+    """
+    key = ("tier_table", _tier_table_key(table))
+    return cache.get_or_compute(key, lambda: normalize_tier_table(table))
+
+
+def cached_run_simulation(
+    total_leads,
+    rates,
+    pricing_tables,
+    minimum_billing=0.0,
+    cache=SIMULATION_CACHE,
+    pricing_key=None,
+    evaluator=None,
+):
+    """
+    `run_simulation` com cache. `pricing_key` pode trazer o
+    `pricing_fingerprint` já calculado para evitar refazê-lo a cada chamada.
+    Em caso de falha, o cálculo usa `evaluator` (um `IncrementalEvaluator`)
+    quando informado.
+    """
+    if pricing_key is None:
+        pricing_key = pricing_fingerprint(pricing_tables)
+    key = (
+        "simulation",
+        pricing_key,
+        float(total_leads),
+        _rates_key(rates),
+        float(minimum_billing),
+    )
+    simulate = evaluator.simulate if evaluator is not None else run_simulation
+    result = cache.get_or_compute(
+        key,
+        lambda: simulate(total_leads, rates, pricing_tables, minimum_billing),
+    )
+    return dict(result)
+
+
+def cached_run_sweep(
+    axes,
+    total_leads,
+    rates,
+    pricing_tables,
+    minimum_billing=0.0,
+    price_multiplier=1.0,
+    cache=SWEEP_CACHE,
+    pricing_key=None,
+    evaluator=None,
+):
+    """
+    `run_sweep` com cache (o `SweepResult` retornado é somente-leitura).
+    A chave só inclui as entradas do cenário base que não são varridas, já
+    que as varridas não mudam o resultado. Em caso de falha, o cálculo usa
+    `evaluator` quando informado.
+    """
+    if pricing_key is None:
+        pricing_key = pricing_fingerprint(pricing_tables)
+    base = {
+        "total_leads": total_leads,
+        "response": rates["response"],
+        "qualification": rates["qualification"],
+        "booking": rates["booking"],
+        "minimum_billing": minimum_billing,
+        "price_multiplier": price_multiplier,
+    }
+    key = (
+        "sweep",
+        pricing_key,
+        tuple(
+            (dim, tuple(np.asarray(values, dtype=float).tolist()))
+            for dim, values in axes.items()
+        ),
+        tuple((name, float(value)) for name, value in base.items() if name not in axes),
+    )
+    sweep = evaluator.sweep if evaluator is not None else run_sweep
+    return cache.get_or_compute(
+        key,
+        lambda: sweep(
+            axes,
+            total_leads,
+            rates,
+            pricing_tables,
+            minimum_billing,
+            price_multiplier,
+        ),
+    )
+
+
+def cached_cost_distribution(
+    total_leads,
+    rates,
+    pricing_tables,
+    minimum_billing=0.0,
+    cache=DISTRIBUTION_CACHE,
+    pricing_key=None,
+):
+    """
+    `exact_cost_distribution` com cache. O consumo mínimo só é aplicado na
+    consulta, então mudar o mínimo reaproveita a distribuição já calculada.
+    """
+    if pricing_key is None:
+        pricing_key = pricing_fingerprint(pricing_tables)
+    key = ("distribution", pricing_key, float(total_leads), _rates_key(rates))
+    distribution = cache.get_or_compute(
+        key, lambda: exact_cost_distribution(total_leads, rates, pricing_tables)
+    )
+    return dataclasses.replace(distribution, minimum_billing=float(minimum_billing))
+
+
+def cached_predictive_bands(
+    counts,
+    leads,
+    pricing_tables,
+    minimum_billing=0.0,
+    cache=CALIBRATION_CACHE,
+    pricing_key=None,
+):
+    """
+    Faixas preditivas calibradas pelas contagens `counts` (ver
+    `posterior_predictive_bands`) com cache, para os volumes em `leads`.
+    """
+    if pricing_key is None:
+        pricing_key = pricing_fingerprint(pricing_tables)
+    key = (
+        "bands",
+        pricing_key,
+        tuple(sorted(counts.items())),
+        tuple(np.asarray(leads, dtype=float).tolist()),
+        float(minimum_billing),
+    )
+    return cache.get_or_compute(
+        key,
+        lambda: posterior_predictive_bands(
+            leads, calibrate_rates(counts), pricing_tables, minimum_billing
+        ),
+    )
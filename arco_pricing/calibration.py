@@ -0,0 +1,168 @@
+"""
+Calibração bayesiana das taxas do funil a partir de contagens observadas.
+
+Cada taxa recebe uma posterior Beta (prior uniforme por padrão): resposta a
+partir de respostas/leads, qualificação a partir de qualificados/respostas e
+agendamento a partir de agendamentos/qualificados. As faixas preditivas
+sorteiam taxas das posteriores e contagens binomiais para uma grade de
+volumes, tudo em um único bloco vetorizado, e resumem custo e CPA em
+percentis por volume.
+"""
+
+import math
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+from .instrumentation import timed
+from .montecarlo import price_samples
+from .tiers import compile_pricing_tables
+
+# Etapas do funil: (taxa, contagem de sucessos, contagem de tentativas)
+RATE_STAGES = (
+    ("response", "replies", "leads"),
+    ("qualification", "qualified", "replies"),
+    ("booking", "booked", "qualified"),
+)
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass(frozen=True)
+class BetaPosterior:
+    """Posterior Beta(`alpha`, `beta`) de uma taxa do funil."""
+
+    alpha: float
+    beta: float
+
+    @property
+    def mean(self):
+        return self.alpha / (self.alpha + self.beta)
+
+    def sample(self, size, rng):
+        return rng.beta(self.alpha, self.beta, size=size)
+
+    @property
+    def std(self):
+        total = self.alpha + self.beta
+        return math.sqrt(self.alpha * self.beta / (total**2 * (total + 1)))
+
+    def credible_interval(self, level=0.9, points=4_001):
+        """
+        Intervalo de credibilidade central, pela CDF integrada numericamente
+        em uma grade de `points` pontos em torno da média (± 12 desvios).
+        """
+        low = max(0.0, self.mean - 12 * self.std)
+        high = min(1.0, self.mean + 12 * self.std)
+        grid = np.linspace(low, high, points)
+        log_density = np.zeros_like(grid)
+        with np.errstate(divide="ignore"):
+            if self.alpha != 1:
+                log_density += (self.alpha - 1) * np.log(grid)
+            if self.beta != 1:
+                log_density += (self.beta - 1) * np.log1p(-grid)
+        # Densidade infinita nas bordas (alpha ou beta < 1) não tem área
+        log_density[~np.isfinite(log_density)] = -np.inf
+        density = np.exp(log_density - log_density.max())
+        cdf = np.concatenate(
+            [[0.0], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(grid))]
+        )
+        cdf /= cdf[-1]
+        tail = (1 - level) / 2
+        lower, upper = np.interp([tail, 1 - tail], cdf, grid)
+        return float(lower), float(upper)
+
+
+def calibrate_rates(counts, prior=(1.0, 1.0)):
+    """
+    Posteriores das três taxas a partir das contagens do funil
+    (`leads`, `replies`, `qualified`, `booked`) e de um prior Beta comum.
+    """
+    prior_alpha, prior_beta = prior
+    posteriors = {}
+    for rate, successes, attempts in RATE_STAGES:
+        if not 0 <= counts[successes] <= counts[attempts]:
+            raise ValueError(
+                f"Contagens inconsistentes: {successes}={counts[successes]} "
+                f"e {attempts}={counts[attempts]}"
+            )
+        posteriors[rate] = BetaPosterior(
+            alpha=prior_alpha + counts[successes],
+            beta=prior_beta + counts[attempts] - counts[successes],
+        )
+    return posteriors
+
+
+@dataclass(frozen=True)
+class PredictiveBands:
+    """
+    Percentis preditivos por volume: `cost[p]` e `cpa[p]` têm uma posição por
+    volume de `leads`. O CPA considera só os meses com algum agendamento e é
+    NaN nos volumes em que quase nenhum sorteio agenda.
+    """
+
+    leads: np.ndarray
+    cost: dict
+    cpa: dict
+
+    def at(self, total_leads):
+        """Percentis de custo e CPA interpolados em um volume."""
+        return tuple(
+            {
+                percentile: float(np.interp(total_leads, self.leads, values))
+                for percentile, values in band.items()
+            }
+            for band in (self.cost, self.cpa)
+        )
+
+
+@timed
+def posterior_predictive_bands(
+    leads,
+    posteriors,
+    pricing_tables,
+    minimum_billing=0.0,
+    draws=1_000,
+    seed=0,
+    percentiles=BAND_PERCENTILES,
+):
+    """
+    Faixas preditivas de custo total e CPA para os volumes em `leads`
+    (inteiros). Cada sorteio usa taxas tiradas das posteriores e contagens
+    binomiais, então as faixas somam a incerteza das taxas e a variação de
+    mês a mês. Todos os volumes e sorteios são avaliados em um só bloco.
+    """
+    pricing_tables = compile_pricing_tables(pricing_tables)
+    rng = np.random.default_rng(seed)
+    leads = np.array(leads, dtype=np.int64)
+    rates = {
+        rate: posteriors[rate].sample((draws, 1), rng) for rate, _, _ in RATE_STAGES
+    }
+
+    num_replies = rng.binomial(leads[None, :], rates["response"])
+    num_qualified = rng.binomial(num_replies, rates["qualification"])
+    num_booked = rng.binomial(num_qualified, rates["booking"])
+    counts = {
+        "num_no_replies": (leads - num_replies).astype(float),
+        "num_replies": num_replies.astype(float),
+        "num_qualified": num_qualified.astype(float),
+        "num_booked": num_booked.astype(float),
+    }
+    samples = price_samples(leads, counts, pricing_tables, minimum_billing)
+
+    cost = np.percentile(samples["total_cost"], percentiles, axis=0)
+    cpa = np.where(num_booked > 0, samples["cpa"], np.nan)
+    with warnings.catch_warnings():
+        # Volumes sem nenhum agendamento sorteado ficam com CPA NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        cpa = np.nanpercentile(cpa, percentiles, axis=0)
+    # Abaixo de 5% dos meses com agendamento o CPA não é informativo
+    cpa[:, np.mean(num_booked > 0, axis=0) < 0.05] = np.nan
+
+    for values in (leads, cost, cpa):
+        values.flags.writeable = False
+    return PredictiveBands(
+        leads=leads,
+        cost=dict(zip(percentiles, cost)),
+        cpa=dict(zip(percentiles, cpa)),
+    )
@@ -0,0 +1,453 @@
+"""
+Linha de comando para cotações em lote, sem Streamlit nem plotly.
+
+Exemplos:
+
+    python -m arco_pricing quote prospects.csv -o cotacoes.jsonl
+    python -m arco_pricing montecarlo --leads 2000000 --response 0.46 \
+        --qualification 0.283 --booking 0.231 --trials 20000000
+    python -m arco_pricing precompute -o precomputed
+
+No `quote`, os cenários são lidos de CSV ou JSONL em blocos, avaliados com o
+motor vetorizado e gravados em CSV, JSONL ou Parquet à medida que são
+processados, então a memória usada não depende do número de linhas. O
+`montecarlo` roda uma simulação em fluxo (`streaming`) e imprime um resumo em
+JSON. O `precompute` grava o cubo da grade dos sliders usado pelo app.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .defaults import DEFAULT_PRICING_TABLES
+from .precompute import SLIDER_AXES, SLIDER_DEFAULTS, build_cube, slider_values
+from .simulation import run_simulation_batch
+from .streaming import run_streaming_monte_carlo
+from .tiers import compile_pricing_tables
+
+# Colunas de entrada de cada cenário (taxas em fração, de 0 a 1)
+SCENARIO_FIELDS = ("total_leads", "response", "qualification", "booking")
+OPTIONAL_FIELDS = ("minimum_billing", "pricing")
+RESULT_FIELDS = (
+    "total_leads",
+    "num_no_replies",
+    "num_replies",
+    "num_qualified",
+    "num_booked",
+    "cost_no_reply",
+    "cost_replies",
+    "cost_qualified",
+    "cost_booked",
+    "calculated_cost",
+    "total_cost",
+    "cpl",
+    "cpa",
+)
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+def load_pricing_tables(path):
+    """
+    Lê um arquivo JSON com a mesma estrutura de `DEFAULT_PRICING_TABLES`
+    e retorna as tabelas compiladas.
+    """
+    with open(path, encoding="utf-8") as file:
+        return compile_pricing_tables(json.load(file))
+
+
+def _detect_format(path, explicit):
+    if explicit:
+        return explicit
+    for fmt in FORMATS:
+        if path.endswith(f".{fmt}"):
+            return fmt
+    if path.endswith(".json"):
+        return "jsonl"
+    return "csv"
+
+
+def _open_text(path, mode):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def positive_int(text):
+    """Tipo do argparse para contagens e tamanhos de bloco (inteiro > 0)."""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        raise argparse.ArgumentTypeError(
+            f"precisa ser um inteiro positivo (recebido: {text})"
+        )
+    return value
+
+
+def read_scenarios(file, fmt, chunk_size):
+    """Lê cenários em blocos de até `chunk_size` linhas (listas de dicts)."""
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size precisa ser positivo (recebido: {chunk_size})")
+    if fmt == "csv":
+        rows = csv.DictReader(file)
+    elif fmt == "jsonl":
+        rows = (json.loads(line) for line in file if line.strip())
+    else:
+        raise ValueError(f"Formato de entrada não suportado: {fmt}")
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _float_column(chunk, field, default=None):
+    values = []
+    for row in chunk:
+        value = row.get(field)
+        if value is None or value == "":
+            if default is None:
+                raise ValueError(f"Coluna obrigatória ausente ou vazia: '{field}'")
+            value = default
+        values.append(value)
+    return np.array(values, dtype=float)
+
+
+def quote_chunk(chunk, pricing_books, minimum_billing=0.0):
+    """
+    Avalia um bloco de cenários. Cada linha pode escolher uma tabela de preços
+    pela coluna `pricing` (nome em `pricing_books`); sem ela vale a tabela
+    "default". Retorna as colunas de resultado na ordem das linhas.
+    """
+    total_leads = _float_column(chunk, "total_leads")
+    rates = {
+        name: _float_column(chunk, name)
+        for name in ("response", "qualification", "booking")
+    }
+    billing = _float_column(chunk, "minimum_billing", default=minimum_billing)
+    references = [row.get("pricing") or "default" for row in chunk]
+
+    unknown = set(references) - set(pricing_books)
+    if unknown:
+        raise ValueError(f"Tabelas de preços desconhecidas: {sorted(unknown)}")
+
+    columns = {field: np.empty(len(chunk)) for field in RESULT_FIELDS}
+    references = np.array(references)
+    for reference in np.unique(references):
+        rows = references == reference
+        results = run_simulation_batch(
+            total_leads[rows],
+            {name: values[rows] for name, values in rates.items()},
+            pricing_books[reference],
+            billing[rows],
+        )
+        for field in RESULT_FIELDS:
+            columns[field][rows] = results[field]
+    return columns
+
+
+class _CsvWriter:
+    def __init__(self, file, fieldnames):
+        self._writer = csv.writer(file)
+        self._writer.writerow(fieldnames)
+
+    def write(self, columns):
+        self._writer.writerows(zip(*columns.values()))
+
+    def close(self):
+        pass
+
+
+class _JsonlWriter:
+    def __init__(self, file, fieldnames):
+        self._file = file
+        self._fieldnames = fieldnames
+
+    def write(self, columns):
+        for values in zip(*columns.values()):
+            self._file.write(json.dumps(dict(zip(self._fieldnames, values))))
+            self._file.write("\n")
+
+    def close(self):
+        pass
+
+
+class _ParquetWriter:
+    def __init__(self, path, fieldnames):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise SystemExit(
+                "A saída em Parquet requer o pacote 'pyarrow' (pip install pyarrow)."
+            ) from error
+        self._pa = pa
+        self._pq = pq
+        self._path = path
+        self._writer = None
+
+    def write(self, columns):
+        table = self._pa.table(columns)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _open_writer(path, output_format, fieldnames):
+    """Escritor da saída e o arquivo aberto para ele (None no Parquet)."""
+    if output_format == "parquet":
+        return _ParquetWriter(path, fieldnames), None
+    output_file = _open_text(path, "w")
+    writer_class = _CsvWriter if output_format == "csv" else _JsonlWriter
+    return writer_class(output_file, fieldnames), output_file
+
+
+def run_quote(args):
+    pricing_books = {"default": compile_pricing_tables(DEFAULT_PRICING_TABLES)}
+    if args.pricing_default:
+        pricing_books["default"] = load_pricing_tables(args.pricing_default)
+    for reference in args.pricing:
+        name, _, path = reference.partition("=")
+        if not path:
+            raise SystemExit(f"Use --pricing NOME=arquivo.json (recebido: {reference})")
+        pricing_books[name] = load_pricing_tables(path)
+
+    input_format = _detect_format(args.input, args.input_format)
+    output_format = _detect_format(args.output, args.output_format)
+    if output_format == "parquet" and args.output == "-":
+        raise SystemExit(
+            "A saída em Parquet precisa de um arquivo (-o arquivo.parquet)."
+        )
+
+    started = time.perf_counter()
+    rows = 0
+    passthrough = None
+    writer = None
+    output_file = None
+    input_file = _open_text(args.input, "r")
+    try:
+        for chunk in read_scenarios(input_file, input_format, args.chunk_size):
+            results = quote_chunk(chunk, pricing_books, args.minimum_billing)
+
+            # Colunas extras da entrada (ex.: nome do prospect) são repassadas,
+            # fixadas pela primeira linha para manter o esquema da saída
+            if passthrough is None:
+                passthrough = [
+                    field
+                    for field in chunk[0]
+                    if field not in SCENARIO_FIELDS + OPTIONAL_FIELDS
+                ]
+            columns = {
+                field: [row.get(field) for row in chunk] for field in passthrough
+            }
+            columns.update(
+                (field, values.tolist()) for field, values in results.items()
+            )
+
+            if writer is None:
+                writer, output_file = _open_writer(
+                    args.output, output_format, list(columns)
+                )
+            writer.write(columns)
+            rows += len(chunk)
+        if writer is None:
+            # Entrada sem cenários: a saída ainda tem o cabeçalho (ou esquema)
+            columns = {field: np.empty(0) for field in RESULT_FIELDS}
+            writer, output_file = _open_writer(
+                args.output, output_format, list(columns)
+            )
+            writer.write(columns)
+    finally:
+        if writer is not None:
+            writer.close()
+        if output_file not in (None, sys.stdout):
+            output_file.close()
+        if input_file is not sys.stdin:
+            input_file.close()
+
+    elapsed = time.perf_counter() - started
+    if not args.quiet:
+        print(
+            f"{rows:,} cenários em {elapsed:.2f} s "
+            f"({rows / elapsed if elapsed else 0:,.0f} cenários/s)",
+            file=sys.stderr,
+        )
+    return 0
+
+
+def run_montecarlo(args):
+    pricing_tables = DEFAULT_PRICING_TABLES
+    if args.pricing_default:
+        pricing_tables = load_pricing_tables(args.pricing_default)
+    rates = {
+        "response": args.response,
+        "qualification": args.qualification,
+        "booking": args.booking,
+    }
+    result = run_streaming_monte_carlo(
+        args.leads,
+        rates,
+        pricing_tables,
+        args.minimum_billing,
+        trials=args.trials,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    json.dump(result.summary(), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    if not args.quiet:
+        print(
+            f"{result.trials:,} tentativas em {result.elapsed:.2f} s com "
+            f"{result.workers} processo(s): {result.trials_per_second:,.0f} "
+            f"tentativas/s ({result.trials_per_second_per_core:,.0f} por núcleo)",
+            file=sys.stderr,
+        )
+    return 0
+
+
+def run_precompute(args):
+    pricing_tables = DEFAULT_PRICING_TABLES
+    if args.pricing_default:
+        pricing_tables = load_pricing_tables(args.pricing_default)
+    axes = {
+        "total_leads": slider_values(
+            0, args.leads_max, args.leads_step, [SLIDER_DEFAULTS["total_leads"]]
+        )
+    }
+    for rate in ("response", "qualification", "booking"):
+        axes[rate] = slider_values(0.0, 100.0, args.rate_step, [SLIDER_DEFAULTS[rate]])
+    started = time.perf_counter()
+    build_cube(pricing_tables, args.output, axes)
+    elapsed = time.perf_counter() - started
+    if not args.quiet:
+        size = sum(
+            os.path.getsize(os.path.join(args.output, name))
+            for name in os.listdir(args.output)
+        )
+        print(
+            f"Cubo gravado em {args.output} ({size / 1e6:,.1f} MB) em {elapsed:.2f} s",
+            file=sys.stderr,
+        )
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m arco_pricing",
+        description="Ferramentas de linha de comando do simulador de custos.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    quote = subparsers.add_parser(
+        "quote",
+        help="Cota cenários em lote a partir de CSV ou JSONL",
+        description=(
+            "Lê cenários com as colunas total_leads, response, qualification e "
+            "booking (taxas de 0 a 1) e, opcionalmente, minimum_billing e "
+            "pricing (nome de uma tabela passada em --pricing)."
+        ),
+    )
+    quote.add_argument("input", help="Arquivo de entrada ('-' para stdin)")
+    quote.add_argument(
+        "-o", "--output", default="-", help="Arquivo de saída ('-' para stdout)"
+    )
+    quote.add_argument("--input-format", choices=("csv", "jsonl"))
+    quote.add_argument("--output-format", choices=FORMATS)
+    quote.add_argument(
+        "--minimum-billing",
+        type=float,
+        default=0.0,
+        help="Consumo mínimo para linhas sem a coluna minimum_billing",
+    )
+    quote.add_argument(
+        "--pricing-default",
+        metavar="ARQUIVO",
+        help="Tabela de preços (JSON) usada nas linhas sem a coluna pricing",
+    )
+    quote.add_argument(
+        "--pricing",
+        action="append",
+        default=[],
+        metavar="NOME=ARQUIVO",
+        help="Registra uma tabela de preços (JSON) referenciável pela coluna pricing",
+    )
+    quote.add_argument("--chunk-size", type=positive_int, default=50_000)
+    quote.add_argument("-q", "--quiet", action="store_true")
+    quote.set_defaults(handler=run_quote)
+
+    montecarlo = subparsers.add_parser(
+        "montecarlo",
+        help="Distribuição do custo mensal por Monte Carlo em fluxo",
+        description=(
+            "Sorteia o funil como binomiais encadeadas em blocos, em vários "
+            "processos, e resume o custo com esboços de memória constante."
+        ),
+    )
+    montecarlo.add_argument("--leads", type=int, required=True)
+    montecarlo.add_argument("--response", type=float, required=True)
+    montecarlo.add_argument("--qualification", type=float, required=True)
+    montecarlo.add_argument("--booking", type=float, required=True)
+    montecarlo.add_argument("--minimum-billing", type=float, default=0.0)
+    montecarlo.add_argument(
+        "--pricing-default", metavar="ARQUIVO", help="Tabela de preços (JSON)"
+    )
+    montecarlo.add_argument("--trials", type=positive_int, default=10_000_000)
+    montecarlo.add_argument("--chunk-size", type=positive_int, default=250_000)
+    montecarlo.add_argument(
+        "--workers", type=positive_int, help="Processos (padrão: todos os núcleos)"
+    )
+    montecarlo.add_argument("--seed", type=int)
+    montecarlo.add_argument("-q", "--quiet", action="store_true")
+    montecarlo.set_defaults(handler=run_montecarlo)
+
+    _, leads_max, leads_step = SLIDER_AXES["total_leads"]
+    precompute = subparsers.add_parser(
+        "precompute",
+        help="Pré-calcula a grade dos sliders para o app",
+        description=(
+            "Avalia a grade de leads e taxas dos sliders para uma tabela de "
+            "preços e grava arrays .npy mapeáveis em memória e os metadados."
+        ),
+    )
+    precompute.add_argument(
+        "-o", "--output", default="precomputed", help="Pasta de saída"
+    )
+    precompute.add_argument(
+        "--pricing-default", metavar="ARQUIVO", help="Tabela de preços (JSON)"
+    )
+    precompute.add_argument("--leads-max", type=int, default=leads_max)
+    precompute.add_argument("--leads-step", type=int, default=leads_step)
+    precompute.add_argument(
+        "--rate-step",
+        type=float,
+        default=SLIDER_AXES["response"][2],
+        help="Passo das taxas em pontos percentuais",
+    )
+    precompute.add_argument("-q", "--quiet", action="store_true")
+    precompute.set_defaults(handler=run_precompute)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except ValueError as error:
+        print(f"Erro: {error}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # Saída interrompida (ex.: "| head"): encerra sem rastreamento de erro
+        sys.stdout = None
+        return 0
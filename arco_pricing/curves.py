@@ -0,0 +1,202 @@
+"""
+Curvas exatas de custo em função do volume de leads.
+
+Com as taxas fixas, cada etapa do funil é proporcional a `total_leads` e o
+custo de cada tabela escalonada é linear por partes na quantidade da etapa.
+Assim o custo total é linear por partes em `total_leads`, com vértices apenas
+nos limites de faixa de cada tabela (convertidos em leads) e no ponto em que o
+custo calculado cruza o consumo mínimo.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .instrumentation import timed
+from .simulation import run_simulation_batch
+from .tiers import compile_pricing_tables
+
+
+@dataclass(frozen=True)
+class CostCurve:
+    """
+    Curva de custo linear por partes: entre dois vértices consecutivos de
+    `leads`, `calculated_cost` e `total_cost` variam linearmente.
+
+    `break_even` é o volume em que o custo calculado alcança o consumo mínimo
+    (a curva sai do piso), ou NaN se isso não acontece no intervalo da curva.
+    """
+
+    leads: np.ndarray
+    calculated_cost: np.ndarray
+    total_cost: np.ndarray
+    break_even: float = np.nan
+
+    def cost_at(self, total_leads):
+        """Custo total exato em qualquer volume dentro do intervalo da curva."""
+        return np.interp(total_leads, self.leads, self.total_cost)
+
+
+def funnel_factors(rates):
+    """
+    Fração dos leads que chega a cada tabela escalonada: respostas,
+    qualificados e agendamentos por lead processado.
+    """
+    replies = rates["response"]
+    qualified = replies * rates["qualification"]
+    booked = qualified * rates["booking"]
+    return {"leads": replies, "qualified": qualified, "booked": booked}
+
+
+def tier_breakpoints_in_leads(rates, pricing_tables, min_leads=0.0, max_leads=np.inf):
+    """
+    Volumes de leads em que alguma tabela muda de faixa, ordenados e restritos
+    ao intervalo aberto (`min_leads`, `max_leads`).
+    """
+    pricing_tables = compile_pricing_tables(pricing_tables)
+    candidates = []
+    for table, factor in funnel_factors(rates).items():
+        if factor > 0:
+            candidates.append(
+                np.asarray(pricing_tables[table].breakpoints, dtype=float) / factor
+            )
+    if not candidates:
+        return np.empty(0)
+    leads = np.unique(np.concatenate(candidates))
+    return leads[(leads > min_leads) & (leads < max_leads)]
+
+
+def _drop_collinear(leads, *series):
+    """Remove vértices internos em que nenhuma das séries muda de inclinação."""
+    if leads.size <= 2:
+        return (leads, *series)
+    bends = np.zeros(leads.size - 2, dtype=bool)
+    dx_left = leads[1:-1] - leads[:-2]
+    dx_right = leads[2:] - leads[1:-1]
+    for values in series:
+        slope_left = (values[1:-1] - values[:-2]) / dx_left
+        slope_right = (values[2:] - values[1:-1]) / dx_right
+        bends |= ~np.isclose(slope_left, slope_right, rtol=1e-9, atol=1e-9)
+    keep = np.concatenate([[True], bends, [True]])
+    return (leads[keep], *(values[keep] for values in series))
+
+
+@timed
+def cost_curve(rates, pricing_tables, minimum_billing=0.0, max_leads=3500, min_leads=0):
+    """
+    Curva exata de custo entre `min_leads` e `max_leads` para taxas fixas,
+    com apenas os vértices necessários: extremos, mudanças de faixa e o
+    cruzamento com o consumo mínimo.
+    """
+    pricing_tables = compile_pricing_tables(pricing_tables)
+    leads = np.concatenate(
+        [
+            [float(min_leads)],
+            tier_breakpoints_in_leads(rates, pricing_tables, min_leads, max_leads),
+            [float(max_leads)],
+        ]
+    )
+    calculated = run_simulation_batch(leads, rates, pricing_tables)["calculated_cost"]
+
+    # Entre vértices o custo calculado é linear: se cruzar o consumo mínimo,
+    # o ponto de cruzamento vira um vértice da curva final
+    below = calculated < minimum_billing
+    crossing = np.flatnonzero(below[:-1] != below[1:])
+    break_even = np.nan if below[0] else float(leads[0])
+    if crossing.size:
+        x0, x1 = leads[crossing], leads[crossing + 1]
+        y0, y1 = calculated[crossing], calculated[crossing + 1]
+        crossing_leads = x0 + (minimum_billing - y0) * (x1 - x0) / (y1 - y0)
+        if below[0]:
+            break_even = float(crossing_leads[0])
+        leads, unique = np.unique(
+            np.concatenate([leads, crossing_leads]), return_index=True
+        )
+        calculated = np.concatenate(
+            [calculated, np.full(crossing.size, float(minimum_billing))]
+        )[unique]
+
+    total = np.maximum(calculated, minimum_billing)
+    leads, calculated, total = _drop_collinear(leads, calculated, total)
+    for values in (leads, calculated, total):
+        values.flags.writeable = False
+    return CostCurve(
+        leads=leads,
+        calculated_cost=calculated,
+        total_cost=total,
+        break_even=break_even,
+    )
+
+
+def _extended_curve(rates, pricing_tables, minimum_billing):
+    """
+    Curva que vai além do último limite de faixa, junto com a inclinação do
+    custo calculado no trecho final (uma reta até o infinito).
+    """
+    breakpoints = tier_breakpoints_in_leads(rates, pricing_tables)
+    horizon = 2.0 * breakpoints[-1] if breakpoints.size else 1.0
+    curve = cost_curve(rates, pricing_tables, minimum_billing, max_leads=horizon)
+    leads, calculated = curve.leads, curve.calculated_cost
+    tail_slope = (calculated[-1] - calculated[-2]) / (leads[-1] - leads[-2])
+    return curve, tail_slope
+
+
+def minimum_billing_break_even(rates, pricing_tables, minimum_billing):
+    """
+    Volume exato de leads em que o custo calculado alcança `minimum_billing`;
+    abaixo dele é cobrado o consumo mínimo. Retorna 0 se não há mínimo e
+    `inf` se o custo nunca chega ao mínimo.
+    """
+    pricing_tables = compile_pricing_tables(pricing_tables)
+    curve, tail_slope = _extended_curve(rates, pricing_tables, minimum_billing)
+    if not np.isnan(curve.break_even):
+        return curve.break_even
+    if tail_slope <= 0:
+        return np.inf
+    return float(
+        curve.leads[-1] + (minimum_billing - curve.calculated_cost[-1]) / tail_slope
+    )
+
+
+def max_leads_for_budget(
+    budget, rates, pricing_tables, minimum_billing=0.0, whole_leads=True
+):
+    """
+    Maior `total_leads` cujo custo total cabe em `budget` (escalar ou array de
+    orçamentos). O custo é não decrescente e linear por partes em leads, então
+    cada orçamento é resolvido com uma busca binária nos vértices da curva
+    exata e uma interpolação no segmento encontrado.
+
+    Retorna NaN quando o orçamento não cobre nem o consumo mínimo e `inf`
+    quando o custo deixa de crescer antes de atingir o orçamento. Com
+    `whole_leads`, o resultado é arredondado para baixo em leads inteiros.
+    """
+    pricing_tables = compile_pricing_tables(pricing_tables)
+    # Depois do último limite de faixa o custo é uma reta: a curva vai até
+    # além dele e o trecho final é extrapolado pela sua inclinação
+    curve, tail_slope = _extended_curve(rates, pricing_tables, minimum_billing)
+    leads, calculated, total = curve.leads, curve.calculated_cost, curve.total_cost
+    budget = np.asarray(budget, dtype=float)
+
+    k = np.searchsorted(total, budget, side="right")
+    segment = np.clip(k, 1, leads.size - 1)
+    x0, x1 = leads[segment - 1], leads[segment]
+    c0, c1 = total[segment - 1], total[segment]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        within = x0 + (budget - c0) * (x1 - x0) / (c1 - c0)
+        beyond = (
+            leads[-1] + (budget - calculated[-1]) / tail_slope
+            if tail_slope > 0
+            else np.inf
+        )
+    result = np.where(k == 0, np.nan, np.where(k < leads.size, within, beyond))
+
+    if whole_leads:
+        finite = np.isfinite(result)
+        floored = np.floor(np.where(finite, result, 0.0) + 1e-9)
+        # Corrige arredondamentos de ponto flutuante logo acima do orçamento
+        costs = run_simulation_batch(floored, rates, pricing_tables, minimum_billing)
+        floored = np.where(costs["total_cost"] > budget, floored - 1, floored)
+        result = np.where(finite, floored, result)
+    return result[()] if result.ndim == 0 else result
@@ -0,0 +1,36 @@
+"""
+Tabela de preços padrão do simulador.
+"""
+
+# Cada tabela escalonada é uma lista de faixas com 'Mínimo', 'Máximo' e 'Valor'.
+# O Máximo 99999 (`OPEN_ENDED_SENTINEL`) marca a faixa aberta, sem limite.
+DEFAULT_PRICING_TABLES = {
+    "no_reply": [{"Valor": 0.20}],
+    "leads": [
+        {"Mínimo": 0, "Máximo": 250, "Valor": 5.00},
+        {"Mínimo": 500, "Máximo": 1500, "Valor": 3.80},
+        {"Mínimo": 1500, "Máximo": 2000, "Valor": 3.00},
+        {"Mínimo": 2000, "Máximo": 3000, "Valor": 2.40},
+        {"Mínimo": 3000, "Máximo": 99999, "Valor": 2.00},
+    ],
+    "qualified": [
+        {"Mínimo": 0, "Máximo": 100, "Valor": 20.00},
+        {"Mínimo": 100, "Máximo": 150, "Valor": 15.00},
+        {"Mínimo": 150, "Máximo": 200, "Valor": 10.00},
+        {"Mínimo": 200, "Máximo": 99999, "Valor": 5.00},
+    ],
+    "booked": [
+        {"Mínimo": 0, "Máximo": 20, "Valor": 100.00},
+        {"Mínimo": 20, "Máximo": 50, "Valor": 80.00},
+        {"Mínimo": 50, "Máximo": 100, "Valor": 60.00},
+        {"Mínimo": 100, "Máximo": 99999, "Valor": 50.00},
+    ],
+}
+
+# Contagens observadas no POC em cada etapa do funil
+POC_FUNNEL_COUNTS = {
+    "leads": 716,
+    "replies": 425,
+    "qualified": 96,
+    "booked": 32,
+}
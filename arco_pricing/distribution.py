@@ -0,0 +1,205 @@
+"""
+Distribuição exata do custo mensal, sem amostragem.
+
+Com as contagens do funil como binomiais encadeadas (as mesmas do Monte
+Carlo), a probabilidade conjunta de (respostas, qualificados, agendamentos) é
+calculada diretamente e cada combinação passa pelas tabelas compiladas. As
+combinações são restritas ao suporte de cada etapa em que a probabilidade
+marginal não é desprezível (`tail`) e os custos são acumulados em classes de
+um centavo, então percentis e caudas como P(custo > orçamento) saem sem ruído.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .instrumentation import timed
+from .montecarlo import DEFAULT_PERCENTILES, whole_leads
+from .tiers import compile_pricing_tables
+
+# Combinações avaliadas por bloco de qualificados (limita a memória temporária)
+CHUNK_OUTCOMES = 2_000_000
+
+
+@dataclass(frozen=True)
+class CostDistribution:
+    """
+    Distribuição do custo em classes de `resolution` reais: `calculated_cost`
+    (ordenado) tem os valores com probabilidade positiva antes do consumo
+    mínimo e `probabilities` as probabilidades de cada um. `truncated_mass` é
+    a probabilidade descartada nas caudas (até 3 × `tail`, mais o erro de
+    arredondamento da soma).
+    """
+
+    calculated_cost: np.ndarray
+    probabilities: np.ndarray
+    minimum_billing: float
+    truncated_mass: float
+
+    def __post_init__(self):
+        object.__setattr__(self, "_cumulative", np.cumsum(self.probabilities))
+
+    @property
+    def total_cost(self):
+        """Valores do custo total, com o consumo mínimo aplicado."""
+        return np.maximum(self.calculated_cost, self.minimum_billing)
+
+    @property
+    def mean(self):
+        """
+        Custo total esperado, sobre a massa mantida (a mesma base dos
+        percentis).
+        """
+        return float(np.dot(self.total_cost, self.probabilities) / self._cumulative[-1])
+
+    @property
+    def minimum_billing_probability(self):
+        """Probabilidade de o consumo mínimo ser cobrado, sobre a massa mantida."""
+        applied = self.calculated_cost < self.minimum_billing
+        return float(self.probabilities[applied].sum() / self._cumulative[-1])
+
+    def cost_percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """Percentis exatos do custo total, ex.: {5: P5, 50: P50, 95: P95}."""
+        levels = np.asarray(percentiles, dtype=float) / 100 * self._cumulative[-1]
+        k = np.minimum(
+            np.searchsorted(self._cumulative, levels, side="left"),
+            self._cumulative.size - 1,
+        )
+        return dict(zip(percentiles, self.total_cost[k].tolist()))
+
+    def probability_exceeding(self, budget):
+        """
+        P(custo total > `budget`) para um orçamento ou array de orçamentos,
+        sobre a massa mantida.
+        """
+        k = np.searchsorted(self.total_cost, budget, side="right")
+        below = np.where(k > 0, self._cumulative[np.maximum(k - 1, 0)], 0.0)
+        result = 1.0 - below / self._cumulative[-1]
+        return float(result) if np.ndim(result) == 0 else result
+
+    def cost_histogram(self, bins=40):
+        """Probabilidade de cada classe de custo total e os limites das classes."""
+        return np.histogram(self.total_cost, bins=bins, weights=self.probabilities)
+
+
+def _log_factorials(n):
+    """log(k!) para k = 0..n."""
+    return np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, n + 1)))])
+
+
+def _binomial_pmf(k, trials, p, log_factorial):
+    """P(X = k) para X ~ Binomial(trials, p), com `k` e `trials` em broadcasting."""
+    k, trials = np.broadcast_arrays(k, trials)
+    valid = (k >= 0) & (k <= trials)
+    if p <= 0.0:
+        return (valid & (k == 0)).astype(float)
+    if p >= 1.0:
+        return (valid & (k == trials)).astype(float)
+    kk = np.where(valid, k, 0)
+    rest = np.where(valid, trials - k, 0)
+    log_pmf = (
+        log_factorial[kk + rest]
+        - log_factorial[kk]
+        - log_factorial[rest]
+        + kk * np.log(p)
+        + rest * np.log1p(-p)
+    )
+    return np.where(valid, np.exp(log_pmf), 0.0)
+
+
+def _support(n, p, log_factorial, tail):
+    """Menor intervalo de contagens de Binomial(n, p) fora das caudas `tail`/2."""
+    cumulative = np.cumsum(_binomial_pmf(np.arange(n + 1), n, p, log_factorial))
+    low = int(np.searchsorted(cumulative, tail / 2, side="left"))
+    high = int(np.searchsorted(cumulative, 1.0 - tail / 2, side="left"))
+    return np.arange(min(low, n), min(high, n) + 1)
+
+
+@timed
+def exact_cost_distribution(
+    total_leads,
+    rates,
+    pricing_tables,
+    minimum_billing=0.0,
+    tail=1e-12,
+    resolution=0.01,
+    max_outcomes=50_000_000,
+):
+    """
+    Distribuição exata do custo total de um mês com o funil binomial.
+
+    Levanta `ValueError` quando o número de combinações a enumerar passa de
+    `max_outcomes` (volumes muito grandes); nesse caso use `run_monte_carlo`.
+    """
+    pricing_tables = compile_pricing_tables(pricing_tables)
+    n = whole_leads(total_leads)
+    response = float(rates["response"])
+    qualification = float(rates["qualification"])
+    booking = float(rates["booking"])
+    log_factorial = _log_factorials(n)
+
+    # Suportes pelas marginais: respostas ~ Bin(n, r), qualificados ~
+    # Bin(n, r·q) e agendamentos ~ Bin(n, r·q·b)
+    replies = _support(n, response, log_factorial, tail)
+    qualified = _support(n, response * qualification, log_factorial, tail)
+    booked = _support(n, response * qualification * booking, log_factorial, tail)
+    outcomes = replies.size * qualified.size * booked.size
+    if outcomes > max_outcomes:
+        raise ValueError(
+            f"A distribuição exata exigiria {outcomes:,} combinações "
+            f"(limite: {max_outcomes:,}); use a simulação de Monte Carlo."
+        )
+
+    replies_pmf = _binomial_pmf(replies, n, response, log_factorial)
+    joint_replies_qualified = replies_pmf[:, None] * _binomial_pmf(
+        qualified[None, :], replies[:, None], qualification, log_factorial
+    )
+    booked_given_qualified = _binomial_pmf(
+        booked[None, :], qualified[:, None], booking, log_factorial
+    )
+
+    # O custo é a soma de uma parte que depende só das respostas, outra só
+    # dos qualificados e outra só dos agendamentos
+    replies_cost = (n - replies) * pricing_tables["no_reply"]
+    replies_cost = replies_cost + pricing_tables["leads"].evaluate(replies)
+    qualified_cost = pricing_tables["qualified"].evaluate(qualified)
+    booked_cost = pricing_tables["booked"].evaluate(booked)
+
+    lowest = replies_cost.min() + qualified_cost.min() + booked_cost.min()
+    highest = replies_cost.max() + qualified_cost.max() + booked_cost.max()
+    base = int(np.floor(lowest / resolution))
+    top = int(np.ceil(highest / resolution))
+    bins = top - base + 1
+    if bins > max_outcomes:
+        raise ValueError(
+            f"A distribuição exata exigiria {bins:,} classes de custo "
+            f"(limite: {max_outcomes:,}); aumente `resolution`."
+        )
+
+    mass = np.zeros(bins)
+    step = max(1, CHUNK_OUTCOMES // max(1, replies.size * booked.size))
+    for start in range(0, qualified.size, step):
+        chunk = slice(start, start + step)
+        weights = (
+            joint_replies_qualified[:, chunk, None]
+            * booked_given_qualified[None, chunk, :]
+        )
+        costs = (
+            replies_cost[:, None, None]
+            + qualified_cost[None, chunk, None]
+            + booked_cost[None, None, :]
+        )
+        index = np.rint(costs / resolution).astype(np.int64) - base
+        mass += np.bincount(index.ravel(), weights=weights.ravel(), minlength=bins)
+
+    positive = np.flatnonzero(mass > 0)
+    probabilities = mass[positive]
+    calculated_cost = (base + positive) * resolution
+    for values in (calculated_cost, probabilities):
+        values.flags.writeable = False
+    return CostDistribution(
+        calculated_cost=calculated_cost,
+        probabilities=probabilities,
+        minimum_billing=float(minimum_billing),
+        truncated_mass=max(0.0, 1.0 - float(probabilities.sum())),
+    )
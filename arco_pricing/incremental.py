@@ -0,0 +1,141 @@
+"""
+Recálculo incremental dos componentes de custo do funil.
+
+Cada componente (`cost_no_reply`, `cost_replies`, `cost_qualified`,
+`cost_booked`) depende só de algumas entradas do cenário e de uma tabela de
+preços (`COMPONENT_DEPENDENCIES`). O avaliador memoriza os componentes por
+essas entradas, então mudar a taxa de agendamento, por exemplo, recalcula
+apenas `cost_booked` — tanto em simulações isoladas quanto em varreduras.
+"""
+
+import threading
+
+import numpy as np
+
+from .cache import LRUCache
+from .instrumentation import count
+from .simulation import (
+    COMPONENT_DEPENDENCIES,
+    COMPONENT_TABLES,
+    _assemble_results,
+    _component_cost,
+    _funnel_counts,
+)
+from .sweep import SweepResult, open_grid
+from .tiers import compile_pricing_tables
+
+
+def _input_key(value):
+    """Chave de uma entrada do cenário: escalar ou eixo da grade aberta."""
+    values = np.asarray(value, dtype=float)
+    return (values.shape, tuple(values.ravel().tolist()))
+
+
+class IncrementalEvaluator:
+    """
+    Avaliador que só recalcula os componentes cujas entradas mudaram.
+
+    `evaluated` conta os valores de componente efetivamente calculados e
+    `skipped` os que uma avaliação ingênua (todo componente em toda célula
+    da grade) calcularia mas que foram reaproveitados ou evitados.
+    """
+
+    def __init__(self, maxsize=256):
+        self._components = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self.evaluated = 0
+        self.skipped = 0
+
+    def _evaluate_components(self, scenario, pricing_tables, grid_size):
+        counts = _funnel_counts(
+            scenario["total_leads"],
+            scenario["response"],
+            scenario["qualification"],
+            scenario["booking"],
+        )
+        costs = {}
+        for component, dependencies in COMPONENT_DEPENDENCIES.items():
+            table, _ = COMPONENT_TABLES[component]
+            key = (
+                component,
+                pricing_tables[table],
+                tuple(_input_key(scenario[name]) for name in dependencies),
+            )
+            computed = []
+
+            def compute():
+                cost = np.array(_component_cost(component, counts, pricing_tables))
+                cost.flags.writeable = False
+                computed.append(cost.size)
+                return cost
+
+            costs[component] = self._components.get_or_compute(key, compute)
+            evaluated = computed[0] if computed else 0
+            with self._lock:
+                self.evaluated += evaluated
+                self.skipped += grid_size - evaluated
+        return counts, costs
+
+    def simulate(self, total_leads, rates, pricing_tables, minimum_billing=0.0):
+        """Equivalente incremental de `run_simulation`."""
+        pricing_tables = compile_pricing_tables(pricing_tables)
+        scenario = {
+            "total_leads": np.asarray(total_leads, dtype=float),
+            "response": np.asarray(rates["response"], dtype=float),
+            "qualification": np.asarray(rates["qualification"], dtype=float),
+            "booking": np.asarray(rates["booking"], dtype=float),
+        }
+        counts, costs = self._evaluate_components(scenario, pricing_tables, 1)
+        results = _assemble_results(
+            scenario["total_leads"],
+            counts,
+            costs,
+            np.asarray(minimum_billing, dtype=float),
+            np.asarray(1.0),
+        )
+        count("simulations")
+        return {key: float(value) for key, value in results.items()}
+
+    def sweep(
+        self,
+        axes,
+        total_leads,
+        rates,
+        pricing_tables,
+        minimum_billing=0.0,
+        price_multiplier=1.0,
+    ):
+        """Equivalente incremental de `run_sweep`."""
+        pricing_tables = compile_pricing_tables(pricing_tables)
+        coords, scenario = open_grid(
+            axes, total_leads, rates, minimum_billing, price_multiplier
+        )
+        scenario = {
+            name: np.asarray(value, dtype=float) for name, value in scenario.items()
+        }
+        grid_shape = tuple(values.size for values in coords.values())
+
+        counts, costs = self._evaluate_components(
+            scenario, pricing_tables, int(np.prod(grid_shape))
+        )
+        results = _assemble_results(
+            scenario["total_leads"],
+            counts,
+            costs,
+            scenario["minimum_billing"],
+            scenario["price_multiplier"],
+        )
+        data = {
+            key: np.broadcast_to(value, grid_shape) for key, value in results.items()
+        }
+        count("simulations", int(np.prod(grid_shape)))
+        return SweepResult(dims=tuple(axes), coords=coords, data=data)
+
+    def stats(self):
+        """Componentes calculados, evitados e o estado da memória interna."""
+        with self._lock:
+            return {
+                "evaluated": self.evaluated,
+                "skipped": self.skipped,
+                "components": self._components.stats(),
+            }
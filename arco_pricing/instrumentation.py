@@ -0,0 +1,156 @@
+"""
+Instrumentação de uma execução: intervalos de tempo e contadores.
+
+Um `RerunProfiler` fica ativo em uma variável de contexto durante a
+execução que ele mede. As funções do motor chamam `span` e `count`
+diretamente; sem profiler ativo elas não fazem nada além de uma consulta à
+variável, então o custo no caminho quente é desprezível. Trabalhos em
+outras threads (pré-cálculo em segundo plano, processos do Monte Carlo em
+fluxo) não herdam o contexto e não entram na medição.
+"""
+
+import contextvars
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_ACTIVE_PROFILER = contextvars.ContextVar("arco_pricing_profiler", default=None)
+
+
+class RerunProfiler:
+    """
+    Intervalos (`spans`: nome, profundidade, início e duração em ms, na
+    ordem em que terminam) e contadores (`counters`) de uma execução.
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    def add_span(self, name, started, ended=None, depth=None):
+        """Registra um intervalo já medido (`started`/`ended` de `perf_counter`)."""
+        ended = time.perf_counter() if ended is None else ended
+        with self._lock:
+            self.spans.append(
+                {
+                    "name": name,
+                    "depth": self._depth if depth is None else depth,
+                    "start_ms": (started - self.started) * 1000,
+                    "duration_ms": (ended - started) * 1000,
+                }
+            )
+
+    @contextmanager
+    def span(self, name):
+        depth = self._depth
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth = depth
+            self.add_span(name, started, depth=depth)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def totals(self):
+        """Chamadas e tempo total de cada intervalo, do mais lento ao mais rápido."""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                entry = totals.setdefault(span["name"], {"calls": 0, "total_ms": 0.0})
+                entry["calls"] += 1
+                entry["total_ms"] += span["duration_ms"]
+        return dict(
+            sorted(totals.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        )
+
+    def record(self, **extra):
+        """Registro da execução, serializável em JSON."""
+        with self._lock:
+            return {
+                "timestamp": self.timestamp,
+                "label": self.label,
+                "elapsed_ms": self.elapsed_ms,
+                "counters": dict(self.counters),
+                "spans": list(self.spans),
+                **extra,
+            }
+
+    def write_jsonl(self, path, **extra):
+        """Acrescenta o registro da execução como uma linha JSON em `path`."""
+        line = json.dumps(self.record(**extra), ensure_ascii=False, default=str)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+
+def active_profiler():
+    """Profiler ativo no contexto atual, ou None."""
+    return _ACTIVE_PROFILER.get()
+
+
+def activate(profiler):
+    """Ativa `profiler` (ou nenhum, com None) no contexto atual."""
+    _ACTIVE_PROFILER.set(profiler)
+
+
+@contextmanager
+def profiling(profiler):
+    """Ativa `profiler` só dentro do bloco `with`."""
+    token = _ACTIVE_PROFILER.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _ACTIVE_PROFILER.reset(token)
+
+
+def span(name):
+    """Intervalo `name` no profiler ativo; sem profiler, um bloco vazio."""
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is None:
+        return nullcontext()
+    return profiler.span(name)
+
+
+def add_span(name, started):
+    """
+    Intervalo `name` de `started` (`time.perf_counter()`) até agora no
+    profiler ativo, para trechos longos demais para um bloco `with`.
+    """
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is not None:
+        profiler.add_span(name, started)
+
+
+def count(name, amount=1):
+    """Soma `amount` ao contador `name` do profiler ativo, se houver."""
+    profiler = _ACTIVE_PROFILER.get()
+    if profiler is not None:
+        profiler.count(name, amount)
+
+
+def timed(function):
+    """Decorador: cada chamada vira um intervalo com o nome da função."""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        profiler = _ACTIVE_PROFILER.get()
+        if profiler is None:
+            return function(*args, **kwargs)
+        with profiler.span(function.__name__):
+            return function(*args, **kwargs)
+
+    return wrapper
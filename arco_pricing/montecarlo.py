@@ -0,0 +1,164 @@
+"""
+Simulação de Monte Carlo do funil de prospecção.
+
+`run_simulation` usa os valores esperados de cada etapa. Aqui cada etapa é
+sorteada como uma binomial encadeada (respostas entre os leads, qualificados
+entre as respostas, agendamentos entre os qualificados), para todas as
+tentativas de uma vez, e os custos passam pelas tabelas escalonadas em bloco.
+O resultado mostra quanto a fatura de um mês pode variar em torno do esperado.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .instrumentation import timed
+from .simulation import COMPONENT_TABLES, _assemble_results, _component_cost
+from .tiers import compile_pricing_tables
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+
+@dataclass(frozen=True)
+class MonteCarloResult:
+    """
+    Amostras de uma simulação de Monte Carlo: `samples` tem as mesmas chaves
+    de `run_simulation`, cada uma com um array somente-leitura de uma posição
+    por tentativa. `seed` é a entropia usada, suficiente para reproduzir o
+    sorteio mesmo quando nenhuma semente foi informada.
+    """
+
+    trials: int
+    seed: int
+    minimum_billing: float
+    samples: dict
+
+    def __getitem__(self, key):
+        return self.samples[key]
+
+    def cost_percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """Percentis do custo total, ex.: {5: P5, 50: P50, 95: P95}."""
+        values = np.percentile(self.samples["total_cost"], percentiles)
+        return dict(zip(percentiles, values.tolist()))
+
+    @property
+    def minimum_billing_probability(self):
+        """Fração das tentativas em que o consumo mínimo é cobrado."""
+        applied = self.samples["calculated_cost"] < self.minimum_billing
+        return float(np.mean(applied))
+
+    @property
+    def no_booking_probability(self):
+        """Fração das tentativas sem nenhuma reunião agendada (CPA indefinido)."""
+        return float(np.mean(self.samples["num_booked"] == 0))
+
+    def cpa_percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """
+        Percentis do CPA entre as tentativas com ao menos um agendamento
+        (NaN se nenhuma tentativa teve agendamentos).
+        """
+        cpa = self.samples["cpa"][self.samples["num_booked"] > 0]
+        if cpa.size == 0:
+            return dict.fromkeys(percentiles, np.nan)
+        return dict(zip(percentiles, np.percentile(cpa, percentiles).tolist()))
+
+    def probability_exceeding(self, budget):
+        """Fração das tentativas com custo total acima de `budget`."""
+        return float(np.mean(self.samples["total_cost"] > budget))
+
+    def cost_histogram(self, bins=40):
+        """Fração das tentativas em cada classe de custo total e os limites."""
+        weights = np.full(self.trials, 1.0 / self.trials)
+        return np.histogram(self.samples["total_cost"], bins=bins, weights=weights)
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        """Resumo com percentis de custo e CPA, médias e probabilidades."""
+        return {
+            "trials": self.trials,
+            "seed": self.seed,
+            "mean_cost": float(np.mean(self.samples["total_cost"])),
+            "cost_percentiles": self.cost_percentiles(percentiles),
+            "minimum_billing_probability": self.minimum_billing_probability,
+            "cpa_percentiles": self.cpa_percentiles(percentiles),
+            "no_booking_probability": self.no_booking_probability,
+        }
+
+
+def whole_leads(total_leads):
+    """Converte `total_leads` em inteiro, exigido pelos modelos binomiais."""
+    leads = int(total_leads)
+    if leads != total_leads or leads < 0:
+        raise ValueError(
+            f"total_leads precisa ser um inteiro não negativo (recebido: {total_leads})"
+        )
+    return leads
+
+
+def sample_funnel_counts(total_leads, rates, trials, rng):
+    """
+    Sorteia as contagens do funil para `trials` tentativas com binomiais
+    encadeadas. `total_leads` precisa ser um número inteiro de leads.
+    """
+    leads = whole_leads(total_leads)
+    num_replies = rng.binomial(leads, rates["response"], size=trials)
+    num_qualified = rng.binomial(num_replies, rates["qualification"])
+    num_booked = rng.binomial(num_qualified, rates["booking"])
+    return {
+        "num_no_replies": (leads - num_replies).astype(float),
+        "num_replies": num_replies.astype(float),
+        "num_qualified": num_qualified.astype(float),
+        "num_booked": num_booked.astype(float),
+    }
+
+
+def price_samples(total_leads, counts, pricing_tables, minimum_billing=0.0):
+    """
+    Passa contagens sorteadas pelas tabelas compiladas em bloco e retorna o
+    dicionário de resultados de `run_simulation_batch`, uma posição por
+    tentativa. `total_leads` pode ser um array compatível com as contagens.
+    """
+    costs = {
+        component: _component_cost(component, counts, pricing_tables)
+        for component in COMPONENT_TABLES
+    }
+    return _assemble_results(
+        np.asarray(total_leads, dtype=float),
+        counts,
+        costs,
+        np.asarray(minimum_billing, dtype=float),
+        np.asarray(1.0),
+    )
+
+
+@timed
+def run_monte_carlo(
+    total_leads,
+    rates,
+    pricing_tables,
+    minimum_billing=0.0,
+    trials=100_000,
+    seed=None,
+):
+    """
+    Simula `trials` meses do mesmo cenário com contagens aleatórias e
+    retorna um `MonteCarloResult`. A mesma `seed` reproduz exatamente as
+    mesmas amostras.
+    """
+    pricing_tables = compile_pricing_tables(pricing_tables)
+    seed_sequence = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(seed_sequence)
+
+    samples = price_samples(
+        total_leads,
+        sample_funnel_counts(total_leads, rates, trials, rng),
+        pricing_tables,
+        minimum_billing,
+    )
+    for values in samples.values():
+        values.flags.writeable = False
+    return MonteCarloResult(
+        trials=trials,
+        seed=seed_sequence.entropy,
+        minimum_billing=float(minimum_billing),
+        samples=samples,
+    )
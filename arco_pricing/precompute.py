@@ -0,0 +1,243 @@
+"""
+Pré-cálculo da grade dos sliders em arquivos mapeados em memória.
+
+O domínio dos sliders é finito (leads de 0 a 3.500 de 100 em 100 e taxas de
+0 a 100% de 0,5 em 0,5). O job offline avalia essa grade para uma tabela de
+preços e grava cada componente só na subgrade das entradas de que depende
+(`COMPONENT_DEPENDENCIES`): respostas e seus custos em (leads, resposta),
+qualificados e seu custo em (leads, resposta, qualificação). O custo dos
+agendamentos ocuparia a grade 4D inteira (~2,3 GB em float64), então ele é
+calculado na consulta a partir dos qualificados gravados, com uma busca na
+tabela de agendamentos compilada (também gravada nos metadados).
+
+Cada consulta lê poucos valores dos arquivos e aplica o consumo mínimo, com
+tempo constante e o mesmo resultado bit a bit da simulação ao vivo.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+from .cache import LRUCache, pricing_fingerprint
+from .simulation import _component_cost, _funnel_counts
+from .tiers import TierSchedule, compile_pricing_tables
+
+FORMAT_VERSION = 1
+METADATA_FILE = "metadata.json"
+
+# Domínio dos sliders do app: (início, fim, passo) de cada eixo, em unidades
+# do slider (taxas em %), e os valores iniciais, que podem ficar fora do passo.
+# Devem acompanhar os sliders de arco_prices.py
+SLIDER_AXES = {
+    "total_leads": (0, 3500, 100),
+    "response": (0.0, 100.0, 0.5),
+    "qualification": (0.0, 100.0, 0.5),
+    "booking": (0.0, 100.0, 0.5),
+}
+SLIDER_DEFAULTS = {
+    "total_leads": 1000,
+    "response": 46.0,
+    "qualification": 28.3,
+    "booking": 23.1,
+}
+RATE_AXES = ("response", "qualification", "booking")
+
+# Arrays gravados e os eixos de cada um
+CUBE_ARRAYS = {
+    "num_replies": ("total_leads", "response"),
+    "cost_no_reply": ("total_leads", "response"),
+    "cost_replies": ("total_leads", "response"),
+    "num_qualified": ("total_leads", "response", "qualification"),
+    "cost_qualified": ("total_leads", "response", "qualification"),
+}
+
+
+def slider_values(start, stop, step, extra=()):
+    """Posições de um slider (em unidades do slider) mais valores avulsos."""
+    count = int(round((stop - start) / step)) + 1
+    values = start + np.arange(count) * step
+    return sorted(set(values.tolist()) | {float(value) for value in extra})
+
+
+def axis_values(name, values):
+    """
+    Valores de um eixo como o app os recebe: as taxas são divididas por 100,
+    na mesma conta do app, para que a consulta compare valores idênticos.
+    """
+    values = np.asarray(values, dtype=float)
+    return values / 100.0 if name in RATE_AXES else values
+
+
+def build_cube(pricing_tables, directory, axes=None):
+    """
+    Avalia a grade `axes` (listas de valores em unidades do slider; padrão:
+    `SLIDER_AXES` mais `SLIDER_DEFAULTS`) para as tabelas informadas e grava
+    os arrays `.npy` e os metadados em `directory`. Retorna o caminho do
+    arquivo de metadados.
+    """
+    axes = {
+        **{
+            name: slider_values(*spec, extra=[SLIDER_DEFAULTS[name]])
+            for name, spec in SLIDER_AXES.items()
+        },
+        **(axes or {}),
+    }
+    pricing_tables = compile_pricing_tables(pricing_tables)
+    coords = {name: axis_values(name, values) for name, values in axes.items()}
+
+    # Grade aberta: cada componente sai no formato mínimo das suas entradas
+    counts = _funnel_counts(
+        coords["total_leads"][:, None, None],
+        coords["response"][None, :, None],
+        coords["qualification"][None, None, :],
+        np.zeros(1),
+    )
+    arrays = {
+        "num_replies": counts["num_replies"],
+        "num_qualified": counts["num_qualified"],
+    }
+    for component in ("cost_no_reply", "cost_replies", "cost_qualified"):
+        arrays[component] = _component_cost(component, counts, pricing_tables)
+    # Componentes que não dependem da qualificação perdem esse eixo
+    arrays = {
+        name: values.reshape(values.shape[: len(CUBE_ARRAYS[name])])
+        for name, values in arrays.items()
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(values))
+
+    booked = pricing_tables["booked"]
+    metadata = {
+        "format_version": FORMAT_VERSION,
+        "pricing_fingerprint": pricing_fingerprint(pricing_tables),
+        "axes": {
+            name: [float(value) for value in values] for name, values in axes.items()
+        },
+        "arrays": {name: list(dims) for name, dims in CUBE_ARRAYS.items()},
+        "no_reply": pricing_tables["no_reply"],
+        "booked": {
+            "breakpoints": booked.breakpoints,
+            "cumulative": booked.cumulative,
+            "slopes": booked.slopes,
+        },
+    }
+    # Metadados por último: um cubo só é válido depois de todos os arrays
+    path = os.path.join(directory, METADATA_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(metadata, file, indent=2)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+class ResultCube:
+    """
+    Cubo pré-calculado aberto com `np.load(mmap_mode="r")`. `lookup` retorna
+    o resultado de `run_simulation` para um ponto da grade, ou None se o
+    ponto está fora dela (o chamador recalcula ao vivo).
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, METADATA_FILE), encoding="utf-8") as file:
+            metadata = json.load(file)
+        if metadata["format_version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"Versão de cubo não suportada: {metadata['format_version']}"
+            )
+        self.directory = directory
+        self.pricing_fingerprint = metadata["pricing_fingerprint"]
+        self.coords = {
+            name: axis_values(name, values) for name, values in metadata["axes"].items()
+        }
+        self.arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in metadata["arrays"]
+        }
+        # Posição de cada valor de cada eixo: a consulta é um acesso a dict
+        self._positions = {
+            name: {value: k for k, value in enumerate(values.tolist())}
+            for name, values in self.coords.items()
+        }
+        self.booked = TierSchedule(
+            **{key: tuple(values) for key, values in metadata["booked"].items()}
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _index(self, axis, value):
+        """Posição exata de `value` no eixo, ou None se não é um ponto da grade."""
+        return self._positions[axis].get(float(value))
+
+    def lookup(self, total_leads, rates, minimum_billing=0.0):
+        indices = [self._index("total_leads", total_leads)]
+        indices += [self._index(axis, rates[axis]) for axis in RATE_AXES]
+        with self._lock:
+            if None in indices:
+                self.misses += 1
+                return None
+            self.hits += 1
+        leads_index, response_index, qualification_index, _ = indices
+
+        total_leads = float(self.coords["total_leads"][leads_index])
+        num_replies = float(self.arrays["num_replies"][leads_index, response_index])
+        num_qualified = float(
+            self.arrays["num_qualified"][
+                leads_index, response_index, qualification_index
+            ]
+        )
+        num_booked = num_qualified * rates["booking"]
+
+        cell = (leads_index, response_index)
+        cost_no_reply = float(self.arrays["cost_no_reply"][cell])
+        cost_replies = float(self.arrays["cost_replies"][cell])
+        cost_qualified = float(
+            self.arrays["cost_qualified"][
+                leads_index, response_index, qualification_index
+            ]
+        )
+        cost_booked = self.booked.cost(num_booked)
+
+        calculated_cost = cost_no_reply + cost_replies + cost_qualified + cost_booked
+        total_cost = max(calculated_cost, minimum_billing)
+        return {
+            "total_leads": total_leads,
+            "num_no_replies": total_leads - num_replies,
+            "num_replies": num_replies,
+            "num_qualified": num_qualified,
+            "num_booked": num_booked,
+            "cost_no_reply": cost_no_reply,
+            "cost_replies": cost_replies,
+            "cost_qualified": cost_qualified,
+            "cost_booked": cost_booked,
+            "calculated_cost": calculated_cost,
+            "total_cost": total_cost,
+            "cpl": total_cost / total_leads if total_leads > 0 else 0,
+            "cpa": total_cost / num_booked if num_booked > 0 else 0,
+        }
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+# Cubos já abertos, pela pasta e data de modificação dos metadados
+_OPEN_CUBES = LRUCache(maxsize=4)
+
+
+def open_cube(directory):
+    """
+    Abre (uma vez por processo) o cubo em `directory`, ou retorna None se a
+    pasta não tem um cubo gravado.
+    """
+    path = os.path.join(directory, METADATA_FILE)
+    try:
+        modified = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _OPEN_CUBES.get_or_compute(
+        (os.path.abspath(directory), modified), lambda: ResultCube(directory)
+    )
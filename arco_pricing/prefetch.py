@@ -0,0 +1,143 @@
+"""
+Pré-cálculo em segundo plano dos próximos resultados prováveis.
+
+Cada sessão tem um `Prefetcher`; os trabalhos rodam em um pool de threads
+que pode ser compartilhado entre sessões (`executor`). Depois de cada
+execução, o app agenda os artefatos que o usuário provavelmente vai
+pedir em seguida (outras abas, posições vizinhas dos sliders), cada um com
+uma chave; a próxima execução que precisar de uma dessas chaves usa o
+resultado pronto (ou espera o cálculo que já começou). Cada agendamento
+abre uma nova geração: os trabalhos das gerações anteriores que ainda não
+começaram são cancelados.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+
+class Prefetcher:
+    """
+    Trabalhos em segundo plano por chave, com cancelamento por geração.
+    Guarda até `maxsize` resultados (os mais antigos são descartados). Sem
+    `executor`, cria um pool próprio de `max_workers` threads, encerrado por
+    `shutdown`; um `executor` compartilhado não é encerrado aqui.
+    """
+
+    def __init__(self, max_workers=1, maxsize=64, executor=None):
+        self.maxsize = maxsize
+        self._owns_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="prefetch"
+            )
+        self._executor = executor
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.served = 0
+
+    def _run(self, generation, compute):
+        # Trabalhos de uma geração antiga que chegam a começar não calculam
+        if generation != self.generation:
+            with self._lock:
+                self.cancelled += 1
+            raise CancelledError
+        try:
+            value = compute()
+        except Exception:
+            # Cenários que a página também recusaria (ex.: distribuição
+            # exata grande demais): a execução recalcula e mostra o erro
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.completed += 1
+        return value
+
+    def _cancel_pending(self):
+        """Abre uma nova geração e cancela o que ainda não começou (com lock)."""
+        self.generation += 1
+        for future in self._futures.values():
+            if future.cancel():
+                self.cancelled += 1
+        self._futures = OrderedDict(
+            (key, future)
+            for key, future in self._futures.items()
+            if not future.cancelled()
+        )
+
+    def cancel_pending(self):
+        """
+        Cancela os trabalhos agendados que ainda não começaram. O que já está
+        em cálculo termina e continua disponível para `take`.
+        """
+        with self._lock:
+            self._cancel_pending()
+
+    def schedule(self, jobs):
+        """
+        Abre uma nova geração e agenda `jobs` ({chave: função sem
+        argumentos}), na ordem, exceto as chaves já agendadas ou prontas.
+        """
+        with self._lock:
+            self._cancel_pending()
+            generation = self.generation
+            for key, compute in jobs.items():
+                if key in self._futures:
+                    self._futures.move_to_end(key)
+                    continue
+                self._futures[key] = self._executor.submit(
+                    self._run, generation, compute
+                )
+                self.submitted += 1
+            while len(self._futures) > self.maxsize:
+                _, future = self._futures.popitem(last=False)
+                if future.cancel():
+                    self.cancelled += 1
+
+    def take(self, key):
+        """
+        `(True, resultado)` se `key` já foi calculada ou está em cálculo (e
+        espera terminar), ou `(False, None)` se não foi agendada, ainda não
+        começou (o trabalho é cancelado) ou falhou.
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                return False, None
+            if future.cancel():
+                del self._futures[key]
+                self.cancelled += 1
+                return False, None
+        try:
+            value = future.result()
+        except Exception:
+            with self._lock:
+                self._futures.pop(key, None)
+            return False, None
+        with self._lock:
+            self.served += 1
+        return True, value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "generation": self.generation,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "served": self.served,
+                "stored": len(self._futures),
+            }
+
+    def shutdown(self):
+        """Cancela o que não começou e encerra o pool, se for próprio."""
+        self.cancel_pending()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,174 @@
+"""
+Simulação do funil de prospecção e cálculo de custos.
+"""
+
+import numpy as np
+
+from .instrumentation import count
+from .tiers import calculate_tiered_cost, compile_pricing_tables
+
+
+def run_simulation(total_leads, rates, pricing_tables, minimum_billing=0.0):
+    """
+    Executa uma simulação completa para um dado cenário.
+    As tabelas podem ser passadas já compiladas com `compile_pricing_tables`.
+    """
+    pricing_tables = compile_pricing_tables(pricing_tables)
+
+    # 1. Calcular a quantidade de eventos em cada etapa do funil
+    num_replies = total_leads * rates["response"]
+    num_no_replies = total_leads - num_replies
+    num_qualified = num_replies * rates["qualification"]
+    num_booked = num_qualified * rates["booking"]
+
+    # 2. Calcular o custo de cada componente
+    # Custo base: leads que não responderam
+    cost_no_reply = num_no_replies * pricing_tables["no_reply"]
+
+    # Custo dos leads que responderam (substitui o custo de R$0,20)
+    cost_replies = calculate_tiered_cost(num_replies, pricing_tables["leads"])
+
+    # Custos adicionais para eventos de sucesso
+    cost_qualified = calculate_tiered_cost(num_qualified, pricing_tables["qualified"])
+    cost_booked = calculate_tiered_cost(num_booked, pricing_tables["booked"])
+
+    # 3. Calcular o custo total e métricas
+    calculated_cost = cost_no_reply + cost_replies + cost_qualified + cost_booked
+
+    # Aplicar consumo mínimo
+    total_cost = max(calculated_cost, minimum_billing)
+
+    cpl = total_cost / total_leads if total_leads > 0 else 0
+    cpa = total_cost / num_booked if num_booked > 0 else 0
+
+    count("simulations")
+    return {
+        "total_leads": total_leads,
+        "num_no_replies": num_no_replies,
+        "num_replies": num_replies,
+        "num_qualified": num_qualified,
+        "num_booked": num_booked,
+        "cost_no_reply": cost_no_reply,
+        "cost_replies": cost_replies,
+        "cost_qualified": cost_qualified,
+        "cost_booked": cost_booked,
+        "calculated_cost": calculated_cost,
+        "total_cost": total_cost,
+        "cpl": cpl,
+        "cpa": cpa,
+    }
+
+
+# Entradas do cenário de que cada componente de custo depende, a tabela de
+# preços que ele usa e a quantidade do funil sobre a qual a tabela é aplicada
+COMPONENT_DEPENDENCIES = {
+    "cost_no_reply": ("total_leads", "response"),
+    "cost_replies": ("total_leads", "response"),
+    "cost_qualified": ("total_leads", "response", "qualification"),
+    "cost_booked": ("total_leads", "response", "qualification", "booking"),
+}
+COMPONENT_TABLES = {
+    "cost_no_reply": ("no_reply", "num_no_replies"),
+    "cost_replies": ("leads", "num_replies"),
+    "cost_qualified": ("qualified", "num_qualified"),
+    "cost_booked": ("booked", "num_booked"),
+}
+
+
+def _funnel_counts(total_leads, response, qualification, booking):
+    """Quantidade de eventos em cada etapa do funil (escalares ou arrays)."""
+    num_replies = total_leads * response
+    num_no_replies = total_leads - num_replies
+    num_qualified = num_replies * qualification
+    num_booked = num_qualified * booking
+    return {
+        "num_no_replies": num_no_replies,
+        "num_replies": num_replies,
+        "num_qualified": num_qualified,
+        "num_booked": num_booked,
+    }
+
+
+def _component_cost(component, counts, pricing_tables):
+    """Custo de um componente, avaliado só no formato de suas entradas."""
+    table, quantity = COMPONENT_TABLES[component]
+    if table == "no_reply":
+        return counts[quantity] * pricing_tables["no_reply"]
+    return pricing_tables[table].evaluate(counts[quantity])
+
+
+def _assemble_results(total_leads, counts, costs, minimum_billing, price_multiplier):
+    """
+    Junta contagens e custos por componente no dicionário de resultados de
+    `run_simulation_batch`, aplicando multiplicador de preço e consumo mínimo.
+    """
+    cost_no_reply = costs["cost_no_reply"]
+    cost_replies = costs["cost_replies"]
+    cost_qualified = costs["cost_qualified"]
+    cost_booked = costs["cost_booked"]
+    if np.any(price_multiplier != 1.0):
+        cost_no_reply = cost_no_reply * price_multiplier
+        cost_replies = cost_replies * price_multiplier
+        cost_qualified = cost_qualified * price_multiplier
+        cost_booked = cost_booked * price_multiplier
+
+    calculated_cost = cost_no_reply + cost_replies + cost_qualified + cost_booked
+    total_cost = np.maximum(calculated_cost, minimum_billing)
+
+    num_booked = counts["num_booked"]
+    shape = np.broadcast_shapes(total_cost.shape, num_booked.shape)
+    cpl = np.divide(total_cost, total_leads, out=np.zeros(shape), where=total_leads > 0)
+    cpa = np.divide(total_cost, num_booked, out=np.zeros(shape), where=num_booked > 0)
+
+    results = {
+        "total_leads": total_leads,
+        "num_no_replies": counts["num_no_replies"],
+        "num_replies": counts["num_replies"],
+        "num_qualified": counts["num_qualified"],
+        "num_booked": num_booked,
+        "cost_no_reply": cost_no_reply,
+        "cost_replies": cost_replies,
+        "cost_qualified": cost_qualified,
+        "cost_booked": cost_booked,
+        "calculated_cost": calculated_cost,
+        "total_cost": total_cost,
+        "cpl": cpl,
+        "cpa": cpa,
+    }
+    return {key: np.broadcast_to(value, shape) for key, value in results.items()}
+
+
+def run_simulation_batch(
+    total_leads, rates, pricing_tables, minimum_billing=0.0, price_multiplier=1.0
+):
+    """
+    Versão vetorizada de `run_simulation` para muitos cenários de uma vez.
+
+    `total_leads`, cada taxa em `rates`, `minimum_billing` e `price_multiplier`
+    (fator aplicado a todos os preços) podem ser escalares ou arrays NumPy com
+    formatos compatíveis (broadcasting). Retorna um dicionário com as mesmas
+    chaves de `run_simulation`, cada uma com um array no formato combinado das
+    entradas e valores idênticos aos da versão escalar.
+    """
+    pricing_tables = compile_pricing_tables(pricing_tables)
+
+    total_leads = np.asarray(total_leads, dtype=float)
+    counts = _funnel_counts(
+        total_leads,
+        np.asarray(rates["response"], dtype=float),
+        np.asarray(rates["qualification"], dtype=float),
+        np.asarray(rates["booking"], dtype=float),
+    )
+    costs = {
+        component: _component_cost(component, counts, pricing_tables)
+        for component in COMPONENT_TABLES
+    }
+    results = _assemble_results(
+        total_leads,
+        counts,
+        costs,
+        np.asarray(minimum_billing, dtype=float),
+        np.asarray(price_multiplier, dtype=float),
+    )
+    count("simulations", results["total_cost"].size)
+    return results
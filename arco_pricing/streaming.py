@@ -0,0 +1,308 @@
+"""
+Monte Carlo em fluxo para muitas tentativas com memória constante.
+
+As tentativas são geradas em blocos, cada um com um gerador independente
+derivado da mesma semente (`SeedSequence.spawn`), e podem ser distribuídas
+entre processos. Cada bloco é resumido em esboços combináveis — momentos
+(média e variância) e um histograma de limites fixos — e só os esboços são
+guardados, então a memória não depende do número de tentativas.
+"""
+
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from .montecarlo import DEFAULT_PERCENTILES, price_samples, sample_funnel_counts
+from .tiers import compile_pricing_tables
+
+# Classes do histograma de custos (resolução = faixa do bloco piloto / classes)
+HISTOGRAM_BINS = 4096
+
+
+@dataclass(frozen=True)
+class RunningMoments:
+    """Contagem, média, soma dos quadrados dos desvios, mínimo e máximo."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return cls()
+        mean = float(values.mean())
+        return cls(
+            count=int(values.size),
+            mean=mean,
+            m2=float(np.sum((values - mean) ** 2)),
+            minimum=float(values.min()),
+            maximum=float(values.max()),
+        )
+
+    def merge(self, other):
+        """Combina dois esboços (fórmula de Chan para a variância)."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        return RunningMoments(
+            count=count,
+            mean=self.mean + delta * other.count / count,
+            m2=self.m2 + other.m2 + delta**2 * self.count * other.count / count,
+            minimum=min(self.minimum, other.minimum),
+            maximum=max(self.maximum, other.maximum),
+        )
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+@dataclass(frozen=True)
+class FixedHistogram:
+    """
+    Histograma com limites fixos (`edges`), mais as contagens abaixo do
+    primeiro e acima do último limite. Dois histogramas com os mesmos limites
+    se combinam somando as contagens.
+    """
+
+    edges: np.ndarray
+    counts: np.ndarray
+    underflow: int = 0
+    overflow: int = 0
+
+    @classmethod
+    def from_values(cls, values, edges):
+        values = np.asarray(values, dtype=float)
+        counts, _ = np.histogram(values, bins=edges)
+        return cls(
+            edges=edges,
+            counts=counts,
+            underflow=int(np.count_nonzero(values < edges[0])),
+            overflow=int(np.count_nonzero(values > edges[-1])),
+        )
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError(
+                "Histogramas com limites diferentes não podem ser combinados"
+            )
+        return FixedHistogram(
+            edges=self.edges,
+            counts=self.counts + other.counts,
+            underflow=self.underflow + other.underflow,
+            overflow=self.overflow + other.overflow,
+        )
+
+    @property
+    def total(self):
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+    def quantile(self, level):
+        """
+        Quantil aproximado (interpolação linear dentro da classe). Retorna
+        NaN se o quantil cai abaixo ou acima dos limites do histograma.
+        """
+        target = level * self.total
+        if target < self.underflow or target > self.total - self.overflow:
+            return math.nan
+        cumulative = self.underflow + np.cumsum(self.counts)
+        k = int(np.searchsorted(cumulative, target, side="left"))
+        k = min(k, self.counts.size - 1)
+        before = cumulative[k] - self.counts[k]
+        fraction = (target - before) / self.counts[k] if self.counts[k] else 0.0
+        return float(self.edges[k] + fraction * (self.edges[k + 1] - self.edges[k]))
+
+
+@dataclass(frozen=True)
+class StreamingMonteCarloResult:
+    """
+    Esboços combinados de todos os blocos e a vazão medida. `workers` é o
+    número de processos que de fato executaram blocos.
+    """
+
+    trials: int
+    moments: RunningMoments
+    histogram: FixedHistogram
+    minimum_billing: float
+    minimum_billing_hits: int
+    workers: int
+    elapsed: float
+
+    @property
+    def mean(self):
+        return self.moments.mean
+
+    @property
+    def std(self):
+        return self.moments.std
+
+    @property
+    def minimum_billing_probability(self):
+        return self.minimum_billing_hits / self.trials if self.trials else 0.0
+
+    def cost_percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """
+        Percentis do custo total. Níveis dentro da massa do consumo mínimo
+        retornam o próprio mínimo; os demais vêm do histograma.
+        """
+        result = {}
+        for percentile in percentiles:
+            level = percentile / 100
+            if level <= self.minimum_billing_probability:
+                result[percentile] = self.minimum_billing
+            else:
+                result[percentile] = self.histogram.quantile(level)
+        return result
+
+    @property
+    def trials_per_second(self):
+        return self.trials / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def trials_per_second_per_core(self):
+        return self.trials_per_second / self.workers
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        """Resumo com custo, consumo mínimo e vazão."""
+        return {
+            "trials": self.trials,
+            "mean_cost": self.mean,
+            "std_cost": self.std,
+            "cost_percentiles": self.cost_percentiles(percentiles),
+            "minimum_billing_probability": self.minimum_billing_probability,
+            "histogram_resolution": float(np.diff(self.histogram.edges[:2])[0]),
+            "out_of_range": self.histogram.underflow + self.histogram.overflow,
+            "workers": self.workers,
+            "elapsed": self.elapsed,
+            "trials_per_second": self.trials_per_second,
+            "trials_per_second_per_core": self.trials_per_second_per_core,
+        }
+
+
+def _chunk_costs(total_leads, rates, pricing_tables, minimum_billing, trials, seed):
+    rng = np.random.default_rng(seed)
+    counts = sample_funnel_counts(total_leads, rates, trials, rng)
+    samples = price_samples(total_leads, counts, pricing_tables, minimum_billing)
+    hits = int(np.count_nonzero(samples["calculated_cost"] < minimum_billing))
+    return samples["total_cost"], hits
+
+
+def _run_chunk(task):
+    """Executa um bloco e devolve só os seus esboços (roda nos processos)."""
+    total_leads, rates, pricing_tables, minimum_billing, trials, seed, edges = task
+    costs, hits = _chunk_costs(
+        total_leads, rates, pricing_tables, minimum_billing, trials, seed
+    )
+    return (
+        RunningMoments.from_values(costs),
+        FixedHistogram.from_values(costs, edges),
+        hits,
+    )
+
+
+def _histogram_edges(pilot_costs, bins):
+    """Limites do histograma a partir do bloco piloto, com folga nas caudas."""
+    low, high = float(pilot_costs.min()), float(pilot_costs.max())
+    margin = max(high - low, abs(high) * 1e-3, 1.0)
+    return np.linspace(max(low - margin, 0.0), high + margin, bins + 1)
+
+
+def run_streaming_monte_carlo(
+    total_leads,
+    rates,
+    pricing_tables,
+    minimum_billing=0.0,
+    trials=10_000_000,
+    chunk_size=250_000,
+    workers=None,
+    seed=None,
+    bins=HISTOGRAM_BINS,
+):
+    """
+    Monte Carlo com `trials` tentativas em blocos de `chunk_size`, em até
+    `workers` processos (padrão: todos os núcleos; 1 roda no processo atual).
+
+    O primeiro bloco roda antes dos demais e define a faixa do histograma.
+    Com a mesma `seed` e o mesmo `chunk_size`, o resultado não depende do
+    número de processos.
+    """
+    for name, value in (
+        ("trials", trials),
+        ("chunk_size", chunk_size),
+        ("workers", workers),
+    ):
+        if value is not None and value <= 0:
+            raise ValueError(f"{name} precisa ser positivo (recebido: {value})")
+    pricing_tables = compile_pricing_tables(pricing_tables)
+    workers = workers or os.cpu_count() or 1
+    sizes = [chunk_size] * (trials // chunk_size)
+    if trials % chunk_size:
+        sizes.append(trials % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    # Depois do bloco piloto, mais processos que blocos restantes ficariam
+    # ociosos (e a vazão por núcleo sairia subestimada)
+    workers = min(workers, max(len(sizes) - 1, 1))
+
+    started = time.perf_counter()
+    pilot_costs, hits = _chunk_costs(
+        total_leads, rates, pricing_tables, minimum_billing, sizes[0], seeds[0]
+    )
+    edges = _histogram_edges(pilot_costs, bins)
+    edges.flags.writeable = False
+    moments = RunningMoments.from_values(pilot_costs)
+    histogram = FixedHistogram.from_values(pilot_costs, edges)
+    del pilot_costs
+
+    sketches = [moments, histogram, hits]
+
+    def fold(chunk):
+        chunk_moments, chunk_histogram, chunk_hits = chunk
+        sketches[0] = sketches[0].merge(chunk_moments)
+        sketches[1] = sketches[1].merge(chunk_histogram)
+        sketches[2] += chunk_hits
+
+    tasks = (
+        (total_leads, rates, pricing_tables, minimum_billing, size, chunk_seed, edges)
+        for size, chunk_seed in zip(sizes[1:], seeds[1:])
+    )
+    if workers == 1:
+        for task in tasks:
+            fold(_run_chunk(task))
+    else:
+        # No máximo 2 blocos por processo em andamento; os esboços são
+        # combinados na ordem dos blocos, então o resultado é determinístico
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(_run_chunk, task))
+                if len(pending) >= 2 * workers:
+                    fold(pending.popleft().result())
+            while pending:
+                fold(pending.popleft().result())
+    moments, histogram, hits = sketches
+
+    return StreamingMonteCarloResult(
+        trials=trials,
+        moments=moments,
+        histogram=histogram,
+        minimum_billing=float(minimum_billing),
+        minimum_billing_hits=hits,
+        workers=workers,
+        elapsed=time.perf_counter() - started,
+    )
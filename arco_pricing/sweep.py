@@ -0,0 +1,143 @@
+"""
+Varreduras de sensibilidade sobre grades cartesianas de cenários.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .instrumentation import timed
+from .simulation import run_simulation_batch
+
+# Eixos aceitos por `run_sweep`
+SWEEP_AXES = (
+    "total_leads",
+    "response",
+    "qualification",
+    "booking",
+    "minimum_billing",
+    "price_multiplier",
+)
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    """
+    Resultado de `run_sweep`: um array por métrica (as chaves de
+    `run_simulation`) com eixos nomeados em `dims` e coordenadas em `coords`.
+    """
+
+    dims: tuple
+    coords: dict
+    data: dict
+
+    def __getitem__(self, metric):
+        return self.data[metric]
+
+    def index(self, dim, value):
+        """Posição de `value` nas coordenadas do eixo `dim`."""
+        matches = np.flatnonzero(np.isclose(self.coords[dim], value, rtol=0, atol=1e-9))
+        if matches.size == 0:
+            raise KeyError(f"{value!r} não está no eixo '{dim}'")
+        return int(matches[0])
+
+    def sel(self, **selection):
+        """
+        Seleciona por valor de coordenada. Um escalar remove o eixo do
+        resultado; uma lista de valores mantém o eixo com essas coordenadas.
+        """
+        indexer = []
+        dims = []
+        coords = {}
+        for dim in self.dims:
+            if dim not in selection:
+                indexer.append(slice(None))
+                dims.append(dim)
+                coords[dim] = self.coords[dim]
+            elif np.ndim(selection[dim]) == 0:
+                indexer.append(self.index(dim, selection[dim]))
+            else:
+                positions = [self.index(dim, value) for value in selection[dim]]
+                indexer.append(positions)
+                dims.append(dim)
+                coords[dim] = self.coords[dim][positions]
+
+        # Indexa um eixo por vez para que listas em eixos diferentes formem
+        # uma grade (e não pares de índices, como no fancy indexing do NumPy)
+        data = {}
+        for metric, values in self.data.items():
+            axis = 0
+            for item in indexer:
+                if isinstance(item, int):
+                    values = np.take(values, item, axis=axis)
+                else:
+                    values = values[(slice(None),) * axis + (item,)]
+                    axis += 1
+            data[metric] = values
+        return SweepResult(dims=tuple(dims), coords=coords, data=data)
+
+
+def open_grid(axes, total_leads, rates, minimum_billing=0.0, price_multiplier=1.0):
+    """
+    Monta a grade aberta de uma varredura: retorna as coordenadas de cada eixo
+    e o cenário com cada entrada como escalar (eixo não varrido) ou array com
+    o eixo em sua própria dimensão, pronto para broadcasting.
+    """
+    unknown = set(axes) - set(SWEEP_AXES)
+    if unknown:
+        raise ValueError(f"Eixos desconhecidos: {sorted(unknown)}")
+
+    scenario = {
+        "total_leads": total_leads,
+        "response": rates["response"],
+        "qualification": rates["qualification"],
+        "booking": rates["booking"],
+        "minimum_billing": minimum_billing,
+        "price_multiplier": price_multiplier,
+    }
+
+    coords = {}
+    for position, (dim, values) in enumerate(axes.items()):
+        values = np.array(values, dtype=float)
+        values.flags.writeable = False
+        coords[dim] = values
+        shape = [1] * len(axes)
+        shape[position] = values.size
+        scenario[dim] = values.reshape(shape)
+    return coords, scenario
+
+
+@timed
+def run_sweep(
+    axes,
+    total_leads,
+    rates,
+    pricing_tables,
+    minimum_billing=0.0,
+    price_multiplier=1.0,
+):
+    """
+    Avalia a grade cartesiana de todos os `axes` ({nome: valores}, com nomes
+    de `SWEEP_AXES`) em uma única chamada vetorizada. Os eixos não varridos
+    usam os valores do cenário base informado nos demais argumentos.
+    """
+    # Grade aberta: cada eixo ocupa sua própria dimensão e o broadcasting
+    # do motor vetorizado monta o produto cartesiano
+    coords, scenario = open_grid(
+        axes, total_leads, rates, minimum_billing, price_multiplier
+    )
+
+    results = run_simulation_batch(
+        scenario["total_leads"],
+        {
+            "response": scenario["response"],
+            "qualification": scenario["qualification"],
+            "booking": scenario["booking"],
+        },
+        pricing_tables,
+        scenario["minimum_billing"],
+        scenario["price_multiplier"],
+    )
+    grid_shape = tuple(values.size for values in coords.values())
+    data = {key: np.broadcast_to(value, grid_shape) for key, value in results.items()}
+    return SweepResult(dims=tuple(axes), coords=coords, data=data)
@@ -0,0 +1,260 @@
+"""
+Tabelas de preços escalonadas (tiered pricing) compiladas.
+"""
+
+import bisect
+import dataclasses
+import numbers
+from dataclasses import dataclass
+
+import numpy as np
+
+# 'Máximo' a partir deste valor é tratado como faixa aberta (sem limite)
+OPEN_ENDED_SENTINEL = 99999
+
+
+@dataclass(frozen=True)
+class TierSchedule:
+    """
+    Tabela de preços escalonada compilada (imutável).
+
+    `breakpoints` são os limites ordenados de todas as faixas. No segmento
+    (breakpoints[k], breakpoints[k + 1]] o custo é
+    `cumulative[k] + slopes[k] * (quantidade - breakpoints[k])`, onde
+    `cumulative[k]` é o custo acumulado no limite `breakpoints[k]` e
+    `slopes[k]` é a soma dos preços das faixas abertas no segmento.
+    O último segmento se estende até o infinito.
+    """
+
+    breakpoints: tuple
+    cumulative: tuple
+    slopes: tuple
+
+    def __post_init__(self):
+        # Cópias somente-leitura para a avaliação vetorizada
+        for name in ("breakpoints", "cumulative", "slopes"):
+            values = np.array(getattr(self, name), dtype=float)
+            values.flags.writeable = False
+            object.__setattr__(self, f"_{name}_array", values)
+
+    def cost(self, quantity):
+        """Custo de uma quantidade: busca binária + uma multiplicação-soma."""
+        if quantity == 0 or not self.breakpoints:
+            return 0.0
+        k = bisect.bisect_left(self.breakpoints, quantity) - 1
+        if k < 0:
+            return 0.0
+        return self.cumulative[k] + self.slopes[k] * (quantity - self.breakpoints[k])
+
+    def evaluate(self, quantities):
+        """Versão vetorizada de `cost` para arrays NumPy de quantidades."""
+        quantities = np.asarray(quantities, dtype=float)
+        if not self.breakpoints:
+            return np.zeros_like(quantities)
+        breakpoints = self._breakpoints_array
+        k = np.searchsorted(breakpoints, quantities, side="left") - 1
+        in_range = (k >= 0) & (quantities != 0)
+        k = np.maximum(k, 0)
+        costs = self._cumulative_array[k] + self._slopes_array[k] * (
+            quantities - breakpoints[k]
+        )
+        return np.where(in_range, costs, 0.0)
+
+    def __reduce__(self):
+        # Só os campos vão no pickle; as cópias NumPy são refeitas na carga
+        return (TierSchedule, (self.breakpoints, self.cumulative, self.slopes))
+
+
+PRICING_TABLE_NAMES = ("no_reply", "leads", "qualified", "booked")
+
+
+@dataclass(frozen=True)
+class PricingBook:
+    """
+    Conjunto compilado das quatro tabelas de preços (imutável e hasheável).
+
+    Pode ser compartilhado entre sessões e threads e enviado a processos sem
+    cópias nem travas; `book["leads"]` funciona como no dicionário de tabelas.
+    """
+
+    no_reply: float
+    leads: TierSchedule
+    qualified: TierSchedule
+    booked: TierSchedule
+
+    def __getitem__(self, name):
+        if name not in PRICING_TABLE_NAMES:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def with_tables(self, **tables):
+        """
+        Cópia com as tabelas informadas substituídas (compiladas se preciso);
+        as demais são compartilhadas com este livro. Sem tabelas, retorna
+        o próprio livro.
+        """
+        if not tables:
+            return self
+        if "no_reply" in tables:
+            tables["no_reply"] = float(_no_reply_price(tables["no_reply"]))
+        for name, table in tables.items():
+            if name != "no_reply" and not isinstance(table, TierSchedule):
+                tables[name] = compile_tier_schedule(table)
+        return dataclasses.replace(self, **tables)
+
+
+def _column(table, name):
+    """
+    Valores de uma coluna de uma tabela de preços, seja ela um DataFrame ou
+    uma lista de registros ({"Mínimo": ..., "Máximo": ..., "Valor": ...}).
+    """
+    if isinstance(table, (list, tuple)):
+        return [row.get(name) for row in table]
+    return table[name]
+
+
+def _as_float_array(values):
+    """Converte uma coluna (Series, lista...) em array float, com None -> NaN."""
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _tier_columns(table):
+    """Colunas das faixas completas, com o 'Máximo' das faixas abertas = inf."""
+    mins = _as_float_array(_column(table, "Mínimo"))
+    maxs = _as_float_array(_column(table, "Máximo"))
+    prices = _as_float_array(_column(table, "Valor"))
+
+    complete = ~(np.isnan(mins) | np.isnan(prices))
+    mins, maxs, prices = mins[complete], maxs[complete], prices[complete]
+    maxs = np.where(np.isnan(maxs) | (maxs >= OPEN_ENDED_SENTINEL), np.inf, maxs)
+    return mins, maxs, prices
+
+
+def _format_limit(value):
+    return "∞" if np.isinf(value) else f"{value:,.0f}"
+
+
+def tier_table_warnings(table):
+    """
+    Problemas de uma tabela de faixas que o cálculo não corrige sozinho:
+    tabela sem faixas, linhas incompletas, limites invertidos, preços negativos, faixas fora de
+    ordem, lacunas (quantidades sem preço) e sobreposições (preços somados).
+    """
+    warnings = []
+    incomplete = len(_column(table, "Mínimo")) - len(_tier_columns(table)[0])
+    if incomplete:
+        warnings.append(f"{incomplete} linha(s) sem Mínimo ou Valor ignorada(s).")
+
+    mins, maxs, prices = _tier_columns(table)
+    if not mins.size:
+        warnings.append("Nenhuma faixa preenchida: nenhuma quantidade é cobrada.")
+        return warnings
+    for low, high, price in zip(mins, maxs, prices):
+        label = f"{_format_limit(low)}–{_format_limit(high)}"
+        if low < 0 or high <= low:
+            warnings.append(f"Faixa {label} com limites inválidos.")
+        if price < 0:
+            warnings.append(f"Faixa {label} com preço negativo.")
+    if np.any(np.diff(mins) < 0):
+        warnings.append("Faixas fora de ordem (consideradas pelo Mínimo).")
+
+    order = np.argsort(mins, kind="stable")
+    covered = 0.0
+    for low, high in zip(mins[order], maxs[order]):
+        if low > covered:
+            warnings.append(
+                f"Lacuna entre {_format_limit(covered)} e {_format_limit(low)}: "
+                "essas quantidades não são cobradas."
+            )
+        elif low < covered:
+            warnings.append(
+                f"Sobreposição entre {_format_limit(low)} e "
+                f"{_format_limit(min(covered, high))}: os preços são somados."
+            )
+        covered = max(covered, high)
+    if np.isfinite(covered):
+        warnings.append(
+            f"Nenhuma faixa aberta: acima de {_format_limit(covered)} não há cobrança."
+        )
+    return warnings
+
+
+def normalize_tier_table(table):
+    """
+    Compila uma tabela de faixas (DataFrame ou registros) e lista os seus
+    problemas. Retorna `(TierSchedule, warnings)`; feito uma vez por edição,
+    o resto do cálculo usa só o `TierSchedule`.
+    """
+    return compile_tier_schedule(table), tuple(tier_table_warnings(table))
+
+
+def compile_tier_schedule(tiers_df):
+    """
+    Compila uma tabela com as colunas 'Mínimo', 'Máximo', 'Valor' em um
+    `TierSchedule`. A tabela recebida não é modificada.
+
+    Linhas sem 'Mínimo' ou 'Valor' são ignoradas e 'Máximo' vazio ou a partir
+    de `OPEN_ENDED_SENTINEL` é tratado como faixa aberta.
+    """
+    mins, maxs, prices = _tier_columns(tiers_df)
+
+    breakpoints = np.unique(np.concatenate([mins, maxs[np.isfinite(maxs)]]))
+    upper = np.append(breakpoints[1:], np.inf)
+
+    # Faixa i contribui no segmento k se já começou (Mínimo <= breakpoints[k]);
+    # ela só cresce no segmento se ainda não terminou (Máximo >= limite superior)
+    started = mins[None, :] <= breakpoints[:, None]
+    open_ended = maxs[None, :] >= upper[:, None]
+
+    slopes = (prices * (started & open_ended)).sum(axis=1)
+    cumulative = (
+        prices * started * (np.minimum(breakpoints[:, None], maxs) - mins)
+    ).sum(axis=1)
+
+    return TierSchedule(
+        breakpoints=tuple(breakpoints.tolist()),
+        cumulative=tuple(cumulative.tolist()),
+        slopes=tuple(slopes.tolist()),
+    )
+
+
+def _no_reply_price(table):
+    """Preço fixo por lead sem resposta (número, DataFrame ou registros)."""
+    if isinstance(table, numbers.Real):
+        return table
+    if isinstance(table, (list, tuple)):
+        return float(table[0]["Valor"])
+    return float(table.iloc[0]["Valor"])
+
+
+def compile_pricing_tables(pricing_tables):
+    """
+    Compila as tabelas de preços em um `PricingBook`, uma única vez para ser
+    reutilizado em várias simulações. Um `PricingBook` é retornado como está
+    (sem cópia) e tabelas já compiladas são mantidas.
+    """
+    if isinstance(pricing_tables, PricingBook):
+        return pricing_tables
+    compiled = {"no_reply": float(_no_reply_price(pricing_tables["no_reply"]))}
+    for name in ("leads", "qualified", "booked"):
+        table = pricing_tables[name]
+        if not isinstance(table, TierSchedule):
+            table = compile_tier_schedule(table)
+        compiled[name] = table
+    return PricingBook(**compiled)
+
+
+def calculate_tiered_cost(quantity, tiers_df):
+    """
+    Calcula o custo total com base em uma tabela de preços escalonada (por faixas).
+    A tabela deve ter as colunas 'Mínimo', 'Máximo', 'Valor' ou já ser um
+    `TierSchedule` compilado (preferível quando chamado muitas vezes).
+    """
+    if quantity == 0:
+        return 0
+
+    schedule = tiers_df
+    if not isinstance(schedule, TierSchedule):
+        schedule = compile_tier_schedule(tiers_df)
+
+    return schedule.cost(quantity)
@@ -0,0 +1,8 @@
+import pytest
+
+from arco_pricing import DEFAULT_PRICING_TABLES, compile_pricing_tables
+
+
+@pytest.fixture(scope="session")
+def pricing():
+    return compile_pricing_tables(DEFAULT_PRICING_TABLES)
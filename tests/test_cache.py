@@ -0,0 +1,21 @@
+from arco_pricing.cache import LRUCache, cached_run_sweep
+
+RATES = {"response": 0.46, "qualification": 0.283, "booking": 0.231}
+AXES = {"qualification": [0.1, 0.2, 0.3], "booking": [0.1, 0.2]}
+
+
+def test_sweep_key_ignores_swept_rates(pricing):
+    cache = LRUCache()
+    first = cached_run_sweep(AXES, 1000, RATES, pricing, cache=cache)
+    moved = {**RATES, "qualification": 0.05, "booking": 0.4}
+    assert cached_run_sweep(AXES, 1000, moved, pricing, cache=cache) is first
+    assert cache.stats()["hits"] == 1
+
+
+def test_sweep_key_keeps_the_other_inputs(pricing):
+    cache = LRUCache()
+    cached_run_sweep(AXES, 1000, RATES, pricing, cache=cache)
+    cached_run_sweep(AXES, 1000, {**RATES, "response": 0.5}, pricing, cache=cache)
+    cached_run_sweep(AXES, 1100, RATES, pricing, cache=cache)
+    cached_run_sweep(AXES, 1000, RATES, pricing, minimum_billing=100.0, cache=cache)
+    assert cache.stats()["misses"] == 4
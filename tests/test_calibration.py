@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pytest
+
+from arco_pricing.calibration import (
+    BetaPosterior,
+    calibrate_rates,
+    posterior_predictive_bands,
+)
+from arco_pricing.defaults import POC_FUNNEL_COUNTS
+
+SAMPLE_COUNTS = {"leads": 200, "replies": 90, "qualified": 30, "booked": 9}
+MINIMUM_BILLING = 4997.0
+
+
+def test_posteriors_follow_the_funnel_counts():
+    posteriors = calibrate_rates(SAMPLE_COUNTS)
+    assert posteriors["response"] == BetaPosterior(91.0, 111.0)
+    assert posteriors["qualification"] == BetaPosterior(31.0, 61.0)
+    assert posteriors["booking"] == BetaPosterior(10.0, 22.0)
+    assert posteriors["response"].mean == pytest.approx(91 / 202)
+    assert posteriors["booking"].mean == pytest.approx(10 / 32)
+
+
+def test_prior_is_added_to_the_counts():
+    posteriors = calibrate_rates(SAMPLE_COUNTS, prior=(0.5, 0.5))
+    assert posteriors["qualification"] == BetaPosterior(30.5, 60.5)
+
+
+def test_inconsistent_counts_raise():
+    with pytest.raises(ValueError, match="qualified"):
+        calibrate_rates({**SAMPLE_COUNTS, "qualified": 100})
+
+
+@pytest.mark.parametrize(
+    ("posterior", "expected"),
+    [
+        # Uniforme: quantis 5% e 95% são os próprios níveis
+        (BetaPosterior(1.0, 1.0), (0.05, 0.95)),
+        # Beta(2, 1) tem CDF x², então os quantis são raízes dos níveis
+        (BetaPosterior(2.0, 1.0), (math.sqrt(0.05), math.sqrt(0.95))),
+    ],
+)
+def test_credible_interval_matches_closed_forms(posterior, expected):
+    assert posterior.credible_interval(0.9) == pytest.approx(expected, abs=1e-4)
+
+
+def test_credible_interval_matches_sampled_quantiles():
+    posterior = calibrate_rates(SAMPLE_COUNTS)["booking"]
+    draws = posterior.sample(1_000_000, np.random.default_rng(0))
+    expected = np.quantile(draws, [0.05, 0.95])
+    assert posterior.credible_interval(0.9) == pytest.approx(expected, abs=2e-3)
+
+
+def test_poc_rates_shown_in_the_app():
+    posteriors = calibrate_rates(POC_FUNNEL_COUNTS)
+    shown = {
+        rate: [round(value * 100, 1) for value in (p.mean, *p.credible_interval())]
+        for rate, p in posteriors.items()
+    }
+    assert shown == {
+        "response": [59.3, 56.3, 62.3],
+        "qualification": [22.7, 19.5, 26.1],
+        "booking": [33.7, 26.1, 41.7],
+    }
+
+
+def test_predictive_bands_are_ordered_and_interpolated(pricing):
+    bands = posterior_predictive_bands(
+        [500, 1000, 2000],
+        calibrate_rates(POC_FUNNEL_COUNTS),
+        pricing,
+        MINIMUM_BILLING,
+        draws=2_000,
+        seed=1,
+    )
+    cost = np.array(list(bands.cost.values()))
+    assert np.all(np.diff(cost, axis=0) >= 0)
+    assert np.all(cost >= MINIMUM_BILLING)
+    cost_at, _ = bands.at(1500)
+    assert cost_at[50] == pytest.approx((bands.cost[50][1] + bands.cost[50][2]) / 2)
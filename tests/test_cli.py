@@ -0,0 +1,149 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from arco_pricing import DEFAULT_PRICING_TABLES, compile_pricing_tables
+from arco_pricing.cli import RESULT_FIELDS, main
+from arco_pricing.simulation import run_simulation_batch
+
+SCENARIOS = [
+    {
+        "prospect": "Acme",
+        "total_leads": 1000,
+        "response": 0.46,
+        "qualification": 0.283,
+        "booking": 0.231,
+    },
+    {
+        "prospect": "Beta",
+        "total_leads": 250,
+        "response": 0.5,
+        "qualification": 0.3,
+        "booking": 0.2,
+        "minimum_billing": 0,
+    },
+    {
+        "prospect": "Gama",
+        "total_leads": 3300,
+        "response": 0.4,
+        "qualification": 0.25,
+        "booking": 0.1,
+        "pricing": "flat",
+    },
+]
+MINIMUM_BILLING = 4997.0
+FLAT_PRICING = {**DEFAULT_PRICING_TABLES, "no_reply": [{"Valor": 1.0}]}
+
+
+def expected_columns(pricing, rows):
+    billing = [row.get("minimum_billing", MINIMUM_BILLING) for row in rows]
+    return run_simulation_batch(
+        np.array([row["total_leads"] for row in rows], dtype=float),
+        {
+            name: np.array([row[name] for row in rows])
+            for name in ("response", "qualification", "booking")
+        },
+        pricing,
+        np.array(billing, dtype=float),
+    )
+
+
+@pytest.fixture
+def flat_pricing_file(tmp_path):
+    path = tmp_path / "flat.json"
+    path.write_text(json.dumps(FLAT_PRICING), encoding="utf-8")
+    return path
+
+
+def quote(tmp_path, input_path, output_name, *extra):
+    output = tmp_path / output_name
+    arguments = [str(input_path), "-o", str(output), "-q", *extra]
+    assert main(["quote", "--minimum-billing", str(MINIMUM_BILLING), *arguments]) == 0
+    return output
+
+
+def check_results(records, pricing):
+    assert [record["prospect"] for record in records] == ["Acme", "Beta", "Gama"]
+    default = expected_columns(pricing, SCENARIOS[:2])
+    flat = expected_columns(compile_pricing_tables(FLAT_PRICING), SCENARIOS[2:])
+    for field in RESULT_FIELDS:
+        expected = [*default[field], *flat[field]]
+        got = [float(record[field]) for record in records]
+        assert got == pytest.approx(expected, rel=1e-12, nan_ok=True)
+
+
+def test_csv_round_trip(tmp_path, pricing, flat_pricing_file):
+    input_path = tmp_path / "scenarios.csv"
+    with open(input_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(SCENARIOS[1]) + ["pricing"])
+        writer.writeheader()
+        writer.writerows(SCENARIOS)
+    output = quote(
+        tmp_path, input_path, "quotes.csv", "--pricing", f"flat={flat_pricing_file}"
+    )
+    with open(output, encoding="utf-8", newline="") as file:
+        reader = csv.DictReader(file)
+        assert reader.fieldnames == ["prospect", *RESULT_FIELDS]
+        check_results(list(reader), pricing)
+
+
+@pytest.mark.parametrize("chunk_size", ["1", "50000"])
+def test_jsonl_round_trip(tmp_path, pricing, flat_pricing_file, chunk_size):
+    input_path = tmp_path / "scenarios.jsonl"
+    input_path.write_text(
+        "".join(json.dumps(row) + "\n" for row in SCENARIOS), encoding="utf-8"
+    )
+    output = quote(
+        tmp_path,
+        input_path,
+        "quotes.jsonl",
+        "--pricing",
+        f"flat={flat_pricing_file}",
+        "--chunk-size",
+        chunk_size,
+    )
+    lines = output.read_text(encoding="utf-8").splitlines()
+    check_results([json.loads(line) for line in lines], pricing)
+
+
+def test_parquet_output(tmp_path, pricing, flat_pricing_file):
+    pq = pytest.importorskip("pyarrow.parquet")
+    input_path = tmp_path / "scenarios.jsonl"
+    input_path.write_text(
+        "".join(json.dumps(row) + "\n" for row in SCENARIOS), encoding="utf-8"
+    )
+    output = quote(
+        tmp_path, input_path, "quotes.parquet", "--pricing", f"flat={flat_pricing_file}"
+    )
+    check_results(pq.read_table(output).to_pylist(), pricing)
+
+
+def test_empty_input_still_writes_the_header(tmp_path):
+    input_path = tmp_path / "empty.csv"
+    input_path.write_text("", encoding="utf-8")
+    output = quote(tmp_path, input_path, "quotes.csv")
+    assert output.read_text(encoding="utf-8").splitlines() == [",".join(RESULT_FIELDS)]
+
+
+@pytest.mark.parametrize("chunk_size", ["0", "-5", "dez"])
+def test_invalid_chunk_size_is_rejected(tmp_path, chunk_size):
+    with pytest.raises(SystemExit) as error:
+        main(["quote", str(tmp_path / "x.csv"), "--chunk-size", chunk_size])
+    assert error.value.code == 2
+
+
+@pytest.mark.parametrize(
+    ("row", "message"),
+    [
+        ({"total_leads": 100, "response": 0.5, "qualification": 0.3}, "booking"),
+        ({**SCENARIOS[0], "pricing": "nenhuma"}, "nenhuma"),
+    ],
+)
+def test_invalid_rows_exit_with_an_error(tmp_path, capsys, row, message):
+    input_path = tmp_path / "scenarios.jsonl"
+    input_path.write_text(json.dumps(row) + "\n", encoding="utf-8")
+    arguments = [str(input_path), "-o", str(tmp_path / "quotes.jsonl"), "-q"]
+    assert main(["quote", *arguments]) == 1
+    assert message in capsys.readouterr().err
@@ -0,0 +1,54 @@
+import math
+
+import numpy as np
+import pytest
+
+from arco_pricing import run_simulation
+from arco_pricing.curves import max_leads_for_budget, minimum_billing_break_even
+
+RATES = {"response": 0.46, "qualification": 0.283, "booking": 0.231}
+MINIMUM_BILLING = 4997.0
+
+
+@pytest.mark.parametrize("budget", [5_000.0, 6_616.43, 10_000.0, 25_000.0])
+def test_budget_leads_is_the_largest_volume_within_budget(pricing, budget):
+    leads = max_leads_for_budget(budget, RATES, pricing, MINIMUM_BILLING)
+    assert leads == int(leads)
+    within = run_simulation(leads, RATES, pricing, MINIMUM_BILLING)
+    over = run_simulation(leads + 1, RATES, pricing, MINIMUM_BILLING)
+    assert within["total_cost"] <= budget < over["total_cost"]
+
+
+def test_budget_array_matches_scalar_calls(pricing):
+    budgets = np.array([5_000.0, 8_000.0, 12_000.0])
+    result = max_leads_for_budget(budgets, RATES, pricing, MINIMUM_BILLING)
+    expected = [
+        max_leads_for_budget(budget, RATES, pricing, MINIMUM_BILLING)
+        for budget in budgets
+    ]
+    assert result.tolist() == expected
+
+
+def test_budget_below_minimum_billing_is_nan(pricing):
+    assert math.isnan(max_leads_for_budget(1_000.0, RATES, pricing, MINIMUM_BILLING))
+
+
+def test_budget_without_cost_growth_is_unlimited(pricing):
+    free = pricing.with_tables(no_reply=0.0)
+    rates = {"response": 0.0, "qualification": 0.0, "booking": 0.0}
+    assert math.isinf(max_leads_for_budget(100.0, rates, free))
+
+
+def test_break_even_reaches_minimum_billing(pricing):
+    leads = minimum_billing_break_even(RATES, pricing, MINIMUM_BILLING)
+    cost = run_simulation(leads, RATES, pricing)["calculated_cost"]
+    assert cost == pytest.approx(MINIMUM_BILLING)
+    below = run_simulation(leads - 1, RATES, pricing)
+    assert below["calculated_cost"] < MINIMUM_BILLING
+
+
+def test_break_even_edge_cases(pricing):
+    assert minimum_billing_break_even(RATES, pricing, 0.0) == 0
+    free = pricing.with_tables(no_reply=0.0)
+    rates = {"response": 0.0, "qualification": 0.0, "booking": 0.0}
+    assert math.isinf(minimum_billing_break_even(rates, free, MINIMUM_BILLING))
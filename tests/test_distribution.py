@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from arco_pricing.distribution import CostDistribution, exact_cost_distribution
+from arco_pricing.montecarlo import run_monte_carlo
+
+RATES = {"response": 0.46, "qualification": 0.283, "booking": 0.231}
+MINIMUM_BILLING = 4997.0
+
+
+@pytest.fixture(scope="module")
+def distribution(pricing):
+    return exact_cost_distribution(1000, RATES, pricing, MINIMUM_BILLING)
+
+
+@pytest.fixture(scope="module")
+def monte_carlo(pricing):
+    return run_monte_carlo(1000, RATES, pricing, MINIMUM_BILLING, 200_000, seed=7)
+
+
+def test_probabilities_cover_all_but_the_tails(distribution):
+    total = distribution.probabilities.sum() + distribution.truncated_mass
+    assert total == pytest.approx(1.0)
+    assert distribution.truncated_mass < 1e-10
+    assert np.all(np.diff(distribution.calculated_cost) > 0)
+
+
+def test_exact_matches_monte_carlo(distribution, monte_carlo):
+    costs = monte_carlo["total_cost"]
+    standard_error = costs.std() / np.sqrt(costs.size)
+    assert distribution.mean == pytest.approx(costs.mean(), abs=5 * standard_error)
+
+    exact = distribution.cost_percentiles()
+    sampled = monte_carlo.cost_percentiles()
+    for percentile in exact:
+        assert exact[percentile] == pytest.approx(sampled[percentile], rel=0.01)
+    for budget in (6_000.0, 6_616.43, 7_000.0):
+        assert distribution.probability_exceeding(budget) == pytest.approx(
+            monte_carlo.probability_exceeding(budget), abs=0.01
+        )
+
+
+def test_minimum_billing_mass_matches_monte_carlo(pricing):
+    # Com 600 leads o consumo mínimo é cobrado em boa parte dos meses
+    distribution = exact_cost_distribution(600, RATES, pricing, MINIMUM_BILLING)
+    monte_carlo = run_monte_carlo(600, RATES, pricing, MINIMUM_BILLING, 200_000, 3)
+    assert 0.05 < distribution.minimum_billing_probability < 0.95
+    assert distribution.minimum_billing_probability == pytest.approx(
+        monte_carlo.minimum_billing_probability, abs=0.01
+    )
+
+
+def test_statistics_use_the_retained_mass():
+    distribution = CostDistribution(
+        calculated_cost=np.array([100.0, 300.0]),
+        probabilities=np.array([0.25, 0.25]),
+        minimum_billing=200.0,
+        truncated_mass=0.5,
+    )
+    assert distribution.mean == pytest.approx(250.0)
+    assert distribution.cost_percentiles((50,)) == {50: 200.0}
+    assert distribution.minimum_billing_probability == pytest.approx(0.5)
+    assert distribution.probability_exceeding(250.0) == pytest.approx(0.5)
+    assert distribution.probability_exceeding(50.0) == pytest.approx(1.0)
+
+
+def test_too_many_outcomes_raises(pricing):
+    with pytest.raises(ValueError, match="Monte Carlo"):
+        exact_cost_distribution(1000, RATES, pricing, max_outcomes=1_000)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from arco_pricing import run_simulation
+from arco_pricing.incremental import IncrementalEvaluator
+from arco_pricing.sweep import run_sweep
+
+RATES = {"response": 0.46, "qualification": 0.283, "booking": 0.231}
+MINIMUM_BILLING = 4997.0
+
+
+def test_booking_change_only_recomputes_the_booking_cost(pricing):
+    evaluator = IncrementalEvaluator()
+    evaluator.simulate(1000, RATES, pricing, MINIMUM_BILLING)
+    assert evaluator.stats()["evaluated"] == 4
+
+    moved = {**RATES, "booking": 0.3}
+    result = evaluator.simulate(1000, moved, pricing, MINIMUM_BILLING)
+    stats = evaluator.stats()
+    assert (stats["evaluated"], stats["skipped"]) == (5, 3)
+    assert result == run_simulation(1000, moved, pricing, MINIMUM_BILLING)
+
+
+def test_qualification_change_keeps_the_reply_costs(pricing):
+    evaluator = IncrementalEvaluator()
+    evaluator.simulate(1000, RATES, pricing)
+    moved = {**RATES, "qualification": 0.35}
+    result = evaluator.simulate(1000, moved, pricing)
+    assert evaluator.stats()["evaluated"] == 6
+    assert result == run_simulation(1000, moved, pricing)
+
+
+def test_repeated_scenario_is_fully_reused(pricing):
+    evaluator = IncrementalEvaluator()
+    first = evaluator.simulate(1000, RATES, pricing, MINIMUM_BILLING)
+    second = evaluator.simulate(1000, RATES, pricing, MINIMUM_BILLING)
+    assert first == second
+    assert evaluator.stats()["evaluated"] == 4
+
+
+def test_sweep_matches_run_sweep_and_skips_upstream_stages(pricing):
+    evaluator = IncrementalEvaluator()
+    axes = {"qualification": [0.1, 0.2, 0.3], "booking": [0.1, 0.2]}
+    result = evaluator.sweep(axes, 1000, RATES, pricing, MINIMUM_BILLING)
+    expected = run_sweep(axes, 1000, RATES, pricing, MINIMUM_BILLING)
+    for key, values in expected.data.items():
+        np.testing.assert_array_equal(result[key], values)
+    # Grade 3 x 2: respostas uma vez, qualificados por linha, agendados por célula
+    stats = evaluator.stats()
+    assert stats["evaluated"] == 1 + 1 + 3 + 6
+    assert stats["skipped"] == 4 * 6 - stats["evaluated"]
+
+
+@pytest.mark.parametrize("leads", [0, 250, 3500])
+def test_results_match_a_full_simulation(pricing, leads):
+    evaluator = IncrementalEvaluator()
+    for booking in (0.0, 0.2, 0.5):
+        rates = {**RATES, "booking": booking}
+        result = evaluator.simulate(leads, rates, pricing, MINIMUM_BILLING)
+        assert result == run_simulation(leads, rates, pricing, MINIMUM_BILLING)
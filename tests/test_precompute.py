@@ -0,0 +1,84 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from arco_pricing.cache import pricing_fingerprint
+from arco_pricing.precompute import (
+    METADATA_FILE,
+    RATE_AXES,
+    ResultCube,
+    build_cube,
+    open_cube,
+    slider_values,
+)
+from arco_pricing.simulation import run_simulation_batch
+
+MINIMUM_BILLING = 4997.0
+AXES = {
+    "total_leads": slider_values(0, 3500, 700, [1000]),
+    "response": slider_values(0.0, 100.0, 12.5, [46.0]),
+    "qualification": slider_values(0.0, 100.0, 12.5, [28.3]),
+    "booking": slider_values(0.0, 100.0, 12.5, [23.1]),
+}
+
+
+@pytest.fixture(scope="module")
+def cube(pricing, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("cube")
+    build_cube(pricing, str(directory), AXES)
+    return ResultCube(str(directory))
+
+
+def test_lookups_match_batch_evaluation_bit_for_bit(cube, pricing):
+    # Mesma conta do app: taxas em % divididas por 100
+    grid = np.meshgrid(
+        *(np.array(AXES[name], dtype=float) for name in ("total_leads", *RATE_AXES)),
+        indexing="ij",
+    )
+    leads, *rates = (values.ravel() for values in grid)
+    rates = {name: values / 100.0 for name, values in zip(RATE_AXES, rates)}
+    expected = run_simulation_batch(leads, rates, pricing, MINIMUM_BILLING)
+    for point in range(leads.size):
+        scenario = {name: float(values[point]) for name, values in rates.items()}
+        result = cube.lookup(float(leads[point]), scenario, MINIMUM_BILLING)
+        for key, value in result.items():
+            assert value == expected[key][point], (key, leads[point], scenario)
+
+
+def test_points_outside_the_grid_are_misses(cube):
+    # Pontos da grade só casam com a mesma conta do app (% / 100)
+    inside = {
+        "response": 46.0 / 100,
+        "qualification": 28.3 / 100,
+        "booking": 23.1 / 100,
+    }
+    before = cube.stats()
+    assert cube.lookup(1000, inside) is not None
+    assert cube.lookup(1050, inside) is None
+    assert cube.lookup(1000, {**inside, "booking": 0.232}) is None
+    assert cube.lookup(4200, inside) is None
+    after = cube.stats()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 3
+
+
+def test_metadata_records_the_pricing_fingerprint(cube, pricing):
+    assert cube.pricing_fingerprint == pricing_fingerprint(pricing)
+    assert np.array_equal(cube.coords["response"], np.array(AXES["response"]) / 100)
+
+
+def test_open_cube_without_metadata_is_none(tmp_path):
+    assert open_cube(str(tmp_path)) is None
+
+
+def test_unknown_format_version_is_rejected(pricing, tmp_path):
+    path = build_cube(pricing, str(tmp_path), AXES)
+    with open(path, encoding="utf-8") as file:
+        metadata = json.load(file)
+    metadata["format_version"] += 1
+    with open(os.path.join(tmp_path, METADATA_FILE), "w", encoding="utf-8") as file:
+        json.dump(metadata, file)
+    with pytest.raises(ValueError, match="Versão"):
+        ResultCube(str(tmp_path))
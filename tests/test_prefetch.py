@@ -0,0 +1,33 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from arco_pricing.prefetch import Prefetcher
+
+
+def wait_completed(prefetcher, jobs):
+    while prefetcher.stats()["completed"] < jobs:
+        time.sleep(0.001)
+
+
+def test_shared_executor_outlives_a_session():
+    executor = ThreadPoolExecutor(max_workers=1)
+    first = Prefetcher(executor=executor)
+    first.schedule({"a": lambda: 1})
+    wait_completed(first, 1)
+    assert first.take("a") == (True, 1)
+    first.shutdown()
+
+    second = Prefetcher(executor=executor)
+    second.schedule({"b": lambda: 2})
+    wait_completed(second, 1)
+    assert second.take("b") == (True, 2)
+    executor.shutdown()
+
+
+def test_own_executor_is_shut_down():
+    prefetcher = Prefetcher()
+    prefetcher.shutdown()
+    with pytest.raises(RuntimeError):
+        prefetcher.schedule({"a": lambda: 1})
@@ -0,0 +1,62 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from arco_pricing import run_simulation, run_simulation_batch
+
+# Cenário padrão dos sliders do app
+RATES = {"response": 0.46, "qualification": 0.283, "booking": 0.231}
+MINIMUM_BILLING = 4997.0
+
+
+def test_default_scenario_cost(pricing):
+    result = run_simulation(1000, RATES, pricing, MINIMUM_BILLING)
+    assert result["num_replies"] == pytest.approx(460)
+    assert result["total_cost"] == pytest.approx(6616.4264)
+
+
+def test_minimum_billing_applies_below_calculated_cost(pricing):
+    result = run_simulation(100, RATES, pricing, MINIMUM_BILLING)
+    assert result["calculated_cost"] < MINIMUM_BILLING
+    assert result["total_cost"] == MINIMUM_BILLING
+
+
+def test_batch_matches_scalar_on_a_grid(pricing):
+    leads = np.arange(0, 3600, 100, dtype=float)[:, None, None]
+    response = np.linspace(0, 1, 11)[None, :, None]
+    booking = np.linspace(0, 1, 7)[None, None, :]
+    rates = {"response": response, "qualification": 0.283, "booking": booking}
+    batch = run_simulation_batch(leads, rates, pricing, MINIMUM_BILLING)
+
+    for index in np.ndindex(batch["total_cost"].shape):
+        scalar = run_simulation(
+            leads[index[0], 0, 0],
+            {
+                "response": response[0, index[1], 0],
+                "qualification": 0.283,
+                "booking": booking[0, 0, index[2]],
+            },
+            pricing,
+            MINIMUM_BILLING,
+        )
+        for key, value in scalar.items():
+            assert batch[key][index] == pytest.approx(value, rel=1e-12, abs=1e-9)
+
+
+def test_price_multiplier_scales_costs(pricing):
+    base = run_simulation_batch(1000, RATES, pricing)
+    doubled = run_simulation_batch(1000, RATES, pricing, price_multiplier=2.0)
+    assert doubled["calculated_cost"] == pytest.approx(2 * base["calculated_cost"])
+
+
+def test_import_does_not_load_ui_libraries():
+    code = (
+        "import sys, arco_pricing; "
+        "print([m for m in ('streamlit', 'pandas', 'plotly') if m in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "[]"
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from arco_pricing.distribution import exact_cost_distribution
+from arco_pricing.streaming import (
+    FixedHistogram,
+    RunningMoments,
+    run_streaming_monte_carlo,
+)
+
+RATES = {"response": 0.46, "qualification": 0.283, "booking": 0.231}
+MINIMUM_BILLING = 4997.0
+
+
+def test_merged_moments_match_the_whole_sample():
+    values = np.random.default_rng(0).gamma(2.0, 100.0, size=10_001)
+    merged = RunningMoments()
+    for chunk in np.array_split(values, 7):
+        merged = merged.merge(RunningMoments.from_values(chunk))
+    assert merged.count == values.size
+    assert merged.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert merged.variance == pytest.approx(values.var(ddof=1), rel=1e-10)
+    assert (merged.minimum, merged.maximum) == (values.min(), values.max())
+
+
+def test_merged_histograms_add_counts():
+    edges = np.linspace(0.0, 10.0, 11)
+    left = FixedHistogram.from_values([-1.0, 0.5, 5.5], edges)
+    right = FixedHistogram.from_values([5.5, 9.5, 12.0], edges)
+    merged = left.merge(right)
+    assert merged.total == 6
+    assert (merged.underflow, merged.overflow) == (1, 1)
+    assert merged.counts[5] == 2
+    with pytest.raises(ValueError):
+        left.merge(FixedHistogram.from_values([1.0], np.linspace(0.0, 5.0, 11)))
+
+
+def test_result_does_not_depend_on_worker_count(pricing):
+    runs = [
+        run_streaming_monte_carlo(
+            1000,
+            RATES,
+            pricing,
+            MINIMUM_BILLING,
+            trials=200_000,
+            chunk_size=50_000,
+            workers=workers,
+            seed=11,
+        )
+        for workers in (1, 2)
+    ]
+    single, multiple = runs
+    assert single.moments == multiple.moments
+    assert np.array_equal(single.histogram.counts, multiple.histogram.counts)
+    assert single.minimum_billing_hits == multiple.minimum_billing_hits
+
+
+def test_streaming_percentiles_match_the_exact_distribution(pricing):
+    result = run_streaming_monte_carlo(
+        1000, RATES, pricing, MINIMUM_BILLING, trials=200_000, workers=1, seed=5
+    )
+    exact = exact_cost_distribution(1000, RATES, pricing, MINIMUM_BILLING)
+    assert result.mean == pytest.approx(exact.mean, rel=0.005)
+    sketched = result.cost_percentiles()
+    for percentile, value in exact.cost_percentiles().items():
+        assert sketched[percentile] == pytest.approx(value, rel=0.01)
+
+
+@pytest.mark.parametrize(
+    ("trials", "chunk_size", "workers"), [(100, 250_000, 1), (300, 100, 2)]
+)
+def test_idle_workers_are_not_counted(pricing, trials, chunk_size, workers):
+    result = run_streaming_monte_carlo(
+        1000, RATES, pricing, trials=trials, chunk_size=chunk_size, workers=4, seed=1
+    )
+    assert result.workers == workers
+    assert result.trials_per_second_per_core == pytest.approx(
+        result.trials_per_second / workers
+    )
+
+
+@pytest.mark.parametrize("argument", ["trials", "chunk_size", "workers"])
+def test_non_positive_sizes_raise(pricing, argument):
+    with pytest.raises(ValueError, match=argument):
+        run_streaming_monte_carlo(1000, RATES, pricing, **{argument: 0})
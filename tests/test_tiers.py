@@ -0,0 +1,81 @@
+import math
+
+import pandas as pd
+import pytest
+
+from arco_pricing import OPEN_ENDED_SENTINEL, normalize_tier_table
+from arco_pricing.tiers import calculate_tiered_cost, tier_table_warnings
+
+
+def tiers(*rows):
+    return [
+        {"Mínimo": low, "Máximo": high, "Valor": price} for low, high, price in rows
+    ]
+
+
+def test_contiguous_table_has_no_warnings():
+    table = tiers((0, 100, 2.0), (100, OPEN_ENDED_SENTINEL, 1.0))
+    assert tier_table_warnings(table) == []
+
+
+def test_open_ended_sentinel_becomes_infinity():
+    schedule, warnings = normalize_tier_table(
+        tiers((0, 100, 2.0), (100, OPEN_ENDED_SENTINEL, 1.0))
+    )
+    assert warnings == ()
+    assert schedule.breakpoints == (0.0, 100.0)
+    # Acima do sentinela a faixa aberta continua cobrando
+    quantity = 2 * OPEN_ENDED_SENTINEL
+    assert calculate_tiered_cost(quantity, schedule) == pytest.approx(
+        200.0 + (quantity - 100)
+    )
+
+
+def test_gap_is_reported_and_not_charged():
+    table = tiers((0, 100, 2.0), (200, OPEN_ENDED_SENTINEL, 1.0))
+    assert tier_table_warnings(table) == [
+        "Lacuna entre 100 e 200: essas quantidades não são cobradas."
+    ]
+    assert calculate_tiered_cost(150, table) == pytest.approx(200.0)
+    assert calculate_tiered_cost(250, table) == pytest.approx(250.0)
+
+
+def test_overlap_is_reported_and_prices_add_up():
+    table = tiers((0, 150, 2.0), (100, OPEN_ENDED_SENTINEL, 1.0))
+    assert tier_table_warnings(table) == [
+        "Sobreposição entre 100 e 150: os preços são somados."
+    ]
+    assert calculate_tiered_cost(150, table) == pytest.approx(350.0)
+
+
+def test_negative_price_and_inverted_limits_are_reported():
+    table = tiers((0, 100, -2.0), (100, 50, 1.0), (100, OPEN_ENDED_SENTINEL, 1.0))
+    warnings = tier_table_warnings(table)
+    assert "Faixa 0–100 com preço negativo." in warnings
+    assert "Faixa 100–50 com limites inválidos." in warnings
+
+
+def test_missing_open_tier_is_reported():
+    assert tier_table_warnings(tiers((0, 100, 2.0))) == [
+        "Nenhuma faixa aberta: acima de 100 não há cobrança."
+    ]
+
+
+@pytest.mark.parametrize("missing", [None, math.nan])
+def test_incomplete_rows_are_ignored(missing):
+    table = pd.DataFrame(
+        tiers((0, OPEN_ENDED_SENTINEL, 1.0), (missing, 10, 5.0), (10, 20, missing))
+    )
+    schedule, warnings = normalize_tier_table(table)
+    assert warnings == ("2 linha(s) sem Mínimo ou Valor ignorada(s).",)
+    assert calculate_tiered_cost(50, schedule) == pytest.approx(50.0)
+
+
+@pytest.mark.parametrize(
+    "table",
+    [[], pd.DataFrame(columns=["Mínimo", "Máximo", "Valor"]), tiers((None, 10, 1.0))],
+)
+def test_empty_table_is_reported(table):
+    schedule, warnings = normalize_tier_table(table)
+    assert warnings[-1] == "Nenhuma faixa preenchida: nenhuma quantidade é cobrada."
+    assert calculate_tiered_cost(100, schedule) == 0